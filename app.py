@@ -1,6 +1,8 @@
 import os
 import sys
+import multiprocessing
 from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QTimer
 
 # 引入文件夹路径
 relative_path = '..\\'
@@ -11,9 +13,15 @@ sys.path.append(utils_folder_path)
 from interface.main_interface import MainInterface
 
 if __name__ == '__main__':
+    # 打包后的程序使用进程池时需要
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = MainInterface()
     window.setStyleSheet("MainInterface {background: white}")
     window.resize(1000, 600)
     window.show()
+    # 窗口显示后把上次中断的重命名改回原名
+    QTimer.singleShot(0, window.recover_renames)
+    # 窗口显示后再在后台导入PDF库，第一次提取时不必等待
+    QTimer.singleShot(0, window.preload_pdf_libraries)
     sys.exit(app.exec())
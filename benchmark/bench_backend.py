@@ -0,0 +1,63 @@
+"""
+PDF文本后端对比基准：吞吐量与字段准确率
+
+以 pdfplumber 的提取结果为基准，统计其他后端每个字段与基准一致的比例
+
+用法: python benchmark/bench_backend.py <PDF文件夹> [--backends pdfplumber pymupdf]
+"""
+import os
+import sys
+import time
+import argparse
+
+# 引入文件夹路径
+relative_path = '..'
+current_file_path = os.path.dirname(__file__)
+utils_folder_path = os.path.abspath(os.path.join(current_file_path, relative_path))
+sys.path.append(utils_folder_path)
+
+from utils.pdf import extract_invoice_info, FIELD_EXTRACTORS
+from utils.pdf_backend import BACKENDS
+
+def list_pdf_files(folder):
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith('.pdf')
+    )
+
+def run_backend(pdf_paths, backend):
+    """逐个提取，返回结果列表和总耗时"""
+    results = []
+    start = time.perf_counter()
+    for pdf_path in pdf_paths:
+        results.append(extract_invoice_info(pdf_path, backend=backend) or {})
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='PDF文本后端对比基准')
+    parser.add_argument('folder', help='PDF文件夹')
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    args = parser.parse_args()
+
+    pdf_paths = list_pdf_files(args.folder)
+    if not pdf_paths:
+        print(f'{args.folder} 中没有PDF文件')
+        return
+
+    reference, _ = run_backend(pdf_paths, 'pdfplumber')
+
+    print(f'文件数: {len(pdf_paths)}')
+    for backend in args.backends:
+        results, elapsed = run_backend(pdf_paths, backend)
+        print(f'\n[{backend}] {len(pdf_paths) / elapsed:.1f} 文件/秒, 平均 {elapsed / len(pdf_paths) * 1000:.1f} ms/文件')
+
+        # 与 pdfplumber 基准逐字段比较
+        for field in FIELD_EXTRACTORS:
+            present = [i for i, info in enumerate(reference) if field in info]
+            if not present:
+                continue
+            same = sum(1 for i in present if results[i].get(field) == reference[i][field])
+            print(f'  {field:<8} {same}/{len(present)} ({same / len(present):.1%})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+extract_invoice_info 基准测试
+
+在合成发票集上分别测试 10、100、1000 个文件，报告吞吐量（文件/秒）、单张发票耗时 p50/p95、
+峰值内存（主进程与工作进程中的最大值）、关键字段准确率，以及按提取结果预测报销类别的预测率和准确率。
+预测率为 0（分类器在合成发票上一张都没有分出来）时以非零状态退出。
+
+用法: python benchmark/bench_extract.py [--corpus 发票文件夹] [--sizes 10 100 1000] [--workers 0] [--backend pdfplumber]
+                                       [--profile profile.json]
+未指定 --corpus 时在临时文件夹中生成合成发票
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# 引入文件夹路径
+relative_path = '..'
+current_file_path = os.path.dirname(__file__)
+utils_folder_path = os.path.abspath(os.path.join(current_file_path, relative_path))
+sys.path.append(utils_folder_path)
+
+from utils.pdf import extract_invoice_info, extract_invoice_info_batch, describe_patterns, EXTRACTOR_FINGERPRINT
+from utils.extract_profile import ExtractProfile
+from utils.mem_usage import peak_rss_mb
+from utils.pdf_backend import BACKENDS
+from utils.invoice_classifier import KeywordClassifier
+from config.cfg import CLASS_KEYWORDS, CLASSIFY
+from benchmark.gen_invoices import generate_corpus
+
+def timed_extract(pdf_path, backend):
+    """在工作进程中计时单个文件的提取"""
+    start = time.perf_counter()
+    info = extract_invoice_info(pdf_path, backend=backend)
+    return time.perf_counter() - start, info, peak_rss_mb()
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(p / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+def run(pdf_paths, workers, backend):
+    """提取一批文件，返回 (总耗时, [(单张耗时, 结果)], 峰值内存)"""
+    start = time.perf_counter()
+    if workers <= 1:
+        results = [timed_extract(pdf_path, backend) for pdf_path in pdf_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(timed_extract, pdf_paths, [backend] * len(pdf_paths)))
+    elapsed = time.perf_counter() - start
+    peaks = [peak for _, _, peak in results if peak is not None] + [peak_rss_mb() or 0]
+    return elapsed, [(latency, info) for latency, info, _ in results], max(peaks)
+
+def accuracy(pdf_paths, results, manifest):
+    """与 manifest 中的真值逐字段比较，返回 字段 -> 正确率"""
+    correct = {}
+    for pdf_path, (_, info) in zip(pdf_paths, results):
+        expected = manifest.get(os.path.basename(pdf_path), {}).get('expected', {})
+        for field, value in expected.items():
+            correct.setdefault(field, 0)
+            if info and info.get(field) == value:
+                correct[field] += 1
+    return {field: count / len(pdf_paths) for field, count in correct.items()}
+
+def classification(pdf_paths, results, manifest):
+    """
+    用提取结果预测报销类别，与 manifest 中的类别比较
+
+    :return: (预测率, 正确率)，预测率为置信度达到 CLASSIFY['MIN_CONFIDENCE'] 的比例；manifest 中没有类别时为 None
+    """
+    categories = [manifest.get(os.path.basename(pdf_path), {}).get('category') for pdf_path in pdf_paths]
+    if not any(categories):
+        return None
+    predictions = KeywordClassifier(CLASS_KEYWORDS).classify_batch([info for _, info in results])
+    predicted = correct = 0
+    for category, (predicted_category, confidence) in zip(categories, predictions):
+        if predicted_category is None or confidence < CLASSIFY['MIN_CONFIDENCE']:
+            continue
+        predicted += 1
+        correct += predicted_category == category
+    return predicted / len(pdf_paths), correct / len(pdf_paths)
+
+def main():
+    parser = argparse.ArgumentParser(description='extract_invoice_info 基准测试')
+    parser.add_argument('--corpus', help='发票文件夹（需包含 gen_invoices.py 生成的 manifest.json），默认生成到临时文件夹')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='每轮测试的文件数')
+    parser.add_argument('--workers', type=int, default=0, help='进程数，0 表示使用全部CPU核心，1 表示单进程')
+    parser.add_argument('--backend', default='pdfplumber', choices=list(BACKENDS))
+    parser.add_argument('--json', help='把结果另存为 JSON 文件，便于比较不同版本')
+    parser.add_argument('--profile', help='额外用 extract_invoice_info_batch 开启性能统计跑一遍语料，把各阶段耗时和规则命中情况写入该 JSON 文件')
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    corpus = args.corpus or tempfile.mkdtemp(prefix='invoice_bench_')
+    manifest_path = os.path.join(corpus, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        print(f'生成 {max(args.sizes)} 张合成发票: {corpus}')
+        generate_corpus(corpus, max(args.sizes))
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    all_paths = [os.path.join(corpus, name) for name in sorted(manifest)]
+
+    print(f'后端: {args.backend}, 进程数: {workers}')
+    print(f"{'文件数':>6}{'文件/秒':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'峰值内存(MB)':>14}  准确率")
+    report = []
+    for size in args.sizes:
+        # 文件不够时循环使用
+        pdf_paths = [all_paths[i % len(all_paths)] for i in range(size)]
+        elapsed, results, peak = run(pdf_paths, workers, args.backend)
+        latencies = [latency * 1000 for latency, _ in results]
+        field_accuracy = accuracy(pdf_paths, results, manifest)
+        class_result = classification(pdf_paths, results, manifest)
+        row = {
+            'files': size,
+            'files_per_sec': size / elapsed,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'peak_rss_mb': peak,
+            'accuracy': field_accuracy,
+        }
+        accuracy_text = ', '.join(f'{field} {value:.0%}' for field, value in field_accuracy.items())
+        if class_result is not None:
+            row['class_predicted'], row['class_accuracy'] = class_result
+            accuracy_text += f', 类别 {class_result[1]:.0%}（预测率 {class_result[0]:.0%}）'
+        report.append(row)
+        print(f"{size:>6}{row['files_per_sec']:>10.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{peak:>14.1f}  {accuracy_text}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'backend': args.backend, 'workers': workers, 'results': report}, f, ensure_ascii=False, indent=2)
+
+    if any(row.get('class_predicted') == 0 for row in report):
+        sys.exit('类别预测率为 0：分类器没有从提取结果中预测出任何类别，检查项目明细和销售方名称的提取')
+
+    if args.profile:
+        profile = ExtractProfile()
+        extract_invoice_info_batch(all_paths, workers, backend=args.backend, profile=profile)
+        profile.dump(args.profile, describe_patterns(), extractor=EXTRACTOR_FINGERPRINT, backend=args.backend)
+        print(f'\n性能统计 ({profile.files} 个文件): {args.profile}')
+        for stage, timing in profile.summary()['timings'].items():
+            print(f"  {stage:<8}{timing['avg_ms']:>10.3f} ms/次{timing['count']:>8} 次")
+
+if __name__ == '__main__':
+    main()
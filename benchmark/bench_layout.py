@@ -0,0 +1,78 @@
+"""
+版面模板模式基准：按区域裁剪提取 vs 读取全文提取
+
+对同一批发票分别用全文模式和版面模板模式 (layout=True) 提取同一组字段，报告单张发票耗时 p50/p95、
+加速比、回退到全文的文件数，以及与全文模式结果一致的比例。
+
+用法: python benchmark/bench_layout.py [--corpus 发票文件夹] [--count 100] [--fields rename] [--backends pdfplumber pymupdf]
+未指定 --corpus 时在临时文件夹中生成合成发票
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# 引入文件夹路径
+relative_path = '..'
+current_file_path = os.path.dirname(__file__)
+utils_folder_path = os.path.abspath(os.path.join(current_file_path, relative_path))
+sys.path.append(utils_folder_path)
+
+from utils.pdf import extract_invoice_info, FIELD_PROFILES
+from utils.pdf_backend import BACKENDS, PYMUPDF_AVAILABLE
+from utils.extract_profile import ExtractProfile
+from benchmark.gen_invoices import generate_corpus
+from benchmark.bench_extract import percentile
+
+def run(pdf_paths, backend, fields, layout):
+    """逐个提取，返回 (结果列表, 单张耗时列表(ms), 性能统计)"""
+    results, latencies = [], []
+    profile = ExtractProfile()
+    for pdf_path in pdf_paths:
+        start = time.perf_counter()
+        results.append(extract_invoice_info(pdf_path, backend=backend, fields=fields, layout=layout, profile=profile) or {})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, latencies, profile
+
+def main():
+    parser = argparse.ArgumentParser(description='版面模板模式基准')
+    parser.add_argument('--corpus', help='PDF文件夹，默认生成合成发票到临时文件夹')
+    parser.add_argument('--count', type=int, default=100, help='生成的合成发票数量')
+    parser.add_argument('--fields', default='rename', choices=[name for name, fields in FIELD_PROFILES.items() if fields])
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    args = parser.parse_args()
+
+    corpus = args.corpus or tempfile.mkdtemp(prefix='invoice_layout_')
+    if not args.corpus:
+        print(f'生成 {args.count} 张合成发票: {corpus}')
+        generate_corpus(corpus, args.count)
+    pdf_paths = sorted(
+        os.path.join(corpus, name) for name in os.listdir(corpus)
+        if name.lower().endswith('.pdf')
+    )
+    print(f'文件数: {len(pdf_paths)}, 字段: {args.fields}')
+
+    for backend in args.backends:
+        if backend == 'pymupdf' and not PYMUPDF_AVAILABLE:
+            print(f'\n[{backend}] 未安装，跳过')
+            continue
+        # 预热，排除首次导入和字体加载的开销
+        extract_invoice_info(pdf_paths[0], backend=backend, fields=args.fields, layout=True)
+
+        full_results, full_latencies, _ = run(pdf_paths, backend, args.fields, False)
+        layout_results, layout_latencies, profile = run(pdf_paths, backend, args.fields, True)
+
+        # 版面区域没能提取全部字段时才会读取全文
+        fallback = profile.timings.get('文本提取', [0, 0.0])[0]
+        same = sum(1 for full, layout in zip(full_results, layout_results) if full == layout)
+
+        print(f'\n[{backend}]')
+        print(f"{'模式':<8}{'p50(ms)':>10}{'p95(ms)':>10}{'平均(ms)':>10}")
+        for name, latencies in (('全文', full_latencies), ('版面模板', layout_latencies)):
+            print(f"{name:<8}{percentile(latencies, 50):>10.2f}{percentile(latencies, 95):>10.2f}{sum(latencies) / len(latencies):>10.2f}")
+        print(f'加速比: {sum(full_latencies) / sum(layout_latencies):.1f}x, '
+              f'回退全文: {fallback}/{len(pdf_paths)}, 与全文结果一致: {same}/{len(pdf_paths)}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+批量重命名基准测试
+
+在临时文件夹中创建文件，构造混合的重命名计划：普通改名、链（A→B→C）、交换与轮换（A→B→C→A）、
+同批重名以及与批次外已有文件重名，分别测量生成计划 (plan_renames) 和执行 (batch_rename) 的耗时，
+并检查每个文件的内容是否到达预期的位置。规划的耗时应与文件数成正比。
+同一计划再写入重命名日志执行一遍（每步一条记录，每 --fsync-every 步 fsync 一次），然后整批撤销并检查每个文件都回到原名，
+且记入历史发票索引的记录都已删除（撤销后再次重命名不会被当作已报销的发票拦下）。
+
+用法: python benchmark/bench_rename.py [--sizes 1000 10000] [--seed 0] [--fsync-every 256]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+
+# 引入文件夹路径
+relative_path = '..'
+current_file_path = os.path.dirname(__file__)
+utils_folder_path = os.path.abspath(os.path.join(current_file_path, relative_path))
+sys.path.append(utils_folder_path)
+
+from utils.batch_rename import batch_rename, plan_renames
+from utils.rename_journal import RenameJournal
+from utils.invoice_index import InvoiceIndex
+
+def build_case(folder, size, rng):
+    """
+    创建 size 个文件和重命名计划
+
+    :return: (原路径列表, 新文件名列表, 轮换组数, 原文件名 -> 预期的最终文件名，重名的文件为 None)
+    """
+    names = [f'f{i:06d}.pdf' for i in range(size)]
+    rng.shuffle(names)
+    targets = {}
+    cycles = 0
+    position = 0
+    while position < len(names):
+        kind = rng.random()
+        if kind < 0.3:
+            # 交换或轮换
+            group = names[position:position + rng.randint(2, 6)]
+            for src, dst in zip(group, group[1:] + group[:1]):
+                targets[src] = dst
+            cycles += len(group) > 1
+        elif kind < 0.5:
+            # 链：最后一个改为新名称，其余依次占用后一个的名称
+            group = names[position:position + rng.randint(2, 6)]
+            for src, dst in zip(group, group[1:]):
+                targets[src] = dst
+            targets[group[-1]] = 'new_' + group[-1]
+        elif kind < 0.6:
+            # 同批重名
+            group = names[position:position + 2]
+            for src in group:
+                targets[src] = f'dup_{group[0]}'
+        elif kind < 0.65:
+            # 与批次外的已有文件重名
+            group = names[position:position + 1]
+            with open(os.path.join(folder, 'ext_' + group[0]), 'w') as f:
+                f.write('external')
+            targets[group[0]] = 'ext_' + group[0]
+        else:
+            group = names[position:position + 1]
+            targets[group[0]] = 'new_' + group[0]
+        position += len(group)
+
+    for name in names:
+        with open(os.path.join(folder, name), 'w') as f:
+            f.write(name)
+    src_list = [os.path.join(folder, name) for name in names]
+    new_names = [targets[name] for name in names]
+    expected = {name: (None if targets[name].startswith(('dup_', 'ext_')) else targets[name]) for name in names}
+    return src_list, new_names, cycles, expected
+
+def verify(folder, expected, result):
+    """检查每个文件的内容都到达了报告中的最终位置，且预期不重名的文件位于预期的名称"""
+    errors = 0
+    for source, _, final in result.renamed_files:
+        source = os.path.basename(source)
+        with open(final) as f:
+            if f.read() != source:
+                errors += 1
+        if expected[source] is not None and os.path.basename(final) != expected[source]:
+            errors += 1
+    leftovers = [name for name in os.listdir(folder) if name.endswith('.tmp_rename')]
+    return errors + len(leftovers) + len(result.failed_files)
+
+def verify_undo(folder, src_list, result):
+    """撤销后每个文件都回到原名且内容不变"""
+    errors = 0
+    for src in src_list:
+        try:
+            with open(src) as f:
+                errors += f.read() != os.path.basename(src)
+        except OSError:
+            errors += 1
+    return errors + len(result.failed_files)
+
+def verify_index_after_undo(index_path, src_list, result, undo_result):
+    """按重命名结果记录历史发票索引，撤销后删除改回原名的文件的记录，返回仍留在索引中的发票数"""
+    invoice_index = InvoiceIndex(index_path)
+    numbers = {src: f'{i:020d}' for i, src in enumerate(src_list)}
+    try:
+        invoice_index.record({"invoice_number": numbers[source], "export_path": final} for source, _, final in result.renamed_files)
+        invoice_index.remove_exported(source for source, _, final in undo_result.renamed_files if source != final)
+        return len(invoice_index.lookup(numbers.values()))
+    finally:
+        invoice_index.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='批量重命名基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='每轮的文件数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fsync-every', type=int, default=256, help='重命名日志每多少步 fsync 一次')
+    args = parser.parse_args()
+
+    print(f"{'文件数':>8}{'轮换组':>8}{'步骤数':>8}{'规划(ms)':>12}{'执行(ms)':>12}{'带日志(ms)':>12}{'撤销(ms)':>12}"
+          f"{'规划 us/文件':>14}{'错误':>6}")
+    for size in args.sizes:
+        folder = tempfile.mkdtemp(prefix='rename_bench_')
+        journal_folder = tempfile.mkdtemp(prefix='rename_bench_')
+        journal_dir = tempfile.mkdtemp(prefix='rename_journal_')
+        try:
+            src_list, new_names, cycles, expected = build_case(folder, size, random.Random(args.seed))
+            journal_src_list, _, _, _ = build_case(journal_folder, size, random.Random(args.seed))
+            journal = RenameJournal(journal_dir, fsync_every=args.fsync_every)
+            # 规划过程会打印每个冲突，基准中不输出
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                start = time.perf_counter()
+                plan = plan_renames(src_list, new_names)
+                plan_time = time.perf_counter() - start
+                start = time.perf_counter()
+                result = batch_rename(src_list, new_names)
+                total_time = time.perf_counter() - start
+                start = time.perf_counter()
+                journal_result = batch_rename(journal_src_list, new_names, journal)
+                journal_time = time.perf_counter() - start
+                start = time.perf_counter()
+                undo_result = journal.undo_last()
+                undo_time = time.perf_counter() - start
+            errors = verify(folder, expected, result) + len(journal_result.failed_files)
+            errors += verify_undo(journal_folder, journal_src_list, undo_result)
+            errors += verify_index_after_undo(os.path.join(journal_dir, 'invoice_index.sqlite3'), journal_src_list,
+                                              journal_result, undo_result)
+            print(f"{size:>8}{cycles:>8}{len(plan['steps']):>8}{plan_time * 1000:>12.1f}{total_time * 1000:>12.1f}"
+                  f"{journal_time * 1000:>12.1f}{undo_time * 1000:>12.1f}{plan_time / size * 1e6:>14.2f}{errors:>6}")
+        finally:
+            for path in (folder, journal_folder, journal_dir):
+                shutil.rmtree(path, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
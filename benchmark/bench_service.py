@@ -0,0 +1,138 @@
+"""
+提取服务 (cli.py serve) 基准测试
+
+在本机启动提取服务，与每次新建进程池的本机提取 (iter_extract) 对比：
+1. 小批量延迟：每批 --batch 个文件，本机提取每批都要启动进程并导入PDF库，服务的进程池常驻
+2. 单文件延迟 p50/p95：逐个文件请求
+3. 吞吐量：一次提交全部文件，以及 --clients 个客户端同时提交，报告 文件/秒 和首个结果的延迟
+默认不启用提取结果缓存，测量的是解析本身；--cache 时使用临时缓存，第二轮起全部命中。
+
+用法: python benchmark/bench_service.py [--corpus 发票文件夹] [--files 100] [--workers 0] [--batch 10]
+                                       [--clients 4] [--backend pdfplumber] [--cache] [--json result.json]
+未指定 --corpus 时在临时文件夹中生成合成发票
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+# 引入文件夹路径
+relative_path = '..'
+current_file_path = os.path.dirname(__file__)
+utils_folder_path = os.path.abspath(os.path.join(current_file_path, relative_path))
+sys.path.append(utils_folder_path)
+
+from utils.pdf import iter_extract, EXTRACTOR_FINGERPRINT
+from utils.pdf_backend import BACKENDS
+from utils.extract_cache import ExtractCache
+from utils.extract_service import ExtractService, ExtractServer
+from utils.extract_client import RemoteExtractor
+from benchmark.gen_invoices import generate_corpus
+from benchmark.bench_extract import percentile
+
+def timed(results):
+    """消费 (序号, 结果) 迭代器，返回 (总耗时秒, 首个结果耗时秒, 失败数)"""
+    start = time.perf_counter()
+    first = None
+    errors = 0
+    for _, result in results:
+        if first is None:
+            first = time.perf_counter() - start
+        if result['error']:
+            errors += 1
+    return time.perf_counter() - start, first or 0.0, errors
+
+def main():
+    parser = argparse.ArgumentParser(description='提取服务基准测试')
+    parser.add_argument('--corpus', help='发票文件夹，默认生成到临时文件夹')
+    parser.add_argument('--files', type=int, default=100, help='吞吐量测试的文件数')
+    parser.add_argument('--workers', type=int, default=0, help='进程数，0 表示使用全部CPU核心')
+    parser.add_argument('--batch', type=int, default=10, help='小批量延迟测试每批的文件数')
+    parser.add_argument('--repeat', type=int, default=5, help='小批量延迟测试的批数')
+    parser.add_argument('--clients', type=int, default=4, help='并发测试的客户端数')
+    parser.add_argument('--backend', default='pdfplumber', choices=list(BACKENDS))
+    parser.add_argument('--cache', action='store_true', help='服务使用提取结果缓存（临时文件）')
+    parser.add_argument('--json', help='把结果另存为 JSON 文件')
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    corpus = args.corpus or tempfile.mkdtemp(prefix='invoice_bench_')
+    all_paths = sorted(os.path.join(corpus, name) for name in os.listdir(corpus) if name.lower().endswith('.pdf'))
+    if not all_paths:
+        print(f'生成 {args.files} 张合成发票: {corpus}')
+        generate_corpus(corpus, args.files)
+        all_paths = sorted(os.path.join(corpus, name) for name in os.listdir(corpus) if name.lower().endswith('.pdf'))
+    # 文件不够时循环使用
+    pdf_paths = [all_paths[i % len(all_paths)] for i in range(args.files)]
+    options = dict(backend=args.backend, fields='rename', layout=True, max_pages=10)
+
+    cache = ExtractCache(EXTRACTOR_FINGERPRINT, db_path=os.path.join(tempfile.mkdtemp(prefix='invoice_cache_'), 'cache.sqlite3')) if args.cache else None
+    start = time.perf_counter()
+    service = ExtractService(workers=workers, cache=cache, **options)
+    startup = time.perf_counter() - start
+    server = ExtractServer(('127.0.0.1', 0), service, log_requests=False)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    upload_client = RemoteExtractor(url, batch_size=args.files)
+    path_client = RemoteExtractor(url, batch_size=args.files, upload=False)
+    print(f'后端: {args.backend}, 进程数: {workers}, 服务 {url} 启动耗时 {startup * 1000:.0f}ms, 缓存: {"开" if cache else "关"}')
+
+    report = {'backend': args.backend, 'workers': workers, 'service_startup_ms': startup * 1000, 'results': []}
+
+    def add(name, files, elapsed, first, errors):
+        row = {'name': name, 'files': files, 'elapsed_ms': elapsed * 1000, 'files_per_sec': files / elapsed,
+               'first_result_ms': first * 1000, 'errors': errors}
+        report['results'].append(row)
+        print(f"{name:<24}{files:>6}{row['elapsed_ms']:>12.0f}{row['files_per_sec']:>10.1f}{row['first_result_ms']:>14.0f}{errors:>6}")
+
+    print(f"\n{'场景':<22}{'文件数':>6}{'耗时(ms)':>10}{'文件/秒':>8}{'首个结果(ms)':>10}{'失败':>4}")
+    # 1. 小批量：本机每批新建进程池，服务的进程池常驻
+    batches = [pdf_paths[(i * args.batch) % len(pdf_paths):][:args.batch] for i in range(args.repeat)]
+    for name, run in (
+            ('本机 每批新建进程池', lambda batch: iter_extract(batch, workers, **options)),
+            ('服务 上传文件', lambda batch: upload_client.iter_extract(batch)),
+            ('服务 发送路径', lambda batch: path_client.iter_extract(batch))):
+        runs = [timed(run(batch)) for batch in batches]
+        elapsed = sorted(runs)[len(runs) // 2]
+        add(f'{name} (中位数)', len(batches[0]), *elapsed)
+
+    # 2. 单文件延迟
+    latencies = []
+    for pdf_path in pdf_paths[:min(len(pdf_paths), 50)]:
+        start = time.perf_counter()
+        list(upload_client.iter_extract([pdf_path]))
+        latencies.append((time.perf_counter() - start) * 1000)
+    report['single_file_ms'] = {'p50': percentile(latencies, 50), 'p95': percentile(latencies, 95)}
+    print(f"\n单文件请求 {len(latencies)} 次: p50 {percentile(latencies, 50):.1f}ms, p95 {percentile(latencies, 95):.1f}ms\n")
+
+    # 3. 吞吐量
+    add('本机 全部文件', len(pdf_paths), *timed(iter_extract(pdf_paths, workers, **options)))
+    add('服务 全部文件 上传', len(pdf_paths), *timed(upload_client.iter_extract(pdf_paths)))
+    add('服务 全部文件 路径', len(pdf_paths), *timed(path_client.iter_extract(pdf_paths)))
+
+    # 多个客户端同时提交，各自提交全部文件
+    outcomes = [None] * args.clients
+    def client_run(slot):
+        outcomes[slot] = timed(RemoteExtractor(url, batch_size=args.batch).iter_extract(pdf_paths))
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client_run, args=(slot,)) for slot in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    add(f'服务 {args.clients} 个客户端并发', len(pdf_paths) * args.clients, elapsed,
+        max(first for _, first, _ in outcomes), sum(errors for _, _, errors in outcomes))
+
+    server.shutdown()
+    server.server_close()
+    service.close()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+启动耗时基准与预算检查
+
+1. 用 python -X importtime 分别导入图形界面 (interface.main_interface) 和命令行 (cli) 的入口模块，
+   报告导入总耗时和耗时最多的模块，并检查启动时不应导入的模块（PDF库在第一次使用时才导入，命令行不导入 Qt）
+2. 在子进程中创建主窗口并显示，测量从启动解释器到窗口显示的耗时
+
+任一项超出预算或导入了不应导入的模块时退出码为 1，可以放到持续集成中检查。
+用法: python benchmark/bench_startup.py [--repeat 3] [--scale 1.0] [--top 10]
+较慢的机器上用 --scale 按比例放宽全部预算
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 入口模块 -> (导入耗时预算 ms, 启动时不应导入的模块)
+# 预算在测得的耗时上留出约三成余量，优化后应随之收紧；图形界面的大部分耗时是 PySide6 和 qfluentwidgets
+ENTRY_MODULES = {
+    'interface.main_interface': (800, ('pdfplumber', 'pdfminer', 'pymupdf', 'fitz')),
+    'cli': (200, ('PySide6', 'qfluentwidgets', 'pdfplumber', 'pdfminer', 'pymupdf', 'fitz')),
+}
+
+# 从启动解释器到主窗口显示的耗时预算 (ms)
+WINDOW_BUDGET_MS = 1000
+
+WINDOW_SCRIPT = """
+import sys
+from PySide6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+from interface.main_interface import MainInterface
+window = MainInterface()
+window.show()
+app.processEvents()
+print('shown', flush=True)
+"""
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+def import_times(module):
+    """
+    用 -X importtime 导入模块
+
+    :return: [(模块名, 自身耗时ms, 累计耗时ms, 嵌套层级)]
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True, encoding='utf-8', errors='replace',
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f'导入 {module} 失败:\n{process.stderr[-2000:]}')
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return rows
+
+def window_time():
+    """从启动解释器到主窗口显示的耗时 (ms)"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', WINDOW_SCRIPT], cwd=ROOT, env=child_env(),
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in process.stdout:
+        if line.strip() == 'shown':
+            elapsed = (time.perf_counter() - start) * 1000
+            break
+    else:
+        raise RuntimeError('主窗口没有显示')
+    process.wait()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时基准与预算检查')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取中位数')
+    parser.add_argument('--scale', type=float, default=1.0, help='全部预算乘以该系数')
+    parser.add_argument('--top', type=int, default=10, help='列出耗时最多的模块数')
+    args = parser.parse_args()
+
+    failures = []
+    for module, (budget_ms, forbidden) in ENTRY_MODULES.items():
+        budget_ms *= args.scale
+        runs = [import_times(module) for _ in range(args.repeat)]
+        totals = [next(cumulative for name, _, cumulative, _ in rows if name == module) for rows in runs]
+        total = statistics.median(totals)
+        rows = runs[-1]
+
+        print(f'\n[{module}] 导入耗时 {total:.0f}ms (预算 {budget_ms:.0f}ms, 共导入 {len(rows)} 个模块)')
+        print(f"{'累计(ms)':>10}{'自身(ms)':>10}  模块")
+        # 只列出入口模块直接导入的模块，避免同一段耗时在父子模块中重复出现
+        entry_depth = next(depth for name, _, _, depth in rows if name == module)
+        direct = [row for row in rows if row[3] == entry_depth + 1]
+        for name, self_ms, cumulative_ms, _ in sorted(direct, key=lambda row: row[2], reverse=True)[:args.top]:
+            print(f'{cumulative_ms:>10.1f}{self_ms:>10.1f}  {name}')
+
+        imported = {name for name, _, _, _ in rows}
+        eager = sorted(name for name in imported if name.split('.')[0] in forbidden)
+        if eager:
+            failures.append(f'{module} 启动时导入了 {", ".join(eager[:5])}')
+        if total > budget_ms:
+            failures.append(f'{module} 导入耗时 {total:.0f}ms 超出预算 {budget_ms:.0f}ms')
+
+    window_budget_ms = WINDOW_BUDGET_MS * args.scale
+    shown = statistics.median(window_time() for _ in range(args.repeat))
+    print(f'\n主窗口显示耗时 {shown:.0f}ms (预算 {window_budget_ms:.0f}ms)')
+    if shown > window_budget_ms:
+        failures.append(f'主窗口显示耗时 {shown:.0f}ms 超出预算 {window_budget_ms:.0f}ms')
+
+    if failures:
+        print('\n未通过:')
+        for failure in failures:
+            print(f'- {failure}')
+        sys.exit(1)
+    print('\n全部在预算内')
+
+if __name__ == '__main__':
+    main()
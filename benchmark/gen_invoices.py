@@ -0,0 +1,279 @@
+"""
+合成电子发票PDF生成器
+
+离线生成版式接近真实全电发票的PDF，用于基准测试，不依赖真实发票文件。
+覆盖三种版式：电子发票（普通发票）、增值税专用发票、旅客运输服务（网约车，含出行信息和行程单附页）。
+同时写出 manifest.json，记录每个文件的真实字段值和报销类别，供基准测试核对准确率。
+
+用法: python benchmark/gen_invoices.py <输出文件夹> [--count 100] [--seed 0]
+"""
+import os
+import json
+import random
+import argparse
+
+import pymupdf
+
+# 全电发票版面尺寸 210mm x 140mm
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 397
+FONT = 'china-s'  # PyMuPDF 内置的简体中文字体
+
+LAYOUTS = ('vat_ordinary', 'vat_special', 'passenger_transport')
+
+TITLES = {
+    'vat_ordinary': '电子发票（普通发票）',
+    'vat_special': '电子发票（增值税专用发票）',
+    'passenger_transport': '电子发票（普通发票）',
+}
+
+BUYERS = ['上海某某科技有限公司', '北京某某信息技术有限公司', '深圳某某电子有限公司', '杭州某某网络科技有限公司']
+SELLERS = {
+    'vat_ordinary': ['上海某某餐饮管理有限公司', '北京某某快递服务有限公司', '广州某某酒店管理有限公司'],
+    'vat_special': ['深圳某某文具贸易有限公司', '苏州某某电子材料有限公司', '上海某某实验器材有限公司'],
+    'passenger_transport': ['北京小桔科技有限公司', '某某出租汽车有限公司', '上海某某出行科技有限公司'],
+}
+# 版式 -> 报销类别（cfg.CLASS_LIST）-> 项目，同一张发票的项目属于同一类别，作为分类的真值
+ITEMS = {
+    'vat_ordinary': {
+        '餐票': [('*餐饮服务*餐饮费', '', '次', 6)],
+        '快递费用': [('*物流辅助服务*收派服务费', '', '次', 6)],
+        '住宿': [('*住宿服务*住宿费', '', '天', 6)],
+    },
+    'vat_special': {
+        '办公用品': [('*纸制品*A4打印纸', '70g', '箱', 13), ('*文具*中性笔', '0.5mm', '盒', 13)],
+        '研发耗材': [('*电子元件*电阻', '0603', '个', 13)],
+    },
+    'passenger_transport': {
+        '市内交通': [('*运输服务*客运服务费', '', '次', 3), ('*运输服务*旅客运输服务', '', '次', 9)],
+    },
+}
+PASSENGERS = ['张三', '李四', '王五', '赵六']
+CITIES = ['上海', '北京', '深圳', '杭州', '南京', '成都']
+DRAWERS = ['王某', '李某', '赵某某']
+
+UPPER_DIGITS = '零壹贰叁肆伍陆柒捌玖'
+
+def to_chinese_amount(amount: float) -> str:
+    """金额转中文大写（整数部分不超过万亿，简化处理连续零）"""
+    fen = int(round(amount * 100))
+    yuan, jiao, fen = fen // 100, fen // 10 % 10, fen % 10
+    units = ['', '拾', '佰', '仟']
+    sections = ['', '万', '亿']
+    result = ''
+    section_index = 0
+    while yuan > 0:
+        section = yuan % 10000
+        yuan //= 10000
+        text = ''
+        zero = False
+        for i in range(4):
+            digit = section % 10
+            section //= 10
+            if digit == 0:
+                zero = bool(text)
+            else:
+                text = UPPER_DIGITS[digit] + units[i] + ('零' if zero else '') + text
+                zero = False
+        if text:
+            result = text + sections[section_index] + result
+        section_index += 1
+    result = (result or '零') + '圆'
+    if jiao == 0 and fen == 0:
+        return result + '整'
+    if jiao:
+        result += UPPER_DIGITS[jiao] + '角'
+    if fen:
+        result += UPPER_DIGITS[fen] + '分'
+    return result
+
+def random_tax_id(rng: random.Random) -> str:
+    chars = '0123456789ABCDEFGHJKLMNPQRTUWXY'
+    return '91' + ''.join(rng.choice(chars) for _ in range(16))
+
+def make_invoice(rng: random.Random, layout: str) -> dict:
+    """随机生成一张发票的字段值"""
+    category = rng.choice(sorted(ITEMS[layout]))
+    items = []
+    for _ in range(rng.randint(1, 3) if layout != 'passenger_transport' else 1):
+        name, spec, unit, rate = rng.choice(ITEMS[layout][category])
+        quantity = rng.randint(1, 20) if layout == 'vat_special' else 1
+        price = round(rng.uniform(5, 800), 2)
+        amount = round(price * quantity, 2)
+        tax = round(amount * rate / 100, 2)
+        items.append({'name': name, 'spec': spec, 'unit': unit, 'quantity': quantity,
+                      'price': price, 'amount': amount, 'rate': f'{rate}%', 'tax': tax})
+    total_amount = round(sum(item['amount'] for item in items), 2)
+    total_tax = round(sum(item['tax'] for item in items), 2)
+    total = round(total_amount + total_tax, 2)
+    month, day = rng.randint(1, 12), rng.randint(1, 28)
+
+    invoice = {
+        'layout': layout,
+        'category': category,
+        'title': TITLES[layout],
+        'number': '24' + ''.join(str(rng.randint(0, 9)) for _ in range(18)),
+        'date': f'2024年{month:02d}月{day:02d}日',
+        'buyer': rng.choice(BUYERS),
+        'buyer_tax_id': random_tax_id(rng),
+        'seller': rng.choice(SELLERS[layout]),
+        'seller_tax_id': random_tax_id(rng),
+        'items': items,
+        'total_amount': f'{total_amount:.2f}',
+        'total_tax': f'{total_tax:.2f}',
+        'total': f'{total:.2f}',
+        'total_chinese': to_chinese_amount(total),
+        'drawer': rng.choice(DRAWERS),
+        'remark': '',
+        'travel': None,
+        'itinerary_pages': 0,
+    }
+    if layout == 'passenger_transport':
+        start, end = rng.sample(CITIES, 2)
+        invoice['travel'] = {
+            'passenger': rng.choice(PASSENGERS),
+            'id_number': f'3101{rng.randint(10, 99)}********{rng.randint(1000, 9999)}',
+            'date': f'2024-{month:02d}-{day:02d}',
+            'from': start,
+            'to': end,
+            'class': '无',
+            'vehicle': rng.choice(['出租车', '网约车']),
+        }
+        invoice['remark'] = 'didi' if '小桔' in invoice['seller'] else ''
+        # 网约车发票常带行程单附页
+        invoice['itinerary_pages'] = rng.choice([0, 0, 1, 2])
+    return invoice
+
+def _text(page, x, y, text, size=9):
+    page.insert_text((x, y), text, fontname=FONT, fontsize=size)
+
+def _vertical_text(page, x, y, text, size=9, step=12):
+    for i, char in enumerate(text):
+        _text(page, x, y + i * step, char, size)
+
+def draw_invoice(doc, invoice: dict):
+    """按全电发票版式绘制发票页"""
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+
+    # 标题、发票号码、开票日期
+    _text(page, 200, 36, invoice['title'], 14)
+    _text(page, 400, 40, f"发票号码：{invoice['number']}", 7)
+    _text(page, 400, 56, f"开票日期：{invoice['date']}", 7)
+
+    # 购买方、销售方
+    page.draw_rect(pymupdf.Rect(15, 68, 580, 136), width=0.5)
+    page.draw_line((297, 68), (297, 136), width=0.5)
+    _vertical_text(page, 22, 82, '购买方信息')
+    _vertical_text(page, 304, 82, '销售方信息')
+    _text(page, 40, 92, f"名称：{invoice['buyer']}")
+    _text(page, 40, 116, f"统一社会信用代码/纳税人识别号：{invoice['buyer_tax_id']}", 7)
+    _text(page, 322, 92, f"名称：{invoice['seller']}")
+    _text(page, 322, 116, f"统一社会信用代码/纳税人识别号：{invoice['seller_tax_id']}", 7)
+
+    # 项目明细
+    # 内置中文字体每个字符宽 9pt（字号 9），列间距按最长的值留出空隙，避免相邻两列提取时粘连
+    columns = (20, 150, 205, 240, 270, 330, 410, 475)
+    for x, header in zip(columns, ('项目名称', '规格型号', '单位', '数量', '单价', '金额', '税率/征收率', '税额')):
+        _text(page, x, 152, header)
+    y = 168
+    for item in invoice['items']:
+        values = (item['name'], item['spec'], item['unit'], str(item['quantity']),
+                  f"{item['price']:.2f}", f"{item['amount']:.2f}", item['rate'], f"{item['tax']:.2f}")
+        for x, value in zip(columns, values):
+            if value:
+                _text(page, x, y, value)
+        y += 14
+
+    # 出行信息
+    if invoice['travel']:
+        travel = invoice['travel']
+        travel_columns = (20, 70, 200, 280, 330, 380, 430)
+        for x, header in zip(travel_columns, ('出行人', '有效身份证件号', '出行日期', '出发地', '到达地', '等级', '交通工具类型')):
+            _text(page, x, 214, header, 7)
+        values = (travel['passenger'], travel['id_number'], travel['date'], travel['from'], travel['to'], travel['class'], travel['vehicle'])
+        for x, value in zip(travel_columns, values):
+            _text(page, x, 228, value, 7)
+
+    # 合计：“合”“计”分开绘制，文本提取结果为“合 计”
+    _text(page, 50, 252, '合')
+    _text(page, 90, 252, '计')
+    _text(page, 330, 252, f"¥{invoice['total_amount']}", 8)
+    _text(page, 475, 252, f"¥{invoice['total_tax']}", 8)
+    page.draw_line((15, 260), (580, 260), width=0.5)
+    _text(page, 20, 276, '价税合计（大写）')
+    _text(page, 120, 276, invoice['total_chinese'])
+    _text(page, 400, 276, f"（小写）¥{invoice['total']}")
+
+    # 备注
+    page.draw_line((15, 286), (580, 286), width=0.5)
+    _vertical_text(page, 22, 300, '备注')
+    if invoice['remark']:
+        _text(page, 40, 312, invoice['remark'])
+
+    _text(page, 40, 360, f"开票人：{invoice['drawer']}")
+
+def draw_itinerary(doc, invoice: dict, rng: random.Random):
+    """网约车行程单附页"""
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    _text(page, 240, 30, '行程单 TRIP TABLE', 12)
+    _text(page, 20, 56, '序号 车型 上车时间 城市 起点 终点 里程[公里] 金额[元]')
+    for i in range(20):
+        start, end = rng.sample(CITIES, 2)
+        _text(page, 20, 72 + i * 15,
+              f"{i + 1} 快车 2024-09-{i % 28 + 1:02d} 08:{i % 60:02d} {start} {start}某某路 {end}某某大厦 {rng.uniform(1, 50):.1f} {rng.uniform(10, 120):.2f}")
+
+def write_invoice_pdf(pdf_path: str, invoice: dict, rng: random.Random):
+    doc = pymupdf.open()
+    draw_invoice(doc, invoice)
+    for _ in range(invoice['itinerary_pages']):
+        draw_itinerary(doc, invoice, rng)
+    doc.save(pdf_path)
+    doc.close()
+
+def expected_fields(invoice: dict) -> dict:
+    """与 extract_invoice_info 输出对应的关键字段真值"""
+    return {
+        '发票号码': invoice['number'],
+        '开票日期': invoice['date'].replace('年', '-').replace('月', '-').replace('日', ''),
+        '价税合计': {'小写': invoice['total'], '大写': invoice['total_chinese']},
+        '金额信息': {'合计金额': invoice['total_amount']},
+        '税率和税额': {'合计税额': invoice['total_tax']},
+        '项目明细': [{'项目名称': item['name'], '数量': str(item['quantity']), '单价': f"{item['price']:.2f}",
+                  '金额': f"{item['amount']:.2f}", '税率': item['rate'], '税额': f"{item['tax']:.2f}"}
+                 for item in invoice['items']],
+    }
+
+def generate_corpus(output_folder: str, count: int, seed: int = 0) -> list:
+    """
+    生成 count 张发票到 output_folder，三种版式轮流出现
+
+    :return: 生成的PDF路径列表
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    rng = random.Random(seed)
+    manifest = {}
+    pdf_paths = []
+    for i in range(count):
+        invoice = make_invoice(rng, LAYOUTS[i % len(LAYOUTS)])
+        file_name = f"{i:05d}_{invoice['layout']}.pdf"
+        pdf_path = os.path.join(output_folder, file_name)
+        write_invoice_pdf(pdf_path, invoice, rng)
+        manifest[file_name] = {'layout': invoice['layout'], 'category': invoice['category'], 'expected': expected_fields(invoice)}
+        pdf_paths.append(pdf_path)
+
+    with open(os.path.join(output_folder, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return pdf_paths
+
+def main():
+    parser = argparse.ArgumentParser(description='合成电子发票PDF生成器')
+    parser.add_argument('output', help='输出文件夹')
+    parser.add_argument('--count', type=int, default=100, help='生成的发票数量')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子，相同种子生成相同的发票')
+    args = parser.parse_args()
+
+    pdf_paths = generate_corpus(args.output, args.count, args.seed)
+    print(f'已生成 {len(pdf_paths)} 张发票: {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+基准测试用的发票样例文本
+
+文本格式模拟 pdfplumber 从常见电子发票中提取出的结果
+"""
+
+# 电子发票（普通发票），网约车客运服务
+VAT_ORDINARY_TEXT = """电子发票（普通发票） 发票号码：24312000000123456789
+开票日期：2024年09月07日
+购 名称：上海某某科技有限公司 销 名称：北京小桔科技有限公司
+买 售
+方 方
+信 统一社会信用代码/纳税人识别号：91310000MA1FL0XX3K 信 统一社会信用代码/纳税人识别号：911101085657XXXX2B
+息 息
+项目名称 规格型号 单位 数量 单价 金额 税率/征收率 税额
+运输服务 客运服务费 94.34 1.00 94.34 6% 5.66
+合 计 ¥94.34 ¥5.66
+价税合计（大写） 壹佰圆整 （小写）¥100.00
+备
+didi
+开票人：王某某
+"""
+
+# 增值税专用发票，办公用品
+VAT_SPECIAL_TEXT = """电子发票（增值税专用发票） 发票号码：24442000000987654321
+开票日期：2024年08月30日
+购 名称：上海某某科技有限公司 销 名称：深圳某某文具贸易有限公司
+买 售
+方 方
+信 统一社会信用代码/纳税人识别号：91310000MA1FL0XX3K 信 统一社会信用代码/纳税人识别号：91440300MA5FXXXX7C
+息 息
+项目名称 规格型号 单位 数量 单价 金额 税率/征收率 税额
+办公用品 A4打印纸 230.09 2.00 460.18 13% 59.82
+办公用品 中性笔 2.65 20.00 53.10 13% 6.90
+合 计 ¥513.28 ¥66.72
+价税合计（大写） 伍佰捌拾圆整 （小写）¥580.00
+备
+注
+开票人：李某
+"""
+
+# 电子发票（普通发票），旅客运输服务（机票行程）
+PASSENGER_TRANSPORT_TEXT = """电子发票（普通发票） 发票号码：24112000000555500001
+开票日期：2024年09月01日
+购 名称：上海某某科技有限公司 销 名称：某某航空服务有限公司
+买 售
+方 方
+信 统一社会信用代码/纳税人识别号：91310000MA1FL0XX3K 信 统一社会信用代码/纳税人识别号：91110105MA01XXXX5D
+息 息
+项目名称 规格型号 单位 数量 单价 金额 税率/征收率 税额
+旅客运输服务 代订机票 1147.71 1.00 1147.71 9% 103.29
+合 计 ¥1147.71 ¥103.29
+价税合计（大写） 壹仟贰佰伍拾壹圆整 （小写）¥1251.00
+出行人 有效身份证件号 出行日期 出发地 到达地 等级 交通工具类型
+张三 310101********1234 2024-09-01 上海 北京 经济舱 飞机
+备
+注
+开票人：赵某
+"""
+
+# 电子发票（铁路电子客票）
+RAILWAY_TICKET_TEXT = """电子发票（铁路电子客票） 发票号码:24319110000012345678
+开票日期:2024年03月05日
+上海虹桥 G1234 北京南
+站 站
+2024年03月10日 08:00开 05车12A号 二等座
+票价:￥553.00
+张三 3101011990****1234
+电子客票号:1234567890123456789012
+购买方名称:上海某某科技有限公司 统一社会信用代码:91310000MA1FL0XX3K
+"""
+
+SAMPLE_TEXTS = {
+    'vat_ordinary': VAT_ORDINARY_TEXT,
+    'vat_special': VAT_SPECIAL_TEXT,
+    'passenger_transport': PASSENGER_TRANSPORT_TEXT,
+    'railway_ticket': RAILWAY_TICKET_TEXT,
+}
+
+# 网约车行程单附页中的一行，用于模拟带附页的长文档
+ITINERARY_LINE = "1 快车 2024-09-0{day} 08:3{minute} 周五 上海市 徐汇区某某路 浦东新区某某大厦 12.3 35.60\n"
+
+def with_itinerary(text: str, lines: int) -> str:
+    """在发票文本后追加若干行行程单附页"""
+    pages = [text, "行程单 TRIP TABLE\n序号 车型 上车时间 城市 起点 终点 里程[公里] 金额[元]\n"]
+    for i in range(lines):
+        pages.append(ITINERARY_LINE.format(day=i % 9 + 1, minute=i % 10))
+    return "".join(pages)
@@ -0,0 +1,393 @@
+"""
+报销助手命令行模式，不依赖 Qt，可用于计划任务或服务器
+
+用法:
+    python cli.py rename <文件夹> [--jobs 8] [--save-as] [--dry-run] [--class 办公用品] [--report report.json]
+    python cli.py watch <文件夹> [--jobs 8] [--queue pending.ndjson] [--new-only] [--polling]
+    python cli.py serve [--host 127.0.0.1] [--port 8765] [--jobs 8]
+    python cli.py undo
+
+rename 的处理结果以 JSON 报告输出到标准输出，watch 每处理一个文件输出一行 JSON，处理过程中的日志输出到标准错误。
+serve 启动 HTTP 提取服务，接口见 utils/extract_service.py。
+undo 把最近一次重命名的文件改回原名（图形界面和命令行的重命名都记录在同一份日志中）。
+rename 的退出码: 0 全部成功；1 有文件提取或重命名失败；2 有重复的发票，未重命名
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from contextlib import redirect_stdout
+
+# 引入文件夹路径
+relative_path = '.'
+current_file_path = os.path.dirname(__file__)
+utils_folder_path = os.path.abspath(os.path.join(current_file_path, relative_path))
+sys.path.append(utils_folder_path)
+
+from config.cfg import *
+from utils.pdf import iter_extract, resolve_fields, EXTRACTOR_FINGERPRINT
+from utils.extract_cache import ExtractCache, hash_file
+from utils.invoice_index import InvoiceIndex
+from utils.invoice_classifier import KeywordClassifier, CLASSIFY_FIELDS
+from utils.invoice_xml import STRUCTURED_EXTENSIONS, has_pdf_sibling
+from utils.folder_watcher import FolderWatcher
+from utils.file_buffer import FILE_BUFFERS, read_file_buffer
+from utils.batch_rename import batch_rename, build_invoice_file_name, format_rename_message
+from utils.rename_journal import RenameJournal
+from utils.copy_file import copy_file
+
+INVOICE_EXTENSIONS = ('.pdf',) + STRUCTURED_EXTENSIONS
+
+def list_invoice_files(folder):
+    """
+    列出文件夹中的发票文件（不含子文件夹）
+
+    PDF 与同名的 XML/OFD 是同一张发票，只保留 PDF，提取时会读取同名的 XML/OFD
+    """
+    names = sorted(name for name in os.listdir(folder) if os.path.splitext(name)[1].lower() in INVOICE_EXTENSIONS)
+    pdf_stems = {os.path.splitext(name)[0] for name in names if name.lower().endswith('.pdf')}
+    return [
+        os.path.join(folder, name) for name in names
+        if name.lower().endswith('.pdf') or os.path.splitext(name)[0] not in pdf_stems
+    ]
+
+def extract_all(file_paths, jobs, classifier):
+    """按配置批量提取，返回与输入一一对应的 (发票信息或 None, 错误信息)"""
+    fields = resolve_fields(EXTRACT['FIELDS'])
+    if fields is not None and classifier is not None:
+        fields = resolve_fields(fields + tuple(CLASSIFY_FIELDS))
+    cache = ExtractCache(EXTRACTOR_FINGERPRINT, max_bytes=CACHE['MAX_MB'] * 1024 * 1024) if CACHE['ENABLED'] else None
+    results = [(None, None)] * len(file_paths)
+    for index, result in iter_extract(
+            file_paths,
+            workers=jobs,
+            cache=cache,
+            required_fields=EXTRACT['REQUIRED_FIELDS'],
+            max_pages=EXTRACT['MAX_PAGES'],
+            backend=EXTRACT['BACKEND'],
+            fields=fields,
+            layout=EXTRACT['LAYOUT'],
+            structured=EXTRACT['STRUCTURED'],
+            worker_memory_mb=MEMORY['WORKER_MEMORY_MB'],
+            max_tasks_per_child=MEMORY['MAX_TASKS_PER_CHILD'],
+            max_text_chars=MEMORY['MAX_TEXT_CHARS']):
+        results[index] = (result['info'], result['error'])
+    return results
+
+def plan_files(file_paths, jobs, classifier, default_class):
+    """
+    提取并预测类别，生成新文件名
+
+    :return: 与输入一一对应的条目；成功时含发票号码、金额、开票日期、类别和新文件名，失败时只含 source 和 reason
+    """
+    results = extract_all(file_paths, jobs, classifier) if file_paths else []
+    predictions = classifier.classify_batch([info for info, _ in results]) if classifier else [(None, 0.0)] * len(results)
+    entries = []
+    for file_path, (info, error), (category, confidence) in zip(file_paths, results, predictions):
+        try:
+            if error:
+                raise ValueError(error)
+            if info is None:
+                raise ValueError("未能提取发票信息")
+            if category is None or confidence < CLASSIFY['MIN_CONFIDENCE']:
+                category = default_class
+            new_name = build_invoice_file_name(category, info, os.path.splitext(file_path)[1])
+        except Exception as e:
+            entries.append({"source": file_path, "reason": str(e) if not isinstance(e, KeyError) else f"缺少字段 {e}"})
+            continue
+        entries.append({
+            "source": file_path,
+            "invoice_number": info.get('发票号码'),
+            "amount": info['价税合计']['小写'],
+            "invoice_date": info['开票日期'],
+            "category": category,
+            "confidence": round(confidence, 3),
+            "new_name": new_name,
+        })
+    return entries
+
+def open_rename_journal():
+    """重命名日志，先把上次中断的重命名改回原名；未启用时返回 None"""
+    if not JOURNAL['ENABLED']:
+        return None
+    journal = RenameJournal(fsync_every=JOURNAL['FSYNC_EVERY'], keep=JOURNAL['KEEP'])
+    for rename_report in journal.recover():
+        print('上次的重命名未完成，已恢复原文件名：')
+        print(format_rename_message(rename_report))
+    return journal
+
+def rename_folder(folder, jobs=0, save_as=False, dry_run=False, default_class=CLASS_LIST[0],
+                  allow_history=False, use_index=True):
+    """
+    提取文件夹中全部发票并按 “类别 价税合计 开票月日” 重命名，返回 (报告, 退出码)
+
+    :param jobs: 进程数，0 表示使用全部CPU核心
+    :param save_as: 先复制到文件夹下的 OUTPUT_FOLDER 再重命名副本，原文件不变
+    :param dry_run: 只提取并给出重命名计划（直接重命名时包括预计的冲突后缀和失败的文件），不修改任何文件
+    :param default_class: 自动分类置信度不足时使用的类别
+    :param allow_history: 有以前报销过的发票时仍然重命名
+    :param use_index: 查询并记录历史发票索引
+    """
+    start = time.perf_counter()
+    file_paths = list_invoice_files(folder)
+    classifier = KeywordClassifier(CLASS_KEYWORDS) if CLASSIFY['ENABLED'] else None
+    invoice_index = InvoiceIndex() if INVOICE_INDEX['ENABLED'] and use_index else None
+
+    report = {
+        "folder": os.path.abspath(folder),
+        "total_files": len(file_paths),
+        "dry_run": dry_run,
+        "save_as": save_as,
+        "files": [],
+        "failed_files": [],
+        "duplicates": {},
+        "history_duplicates": {},
+    }
+
+    # 提取并生成新文件名，提取失败的文件不重命名
+    planned = []
+    for entry in plan_files(file_paths, jobs, classifier, default_class):
+        if "reason" in entry:
+            report["failed_files"].append(entry)
+            continue
+        report["files"].append(entry)
+        planned.append(entry)
+
+    # 同一批中重复的发票号码
+    by_number = {}
+    for entry in planned:
+        if entry["invoice_number"] and entry["invoice_number"] != '#':
+            by_number.setdefault(entry["invoice_number"], []).append(entry["source"])
+    report["duplicates"] = {number: sources for number, sources in by_number.items() if len(sources) > 1}
+
+    # 以前报销过的发票
+    if invoice_index is not None and by_number:
+        history = invoice_index.lookup(by_number)
+        report["history_duplicates"] = {
+            number: {"sources": by_number[number], "export_path": record["export_path"],
+                     "recorded_at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record["recorded_at"]))}
+            for number, record in history.items()
+        }
+
+    blocked = bool(report["duplicates"]) or (bool(report["history_duplicates"]) and not allow_history)
+    if save_as:
+        output_folder = os.path.join(folder, OUTPUT_FOLDER)
+        for entry in planned:
+            entry["destination"] = os.path.join(output_folder, entry["new_name"])
+    elif dry_run and planned:
+        # 预览直接重命名：读取文件夹预测冲突后缀、交换和失败的文件，不修改任何文件
+        preview = batch_rename([entry["source"] for entry in planned], [entry["new_name"] for entry in planned], dry_run=True)
+        report["rename_result"] = preview.to_dict()
+        for entry in planned:
+            entry["destination"] = preview.destination(entry["source"])
+    else:
+        for entry in planned:
+            entry["destination"] = os.path.join(os.path.dirname(entry["source"]), entry["new_name"])
+
+    if not dry_run and not blocked and planned:
+        sources = [entry["source"] for entry in planned]
+        # 重命名前按原路径计算文件哈希，写入历史发票索引
+        file_hashes = [hash_file(source, read_file_buffer(source)) for source in sources] if invoice_index else []
+        if save_as:
+            copy_file(sources, output_folder)
+            targets = [os.path.join(output_folder, os.path.basename(source)) for source in sources]
+        else:
+            targets = sources
+        rename_report = batch_rename(targets, [entry["new_name"] for entry in planned], open_rename_journal())
+        report["rename_result"] = rename_report.to_dict()
+
+        # 冲突处理后的实际路径
+        for entry, target in zip(planned, targets):
+            entry["destination"] = rename_report.destination(target)
+        if invoice_index is not None:
+            invoice_index.record(
+                {"invoice_number": entry["invoice_number"], "file_hash": file_hash, "amount": entry["amount"],
+                 "invoice_date": entry["invoice_date"], "export_path": entry["destination"]}
+                for entry, file_hash in zip(planned, file_hashes) if entry["destination"]
+            )
+
+    report["renamed"] = not dry_run and not blocked and bool(planned)
+    report["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+
+    if blocked:
+        exit_code = 2
+    elif report["failed_files"] or not report.get("rename_result", {"success": True})["success"]:
+        exit_code = 1
+    else:
+        exit_code = 0
+    return report, exit_code
+
+def watch_folder(folder, jobs=0, default_class=CLASS_LIST[0], queue_path=None, include_existing=True,
+                 use_index=True, force_polling=False, stop_event=None, output=None):
+    """
+    监视文件夹，新放入或修改过的发票写完后提取，每个文件输出一行 JSON 到标准输出（NDJSON），直到 stop_event 被设置
+
+    每批只提取新写完的文件，未改动的文件不会再次解析；提取结果缓存使重新开始监视时已有的文件也能立即完成。
+    不重命名任何文件，条目追加到 queue_path 待处理队列（NDJSON），月末再用 rename 子命令统一重命名。
+
+    :param include_existing: 开始监视时文件夹中已有的发票也提取一遍
+    :param use_index: 查询历史发票索引，以前报销过的发票在条目中标记 history
+    :param output: 写入结果的文本流，默认为标准输出
+    """
+    output_stream = output or sys.stdout
+    classifier = KeywordClassifier(CLASS_KEYWORDS) if CLASSIFY['ENABLED'] else None
+    invoice_index = InvoiceIndex() if INVOICE_INDEX['ENABLED'] and use_index else None
+    with FolderWatcher(folder, INVOICE_EXTENSIONS, debounce_seconds=WATCH['DEBOUNCE_SECONDS'],
+                       poll_interval=WATCH['POLL_INTERVAL'], include_existing=include_existing,
+                       force_polling=force_polling or WATCH['FORCE_POLLING']) as watcher:
+        print(f'监视 {watcher.folder} ({watcher.mode})，按 Ctrl+C 结束')
+        for ready in watcher.watch(stop_event, timeout=0.5):
+            # PDF 与同名的 XML/OFD 是同一张发票，只提取 PDF
+            file_paths = [path for path in ready if not has_pdf_sibling(path)]
+            if not file_paths:
+                continue
+            entries = plan_files(file_paths, jobs, classifier, default_class)
+            numbers = [entry["invoice_number"] for entry in entries if entry.get("invoice_number")]
+            history = invoice_index.lookup(numbers) if invoice_index is not None and numbers else {}
+            lines = []
+            for entry in entries:
+                entry["detected_at"] = time.strftime('%Y-%m-%d %H:%M:%S')
+                if "reason" not in entry:
+                    entry["history"] = entry["invoice_number"] in history
+                lines.append(json.dumps(entry, ensure_ascii=False))
+            text = '\n'.join(lines) + '\n'
+            output_stream.write(text)
+            output_stream.flush()
+            if queue_path:
+                with open(queue_path, 'a', encoding='utf-8') as f:
+                    f.write(text)
+            FILE_BUFFERS.clear()
+
+def serve(host, port, jobs=0):
+    """启动提取服务，直到 Ctrl+C"""
+    from utils.extract_service import ExtractService, ExtractServer
+
+    cache = ExtractCache(EXTRACTOR_FINGERPRINT, max_bytes=CACHE['MAX_MB'] * 1024 * 1024) if CACHE['ENABLED'] else None
+    service = ExtractService(
+        workers=jobs,
+        worker_memory_mb=MEMORY['WORKER_MEMORY_MB'],
+        max_tasks_per_child=MEMORY['MAX_TASKS_PER_CHILD'],
+        cache=cache,
+        required_fields=EXTRACT['REQUIRED_FIELDS'],
+        max_pages=EXTRACT['MAX_PAGES'],
+        backend=EXTRACT['BACKEND'],
+        fields=resolve_fields(EXTRACT['FIELDS']),
+        layout=EXTRACT['LAYOUT'],
+        structured=EXTRACT['STRUCTURED'],
+        max_text_chars=MEMORY['MAX_TEXT_CHARS'],
+    )
+    server = ExtractServer((host, port), service, token=SERVICE['TOKEN'],
+                           max_request_bytes=SERVICE['MAX_REQUEST_MB'] * 1024 * 1024,
+                           allow_paths=SERVICE['ALLOW_PATHS'])
+    print(f'提取服务已启动: http://{server.server_address[0]}:{server.server_address[1]} ({service.workers} 个工作进程)，按 Ctrl+C 结束')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('提取服务已停止')
+    finally:
+        server.server_close()
+        service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='cli.py', description='报销助手命令行模式')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rename_parser = subparsers.add_parser('rename', help='提取文件夹中的发票并重命名')
+    rename_parser.add_argument('folder', help='发票所在文件夹 (PDF/XML/OFD)')
+    rename_parser.add_argument('--jobs', '-j', type=int, default=EXTRACT['WORKERS'], help='进程数，0 表示使用全部CPU核心')
+    rename_parser.add_argument('--save-as', action='store_true', help=f'复制到 {OUTPUT_FOLDER} 文件夹后再重命名，原文件不变')
+    rename_parser.add_argument('--dry-run', action='store_true', help='只输出重命名计划，不修改文件')
+    rename_parser.add_argument('--class', dest='default_class', default=CLASS_LIST[0], choices=CLASS_LIST,
+                               help='自动分类置信度不足时使用的类别')
+    rename_parser.add_argument('--allow-history', action='store_true', help='有以前报销过的发票时仍然重命名')
+    rename_parser.add_argument('--no-index', action='store_true', help='不查询也不记录历史发票索引')
+    rename_parser.add_argument('--report', help='同时把 JSON 报告写入该文件')
+
+    watch_parser = subparsers.add_parser('watch', help='监视文件夹，新的发票写完后自动提取，每个文件输出一行 JSON')
+    watch_parser.add_argument('folder', help='监视的文件夹 (PDF/XML/OFD)，不含子文件夹')
+    watch_parser.add_argument('--jobs', '-j', type=int, default=EXTRACT['WORKERS'], help='进程数，0 表示使用全部CPU核心')
+    watch_parser.add_argument('--class', dest='default_class', default=CLASS_LIST[0], choices=CLASS_LIST,
+                              help='自动分类置信度不足时使用的类别')
+    watch_parser.add_argument('--queue', help='同时把每个文件的结果追加到该待处理队列文件 (NDJSON)')
+    watch_parser.add_argument('--new-only', action='store_true', help='不处理开始监视时文件夹中已有的发票')
+    watch_parser.add_argument('--no-index', action='store_true', help='不查询历史发票索引')
+    watch_parser.add_argument('--polling', action='store_true', help='定时扫描文件夹，不使用 inotify（网络共享文件夹）')
+
+    serve_parser = subparsers.add_parser('serve', help='启动 HTTP 提取服务，多台电脑共用常驻的进程池和提取结果缓存')
+    serve_parser.add_argument('--host', default=SERVICE['HOST'], help='监听地址')
+    serve_parser.add_argument('--port', type=int, default=SERVICE['PORT'], help='监听端口')
+    serve_parser.add_argument('--jobs', '-j', type=int, default=EXTRACT['WORKERS'], help='进程数，0 表示使用全部CPU核心')
+
+    subparsers.add_parser('undo', help='撤销最近一次重命名，把文件改回原名')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        with redirect_stdout(sys.stderr):
+            serve(args.host, args.port, args.jobs)
+        return 0
+
+    if args.command == 'undo':
+        with redirect_stdout(sys.stderr):
+            journal = open_rename_journal()
+            rename_report = journal.undo_last() if journal is not None else None
+            # 改回原名的发票不再算作已报销，从历史发票索引中删除
+            removed = []
+            if rename_report is not None and INVOICE_INDEX['ENABLED']:
+                removed = InvoiceIndex().remove_exported(source for source, _, final in rename_report.renamed_files if source != final)
+        if rename_report is None:
+            print(json.dumps({"success": False, "error": "没有可撤销的重命名"}, ensure_ascii=False, indent=2))
+            return 1
+        result = rename_report.to_dict()
+        result["index_removed"] = removed
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0 if rename_report.success else 1
+
+    if not os.path.isdir(args.folder):
+        parser.error(f'文件夹不存在: {args.folder}')
+
+    FILE_BUFFERS.set_limits(FILE_BUFFER['MAX_FILE_MB'] * 1024 * 1024, FILE_BUFFER['MAX_TOTAL_MB'] * 1024 * 1024)
+    if args.command == 'watch':
+        # 日志输出到标准错误，每个文件的结果写入标准输出
+        output = sys.stdout
+        with redirect_stdout(sys.stderr):
+            try:
+                watch_folder(
+                    args.folder,
+                    jobs=args.jobs,
+                    default_class=args.default_class,
+                    queue_path=args.queue,
+                    include_existing=not args.new_only,
+                    use_index=not args.no_index,
+                    force_polling=args.polling,
+                    output=output,
+                )
+            except KeyboardInterrupt:
+                print('已停止监视')
+        return 0
+
+    # 各模块的打印信息输出到标准错误，标准输出只有 JSON 报告
+    with redirect_stdout(sys.stderr):
+        report, exit_code = rename_folder(
+            args.folder,
+            jobs=args.jobs,
+            save_as=args.save_as,
+            dry_run=args.dry_run,
+            default_class=args.default_class,
+            allow_history=args.allow_history,
+            use_index=not args.no_index,
+        )
+    FILE_BUFFERS.clear()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(output)
+    return exit_code
+
+if __name__ == '__main__':
+    # 打包后的程序使用进程池时需要
+    multiprocessing.freeze_support()
+    sys.exit(main())
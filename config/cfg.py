@@ -6,4 +6,92 @@ UI = {
 
 CLASS_LIST = ['办公用品', '快递费用', '研发耗材', '餐票', '油票', '住宿', '市内交通', '市外交通', '体检', '其他抵用票']
 
+# 自动分类：提取完成后按关键字预测类别并预先选好，手动选择过的行不会被覆盖
+CLASSIFY = {
+    'ENABLED': True,  # 开启后提取时额外提取项目明细、服务类型和销售方名称，全电发票不再只读取版面区域
+    'MIN_CONFIDENCE': 0.6,  # 置信度低于该值时不预选类别
+}
+
+# 类别 -> 关键字，在项目名称、服务类型、销售方名称和发票类型中查找，同一关键字只能属于一个类别
+CLASS_KEYWORDS = {
+    '办公用品': ('办公用品', '文具', '纸制品', '打印纸', '复印纸', '签字笔', '中性笔', '墨盒', '硒鼓', '文件夹', '办公设备'),
+    '快递费用': ('快递', '收派服务', '物流辅助服务', '邮政', '顺丰', '速运'),
+    '研发耗材': ('电子元件', '元器件', '集成电路', '传感器', '试剂', '实验', '耗材', '计算机外部设备'),
+    '餐票': ('餐饮', '餐费', '食品', '饮料', '外卖'),
+    '油票': ('汽油', '柴油', '成品油', '加油', '石油', '石化'),
+    '住宿': ('住宿', '酒店', '宾馆', '旅馆'),
+    '市内交通': ('客运服务', '旅客运输', '出租车', '网约车', '小桔', '滴滴', '地铁', '公交', '停车'),
+    '市外交通': ('铁路电子客票', '铁路', '航空', '机票', '火车', '高铁', '长途'),
+    '体检': ('体检', '医疗服务', '健康检查'),
+    '其他抵用票': (),
+}
+
 OUTPUT_FOLDER = '导出的文件'
+
+# 发票信息提取
+EXTRACT = {
+    'BACKEND': 'pdfplumber',  # PDF文本提取后端: 'pdfplumber' 或 'pymupdf'（更快，需要安装 PyMuPDF）
+    'WORKERS': 0,  # 进程池大小，0 表示使用全部CPU核心，1 表示不使用进程池
+    'MAX_PAGES': 10,  # 每个PDF最多读取的页数，0 表示不限制
+    'REQUIRED_FIELDS': ('发票号码', '价税合计', '开票日期'),  # 逐页读取，这些字段全部找到后不再读取后续页面
+    'FIELDS': 'rename',  # 提取文件名时只提取需要的字段: 'rename' 或 'full'，见 utils.pdf.FIELD_PROFILES
+    'LAYOUT': True,  # 版面模板模式：全电发票只读取第一页中字段所在的区域，提取不到时回退到读取全文
+    'STRUCTURED': True,  # PDF 旁边有同名的 XML/OFD 文件（全电发票同时开具）时直接读取其中的字段，不再解析PDF
+}
+
+# 内存限制，避免多页扫描件等大文件在进程池中占满内存
+MEMORY = {
+    'WORKER_MEMORY_MB': 512,  # 每个工作进程预留的内存，进程数不超过 可用内存 / 该值，0 表示不限制
+    'MAX_TASKS_PER_CHILD': 50,  # 工作进程处理多少个文件后重启以归还内存，0 表示不重启（需要 Python 3.11+）
+    'MAX_TEXT_CHARS': 200000,  # 每个PDF读取的文本总长度上限，超出后不再读取后续页面，0 表示不限制
+    'TRACK_PEAK': True,  # 记录每个文件处理期间的峰值内存并打印
+}
+
+# 提取结果缓存，保存在用户数据目录
+CACHE = {
+    'ENABLED': True,
+    'MAX_MB': 64,  # 缓存大小上限，超出后淘汰最久未使用的结果
+}
+
+# 历史发票索引：重命名或导出过的发票按发票号码记录在用户数据目录，导入时提示以前报销过的发票
+INVOICE_INDEX = {
+    'ENABLED': True,
+}
+
+# 重命名日志：执行前记录每个文件的原名和目标，中途退出时下次启动自动改回原名，完成后可以撤销
+JOURNAL = {
+    'ENABLED': True,
+    'FSYNC_EVERY': 256,  # 每重命名多少个文件把日志写入磁盘一次，断电丢失的记录不影响恢复
+    'KEEP': 20,  # 保留最近多少批重命名的日志
+}
+
+# 监视文件夹：新放入或修改过的发票写完后自动提取，未改动的文件不会重复解析
+WATCH = {
+    'DEBOUNCE_SECONDS': 2.0,  # 文件大小和修改时间在这么长时间内不再变化才视为写完（同步盘、扫描仪会分多次写入）
+    'POLL_INTERVAL': 1.0,  # 不支持 inotify 时扫描文件夹的间隔
+    'FORCE_POLLING': False,  # 不使用 inotify，网络共享文件夹上 inotify 收不到其他机器写入的事件
+}
+
+# 提取服务：python cli.py serve 启动常驻的提取进程池，多台电脑共用同一个进程池和提取结果缓存
+SERVICE = {
+    'HOST': '127.0.0.1',  # 监听地址，供其他电脑使用时改为 '0.0.0.0' 并设置 TOKEN
+    'PORT': 8765,
+    'TOKEN': '',  # 非空时请求需要带上该令牌
+    'ALLOW_PATHS': True,  # 允许按服务端路径读取文件（共享文件夹），关闭后只能上传文件内容
+    'MAX_REQUEST_MB': 256,  # 每个请求的大小上限
+    'URL': '',  # 图形界面使用的提取服务地址，如 'http://127.0.0.1:8765'，留空时在本机提取；服务不可用时自动改为本机提取
+    'UPLOAD': True,  # 上传文件内容；服务与本机能访问同一个文件夹时可改为 False，只发送路径
+    'BATCH_SIZE': 64,  # 每个请求上传的文件数
+    'TIMEOUT': 60,  # 连接和等待每个结果的超时 (秒)
+}
+
+# 文件内容缓冲，每个文件在一次会话中只读取一次，供提取、预览和导出共用
+FILE_BUFFER = {
+    'MAX_FILE_MB': 32,  # 超过该大小的文件不缓冲，直接按路径读取
+    'MAX_TOTAL_MB': 512,  # 缓冲总大小上限，超出后释放最久未使用的文件
+}
+
+# 提取性能统计：记录各阶段耗时和各字段命中的匹配规则，每批提取完成后写入用户数据目录下的 extract_profile.json
+PROFILE = {
+    'ENABLED': True,
+}
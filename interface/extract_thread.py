@@ -0,0 +1,43 @@
+from PySide6.QtCore import QThread, Signal
+
+from utils.pdf import iter_extract
+
+class ExtractThread(QThread):
+    """后台批量提取发票信息，每完成一个文件发出一次 result_ready 信号"""
+
+    result_ready = Signal(int, object)  # (行号, {"file_path", "info", "error"})
+
+    def __init__(self, pdf_paths, workers=None, parent=None, remote=None, **options):
+        """
+        :param remote: 提取服务客户端 (utils.extract_client.RemoteExtractor)，服务不可用时改为在本机提取
+        """
+        super().__init__(parent)
+        self.pdf_paths = list(pdf_paths)
+        self.workers = workers
+        self.remote = remote
+        self.options = options
+
+    def run(self):
+        done = set()
+        if self.remote is not None:
+            from http.client import HTTPException
+            try:
+                for index, result in self.remote.iter_extract(self.pdf_paths, fields=self.options.get('fields')):
+                    if self.isInterruptionRequested():
+                        return
+                    done.add(index)
+                    self.result_ready.emit(index, result)
+                return
+            except (OSError, HTTPException, ValueError) as e:
+                print(f'[extract_thread] 提取服务不可用，改为在本机提取: {e}')
+
+        # 没有使用提取服务或服务中途出错时，在本机提取其余的文件
+        indices = [index for index in range(len(self.pdf_paths)) if index not in done]
+        results = iter_extract([self.pdf_paths[index] for index in indices], self.workers, **self.options)
+        try:
+            for index, result in results:
+                if self.isInterruptionRequested():
+                    break
+                self.result_ready.emit(indices[index], result)
+        finally:
+            results.close()
@@ -1,8 +1,10 @@
 import os
 import sys
+import time
+import threading
 
 from PySide6.QtGui import QIcon, QFont
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import QMainWindow, QHeaderView, QTableWidgetItem, QFileDialog, QComboBox, QDialog
 from qfluentwidgets import InfoBarPosition, InfoBarIcon, PushButton, SearchLineEdit, CardWidget, TableWidget, setCustomStyleSheet, InfoBar, LineEdit, StrongBodyLabel, ComboBox, Dialog
 
@@ -13,9 +15,20 @@ utils_folder_path = os.path.abspath(os.path.join(current_file_path, relative_pat
 sys.path.append(utils_folder_path)
 
 from layout.main_layout import MainLayout
+from interface.extract_thread import ExtractThread
+from interface.watch_thread import WatchThread
 from config.cfg import *
-from utils.pdf import extract_invoice_info
-from utils.batch_rename import batch_rename, format_rename_message
+from utils.pdf_backend import preload_backend
+from utils.pdf import describe_patterns, resolve_fields, EXTRACTOR_FINGERPRINT
+from utils.invoice_classifier import KeywordClassifier, CLASSIFY_FIELDS
+from utils.invoice_xml import STRUCTURED_EXTENSIONS, has_pdf_sibling
+from utils.extract_cache import ExtractCache, hash_file
+from utils.extract_client import RemoteExtractor
+from utils.invoice_index import InvoiceIndex, format_history_duplicates
+from utils.extract_profile import ExtractProfile
+from utils.file_buffer import FILE_BUFFERS, read_file_buffer
+from utils.batch_rename import batch_rename, format_rename_message, build_invoice_file_name
+from utils.rename_journal import RenameJournal
 from utils.copy_file import copy_file
 
 class MainInterface(QMainWindow):
@@ -29,25 +42,60 @@ class MainInterface(QMainWindow):
         self.import_file_path_list = [] # 导入的文件路径 list
         self.import_file_name_list = [] # 导入的文件名 list
         self.invoice_num_list = []
+        self.invoice_info_list = [] # 提取到的 发票号码/金额/开票日期，重命名后写入历史发票索引
+        self.class_prediction_list = [] # 自动分类的 (类别, 置信度)
         self.output_folder_path = '' # 输出文件夹路径
         self.output_file_path_list = [] # 输出文件路径 list
         self.output_file_name_list = [] # 输出文件名 list
+        self.extract_thread = None # 后台提取线程
+        self.extract_rows = [] # 正在提取的行，与提取线程中的序号一一对应
+        self.watch_thread = None # 后台监视文件夹线程
+        self.watch_pending_rows = [] # 提取期间监视到的新文件所在的行，本次提取结束后再提取
+        FILE_BUFFERS.set_limits(FILE_BUFFER['MAX_FILE_MB'] * 1024 * 1024, FILE_BUFFER['MAX_TOTAL_MB'] * 1024 * 1024)
+        self.extract_cache = ExtractCache(EXTRACTOR_FINGERPRINT, max_bytes=CACHE['MAX_MB'] * 1024 * 1024) if CACHE['ENABLED'] else None
+        self.extract_profile = ExtractProfile() if PROFILE['ENABLED'] else None # 本次会话累计的提取性能统计
+        self.invoice_index = InvoiceIndex() if INVOICE_INDEX['ENABLED'] else None # 历史发票索引，跨会话查重
+        self.classifier = KeywordClassifier(CLASS_KEYWORDS) if CLASSIFY['ENABLED'] else None # 按关键字预测类别
+        self.remote_extractor = RemoteExtractor(
+            SERVICE['URL'], token=SERVICE['TOKEN'], timeout=SERVICE['TIMEOUT'],
+            batch_size=SERVICE['BATCH_SIZE'], upload=SERVICE['UPLOAD'],
+        ) if SERVICE['URL'] else None # 提取服务，未配置时在本机提取
+        self.rename_journal = RenameJournal(fsync_every=JOURNAL['FSYNC_EVERY'], keep=JOURNAL['KEEP']) if JOURNAL['ENABLED'] else None # 重命名日志，用于恢复和撤销
 
         self.main_layout.import_file_signal.connect(self.import_file)
         self.main_layout.extract_name_signal.connect(self.extract_name)
+        self.main_layout.clear_cache_signal.connect(self.clear_cache)
         self.main_layout.rename_signal.connect(self.rename)
+        self.main_layout.undo_rename_signal.connect(self.undo_rename)
+
+        # 修改新文件名后预览重命名结果，连续的修改（如提取时逐行填写）合并为一次
+        self.rename_preview_timer = QTimer(self)
+        self.rename_preview_timer.setSingleShot(True)
+        self.rename_preview_timer.setInterval(300)
+        self.rename_preview_timer.timeout.connect(self.update_rename_preview)
+        self.main_layout.rename_file_table.itemChanged.connect(self.on_rename_item_changed)
+        self.main_layout.watch_folder_signal.connect(self.toggle_watch_folder)
 
     def import_file(self):
+        if self.is_extracting():
+            return
+
         # 打开系统文件资源管理器
         self.import_file_path_list, _ = QFileDialog.getOpenFileNames(
             self,
             "选择文件",
             "",
-            "PDF 文件 (*.pdf)"
+            "发票文件 (*.pdf *.xml *.ofd);;PDF 文件 (*.pdf);;全电发票 XML/OFD (*.xml *.ofd)"
         )
         self.import_file_name_list = [file_path.split('/')[-1] for file_path in self.import_file_path_list]
 
         if self.import_file_path_list:
+            # 上一批的提取结果不再对应新导入的文件
+            self.invoice_num_list = []
+            self.invoice_info_list = []
+            self.class_prediction_list = []
+            self.output_file_name_list = []
+            self.main_layout.rename_file_table.setRowCount(0)
             self.main_layout.import_file_table.setRowCount(0)
             self.main_layout.import_file_table.setRowCount(len(self.import_file_path_list))
             # 设置文件路径列表以启用PDF预览功能
@@ -80,6 +128,8 @@ class MainInterface(QMainWindow):
             class_comboBox = ComboBox()
             class_comboBox.addItems(CLASS_LIST)
             class_comboBox.setFont(font)
+            # 手动选择过类别的行不再被自动分类覆盖（activated 只在用户点选时发出）
+            class_comboBox.activated.connect(lambda index, comboBox=class_comboBox: comboBox.setProperty('manual', True))
             table.setCellWidget(row, 0, class_comboBox)
         
             item = QTableWidgetItem(str(value2))
@@ -92,9 +142,9 @@ class MainInterface(QMainWindow):
             table.add_delete_button(row)
 
         elif table == self.main_layout.rename_file_table:
-            table_header_labels_zh = ['文件名']
-            table.setHorizontalHeaderLabels(table_header_labels_zh)
+            table_header_labels_zh = ['文件名', '重命名预览']
             table.setColumnCount(len(table_header_labels_zh))
+            table.setHorizontalHeaderLabels(table_header_labels_zh)
 
             table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)  # 根据内容自动调整列宽
             table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)  # 自动拉伸
@@ -102,29 +152,358 @@ class MainInterface(QMainWindow):
             item = QTableWidgetItem(str(value1))
             table.setItem(row, 0, item)   # 把 Item 填充进单元格
 
+            # 预览列只读，由 update_rename_preview 填写
+            preview_item = QTableWidgetItem('')
+            preview_item.setFlags(preview_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            table.setItem(row, 1, preview_item)
+
+    def on_rename_item_changed(self, item):
+        if item.column() == 0:
+            self.rename_preview_timer.start()
+
+    def update_rename_preview(self):
+        """
+        按 rename_file_table 中的新文件名预览直接重命名的结果，填在预览列，不修改任何文件
+
+        每个文件夹只读取一次，预计的冲突后缀、交换以及失败的文件（原文件已不存在、文件名不能使用）都会显示出来
+        :return: 预览的 RenameReport，正在提取或还没有提取时返回 None
+        """
+        table = self.main_layout.rename_file_table
+        if self.extract_thread is not None or not self.import_file_path_list or table.rowCount() != len(self.import_file_path_list):
+            return None
+        names = [table.item(row, 0).text() if table.item(row, 0) else '' for row in range(table.rowCount())]
+        preview = batch_rename(self.import_file_path_list, names, dry_run=True)
+
+        destinations = preview.destinations()
+        # 填写预览列时不触发 itemChanged
+        table.blockSignals(True)
+        try:
+            for row, (src, name) in enumerate(zip(self.import_file_path_list, names)):
+                item = table.item(row, 1)
+                if item is None:
+                    continue
+                reason = preview.failure(src)
+                final = destinations.get(src)
+                if reason is not None:
+                    text = f'失败：{reason}'
+                elif final is None or final == src:
+                    text = '不变'
+                elif os.path.basename(final) != name:
+                    text = f'{os.path.basename(final)}（已添加后缀）'
+                else:
+                    text = os.path.basename(final)
+                item.setText(text)
+                item.setToolTip(text)
+        finally:
+            table.blockSignals(False)
+        return preview
+
+    def preload_pdf_libraries(self):
+        """在后台线程中导入提取后端使用的PDF库（导入较慢，启动时没有导入）"""
+        threading.Thread(target=preload_backend, args=(EXTRACT['BACKEND'],), daemon=True).start()
+
     def extract_name(self):
         print('[main_interface] extract name')
-        self.output_file_name_list = []
-        for i, file_path in enumerate(self.import_file_path_list):
+        if self.is_extracting() or not self.import_file_path_list:
+            return
+
+        # 先列出所有行，每个文件提取完成后再更新对应的行
+        self.output_file_name_list = ['提取中...'] * len(self.import_file_path_list)
+        self.invoice_num_list = [None] * len(self.import_file_path_list)
+        self.invoice_info_list = [None] * len(self.import_file_path_list)
+        self.class_prediction_list = [(None, 0.0)] * len(self.import_file_path_list)
+        self.main_layout.rename_file_table.setRowCount(0)
+        self.main_layout.rename_file_table.setRowCount(len(self.output_file_name_list))
+        for row, new_name in enumerate(self.output_file_name_list):
+            self.set_table_row(self.main_layout.rename_file_table, row, self.output_file_name_list[row], value2=None)
+
+        self.start_extract(range(len(self.import_file_path_list)))
+
+    def start_extract(self, rows):
+        """在后台提取指定行的文件"""
+        self.extract_rows = list(rows)
+        self.extract_thread = ExtractThread(
+            [self.import_file_path_list[row] for row in self.extract_rows],
+            workers=EXTRACT['WORKERS'],
+            parent=self,
+            remote=self.remote_extractor,
+            cache=self.extract_cache,
+            required_fields=EXTRACT['REQUIRED_FIELDS'],
+            max_pages=EXTRACT['MAX_PAGES'],
+            backend=EXTRACT['BACKEND'],
+            fields=self.extract_fields(),
+            layout=EXTRACT['LAYOUT'],
+            structured=EXTRACT['STRUCTURED'],
+            worker_memory_mb=MEMORY['WORKER_MEMORY_MB'],
+            max_tasks_per_child=MEMORY['MAX_TASKS_PER_CHILD'],
+            max_text_chars=MEMORY['MAX_TEXT_CHARS'],
+            track_memory=MEMORY['TRACK_PEAK'],
+            profile=self.extract_profile,
+        )
+        self.extract_thread.result_ready.connect(self.on_extract_result)
+        self.extract_thread.finished.connect(self.on_extract_finished)
+        self.extract_thread.start()
+
+    def on_extract_result(self, index, result):
+        """单个文件提取完成，更新对应行"""
+        row = self.extract_rows[index]
+        file_path = result['file_path']
+        extension = os.path.splitext(file_path)[1] # XML/OFD 文件保留原扩展名
+        if result.get('peak_rss_mb') is not None:
+            print(f"{file_path} (峰值内存 {result['peak_rss_mb']:.0f}MB)")
+        else:
             print(file_path)
+        try:
+            if result['error']:
+                raise ValueError(result['error'])
+            info_all = result['info']
+            class_comboBox = self.main_layout.import_file_table.cellWidget(row, 0)
+            if self.classifier is not None:
+                self.apply_predicted_class(row, class_comboBox, info_all)
+            class_text = class_comboBox.currentText()
+            self.invoice_num_list[row] = info_all['发票号码']
+            self.invoice_info_list[row] = {
+                'invoice_number': info_all['发票号码'],
+                'amount': info_all['价税合计']['小写'],
+                'invoice_date': info_all['开票日期'],
+            }
+            self.output_file_name_list[row] = build_invoice_file_name(class_text, info_all, extension)
+        except Exception as e:
+            print(f'[main_interface] extract name error: {e}')
+            self.output_file_name_list[row] = file_path.split('/')[-1].split('.')[0] + '-提取失败' + extension
+
+        self.set_table_row(self.main_layout.rename_file_table, row, self.output_file_name_list[row], value2=None)
+
+    def extract_fields(self):
+        """需要提取的字段：生成文件名的字段，开启自动分类时加上分类用到的字段"""
+        fields = resolve_fields(EXTRACT['FIELDS'])
+        if fields is None or self.classifier is None:
+            return fields
+        return resolve_fields(fields + tuple(CLASSIFY_FIELDS))
+
+    def apply_predicted_class(self, row, class_comboBox, info_all):
+        """预测类别，置信度足够且用户没有手动选择时预先选好"""
+        category, confidence = self.classifier.classify(info_all)
+        self.class_prediction_list[row] = (category, confidence)
+        if category is not None:
+            print(f'[main_interface] predicted class: {category} ({confidence:.2f})')
+        self.show_predicted_class(class_comboBox, category, confidence)
+
+    def show_predicted_class(self, class_comboBox, category, confidence):
+        """在下拉框上显示预测的类别和置信度"""
+        if category is None:
+            return
+        class_comboBox.setToolTip(f'自动分类: {category}，置信度 {confidence:.0%}')
+        if confidence >= CLASSIFY['MIN_CONFIDENCE'] and not class_comboBox.property('manual'):
+            class_comboBox.setCurrentText(category)
+
+    def on_extract_finished(self):
+        print('[main_interface] extract name finished')
+        self.extract_thread = None
+        extracted_numbers = {self.invoice_num_list[row] for row in self.extract_rows}
+        if self.extract_profile is not None:
             try:
-                info_all = extract_invoice_info(file_path)
-                class_comboBox = self.main_layout.import_file_table.cellWidget(i, 0)
-                class_text = class_comboBox.currentText()
-                self.invoice_num_list.append(info_all['发票号码'])
-                self.output_file_name_list.append(class_text + ' ' + info_all['价税合计']['小写'] + ' ' + info_all['开票日期'].replace('-', '')[4:8] + '.pdf')
+                path = self.extract_profile.dump(patterns=describe_patterns(), extractor=EXTRACTOR_FINGERPRINT, backend=EXTRACT['BACKEND'])
+                print(f'[main_interface] extract profile saved: {path}')
             except Exception as e:
-                print(f'[main_interface] extract name error: {e}')
-                self.output_file_name_list.append(file_path.split('/')[-1].split('.')[0] + '-提取失败' + '.pdf')
+                print(f'[main_interface] extract profile error: {e}')
+
+        # 导入的发票以前已经导出过时提示，重命名前 check_info 会再次确认
+        # 监视文件夹时只提示本次提取的文件
+        history = {number: record for number, record in self.find_history_duplicates().items() if number in extracted_numbers}
+        if history:
+            InfoBar.warning(
+                title='以前报销过的发票',
+                content=format_history_duplicates(history, self.invoice_file_names()),
+                orient=Qt.Orientation.Vertical,
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=-1,
+                parent=self.main_layout,
+            )
 
-        self.main_layout.rename_file_table.setRowCount(0)
+        # 提取期间监视到的新文件
+        if self.watch_pending_rows:
+            rows = sorted(set(self.watch_pending_rows))
+            self.watch_pending_rows = []
+            self.start_extract(rows)
+        else:
+            self.update_rename_preview()
+
+    def toggle_watch_folder(self):
+        """开始或停止监视文件夹"""
+        if self.watch_thread is not None:
+            self.stop_watch_folder()
+            InfoBar.info(
+                title='提示',
+                content='已停止监视文件夹',
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=2000,
+                parent=self.main_layout,
+            )
+            return
+
+        folder = QFileDialog.getExistingDirectory(self, "选择监视的文件夹", "")
+        if not folder:
+            return
+        print(f'[main_interface] watch folder: {folder}')
+        self.watch_thread = WatchThread(
+            folder,
+            parent=self,
+            extensions=('.pdf',) + STRUCTURED_EXTENSIONS,
+            debounce_seconds=WATCH['DEBOUNCE_SECONDS'],
+            poll_interval=WATCH['POLL_INTERVAL'],
+            force_polling=WATCH['FORCE_POLLING'],
+        )
+        self.watch_thread.files_ready.connect(self.on_watch_files_ready)
+        self.watch_thread.watch_error.connect(self.on_watch_error)
+        self.watch_thread.start()
+        self.main_layout.watch_folder_btn.setText('停止监视')
+        InfoBar.success(
+            title='开始监视',
+            content=f'{folder}\n新放入的发票写完后会自动提取',
+            orient=Qt.Orientation.Vertical,
+            isClosable=True,
+            position=InfoBarPosition.TOP_RIGHT,
+            duration=3000,
+            parent=self.main_layout,
+        )
+
+    def stop_watch_folder(self):
+        if self.watch_thread is None:
+            return
+        self.watch_thread.stop()
+        self.watch_thread = None
+        self.main_layout.watch_folder_btn.setText('监视文件夹')
+
+    def on_watch_error(self, message):
+        self.stop_watch_folder()
+        InfoBar.error(
+            title='错误',
+            content=f'监视文件夹失败: {message}',
+            isClosable=True,
+            position=InfoBarPosition.TOP_RIGHT,
+            duration=-1,
+            parent=self.main_layout,
+        )
+
+    def on_watch_files_ready(self, file_paths):
+        """
+        监视到新写完的文件：新文件追加到表格末尾，已导入的文件内容有变化时重新提取该行；
+        只提取这些行，已提取的行保持不变
+        """
+        extracted_count = len(self.output_file_name_list)
+        changed_rows = []
+        new_paths = []
+        for file_path in file_paths:
+            file_path = file_path.replace('\\', '/') # 与文件对话框返回的路径格式一致
+            # PDF 与同名的 XML/OFD 是同一张发票，只提取 PDF
+            if has_pdf_sibling(file_path):
+                continue
+            if file_path in self.import_file_path_list:
+                FILE_BUFFERS.release(file_path)
+                changed_rows.append(self.import_file_path_list.index(file_path))
+            else:
+                new_paths.append(file_path)
+        if not changed_rows and not new_paths:
+            return
+        print(f'[main_interface] watch: {len(new_paths)} new, {len(changed_rows)} changed')
+
+        table = self.main_layout.import_file_table
+        self.import_file_path_list.extend(new_paths)
+        self.import_file_name_list.extend(file_path.split('/')[-1] for file_path in new_paths)
+        table.setRowCount(len(self.import_file_path_list))
+        table.set_file_paths(self.import_file_path_list)
+        table.set_delete_callback(self.delete_file_row)
+        for row in range(len(self.import_file_path_list) - len(new_paths), len(self.import_file_path_list)):
+            self.set_table_row(table, row, 'class', self.import_file_name_list[row])
+
+        # 新行以及还没有提取过的行
+        rows = sorted(set(changed_rows) | set(range(extracted_count, len(self.import_file_path_list))))
+        padding = len(self.import_file_path_list) - extracted_count
+        self.output_file_name_list.extend(['提取中...'] * padding)
+        self.invoice_num_list.extend([None] * (len(self.import_file_path_list) - len(self.invoice_num_list)))
+        self.invoice_info_list.extend([None] * (len(self.import_file_path_list) - len(self.invoice_info_list)))
+        self.class_prediction_list.extend([(None, 0.0)] * (len(self.import_file_path_list) - len(self.class_prediction_list)))
         self.main_layout.rename_file_table.setRowCount(len(self.output_file_name_list))
-        for row, new_name in enumerate(self.output_file_name_list):
+        for row in rows:
+            self.output_file_name_list[row] = '提取中...'
             self.set_table_row(self.main_layout.rename_file_table, row, self.output_file_name_list[row], value2=None)
 
+        if self.extract_thread is not None and self.extract_thread.isRunning():
+            self.watch_pending_rows.extend(rows)
+        else:
+            self.start_extract(rows)
+
+    def ignore_watched_files(self, rename_report):
+        """重命名后的文件仍在监视的文件夹中，不当作新文件"""
+        if self.watch_thread is None:
+            return
+        try:
+            self.watch_thread.ignore(list(rename_report.destinations().values()))
+        except Exception as e:
+            print(f'[main_interface] watch ignore error: {e}')
+
+    def closeEvent(self, event):
+        self.stop_watch_folder()
+        super().closeEvent(event)
+
+    def is_extracting(self):
+        """正在后台提取时提示用户等待"""
+        if self.extract_thread is None or not self.extract_thread.isRunning():
+            return False
+        InfoBar.warning(
+            title='提示',
+            content='正在提取文件名，请稍候',
+            isClosable=True,
+            position=InfoBarPosition.TOP_RIGHT,
+            duration=2000,
+            parent=self.main_layout,
+        )
+        return True
+
+    def clear_cache(self):
+        """清除提取结果缓存"""
+        print('[main_interface] clear cache')
+        if self.extract_cache is None:
+            InfoBar.info(
+                title='提示',
+                content='提取结果缓存未启用',
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=2000,
+                parent=self.main_layout,
+            )
+            return
+
+        try:
+            count = self.extract_cache.clear()
+            InfoBar.success(
+                title='提示',
+                content=f'已清除{count}条缓存的提取结果',
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=2000,
+                parent=self.main_layout,
+            )
+        except Exception as e:
+            print(f'[main_interface] clear cache error: {e}')
+            InfoBar.error(
+                title='错误',
+                content=f'清除缓存失败: {e}',
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=-1,
+                parent=self.main_layout,
+            )
+
     def rename(self, is_save_as):
         print(f'[main_interface] rename: {is_save_as}')
 
+        if self.is_extracting():
+            return
+
         if not self.check_info():
             return
 
@@ -136,6 +515,22 @@ class MainInterface(QMainWindow):
         for i in range(self.main_layout.rename_file_table.rowCount()):
             self.output_file_name_list.append(self.main_layout.rename_file_table.item(i, 0).text())
 
+        # 直接重命名前确认预览：有文件会被添加后缀或预计失败时，先让用户看到再继续
+        if not is_save_as:
+            self.rename_preview_timer.stop()
+            preview = self.update_rename_preview()
+            suffixed = preview is not None and any(conflict['conflict_type'] in ('name_collision', 'existing_file') for conflict in preview.conflicts)
+            if preview is not None and (preview.failed_files or suffixed):
+                preview_dialog = Dialog("重命名预览", format_rename_message(preview) + '\n\n仍然重命名？', self.main_layout)
+                preview_dialog.yesButton.setText("重命名")
+                preview_dialog.cancelButton.setText("取消")
+                if not preview_dialog.exec():
+                    print('取消')
+                    return
+
+        # 重命名前按原路径计算文件哈希（内容缓冲以原路径为键）
+        file_hashes = self.hash_import_files()
+
         if is_save_as:
             self.output_folder_path = self.import_file_path_list[0].rsplit('/', 1)[0] + '/' + OUTPUT_FOLDER
             print(self.output_folder_path)
@@ -143,8 +538,9 @@ class MainInterface(QMainWindow):
 
             self.output_file_path_list = [self.output_folder_path + '/' + file_name for file_name in self.import_file_name_list]
 
-            rename_result_json = batch_rename(self.output_file_path_list, self.output_file_name_list)
-            rename_result = format_rename_message(rename_result_json)
+            rename_report = batch_rename(self.output_file_path_list, self.output_file_name_list, self.rename_journal)
+            self.record_invoice_index(self.output_file_path_list, file_hashes, rename_report)
+            rename_result = format_rename_message(rename_report)
             InfoBar.info(
                 title='提示',
                 content=rename_result,
@@ -161,8 +557,10 @@ class MainInterface(QMainWindow):
             self.output_file_path_list = self.import_file_path_list
             print(f'self.output_file_name_list, {self.output_file_name_list}')
             print(f'self.output_file_path_list, {self.output_file_path_list}')
-            rename_result_json = batch_rename(self.output_file_path_list, self.output_file_name_list)
-            rename_result = format_rename_message(rename_result_json)
+            rename_report = batch_rename(self.output_file_path_list, self.output_file_name_list, self.rename_journal)
+            self.record_invoice_index(self.output_file_path_list, file_hashes, rename_report)
+            self.ignore_watched_files(rename_report)
+            rename_result = format_rename_message(rename_report)
 
             InfoBar.info(
                 title='提示',
@@ -176,6 +574,82 @@ class MainInterface(QMainWindow):
             print(f'InfoBar - 提示 {rename_result}')
 
 
+    def recover_renames(self):
+        """上次在重命名中途退出时，把该批文件改回原名"""
+        if self.rename_journal is None:
+            return
+        try:
+            results = self.rename_journal.recover()
+        except Exception as e:
+            print(f'[main_interface] recover renames error: {e}')
+            return
+        for rename_report in results:
+            rename_result = format_rename_message(rename_report)
+            print(f'[main_interface] recovered rename: {rename_result}')
+            InfoBar.warning(
+                title='上次的重命名未完成，已恢复原文件名',
+                content=rename_result,
+                orient=Qt.Orientation.Vertical,
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=-1,
+                parent=self.main_layout,
+            )
+
+    def undo_rename(self):
+        """把最近一次重命名的文件改回原名"""
+        print('[main_interface] undo rename')
+        if self.is_extracting():
+            return
+
+        batch = self.rename_journal.last_batch() if self.rename_journal is not None else None
+        if batch is None:
+            InfoBar.info(
+                title='提示',
+                content='没有可撤销的重命名',
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=2000,
+                parent=self.main_layout,
+            )
+            return
+
+        renamed_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(batch['time']))
+        undo_dialog = Dialog("撤销重命名", f"把 {renamed_at} 重命名的 {len(batch['files'])} 个文件改回原名？", self.main_layout)
+        undo_dialog.yesButton.setText("撤销")
+        undo_dialog.cancelButton.setText("取消")
+        if not undo_dialog.exec():
+            print('取消')
+            return
+
+        try:
+            rename_report = self.rename_journal.undo_last()
+        except Exception as e:
+            print(f'[main_interface] undo rename error: {e}')
+            InfoBar.error(
+                title='错误',
+                content=f'撤销重命名失败: {e}',
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=-1,
+                parent=self.main_layout,
+            )
+            return
+        self.ignore_watched_files(rename_report)
+        self.forget_invoice_index(rename_report)
+        self.update_rename_preview()
+        rename_result = format_rename_message(rename_report).replace('批量重命名', '撤销重命名', 1)
+        InfoBar.info(
+            title='提示',
+            content=rename_result,
+            orient=Qt.Orientation.Vertical,
+            isClosable=True,
+            position=InfoBarPosition.TOP_RIGHT,
+            duration=-1,
+            parent=self.main_layout,
+        )
+        print(f'InfoBar - 提示 {rename_result}')
+
     def check_info(self):
         # 是否含相同的发票号码
         # 因为有提取失败的
@@ -186,6 +660,8 @@ class MainInterface(QMainWindow):
         print(lst)
         idx_map = defaultdict(list)          # 值 → [索引列表]
         for i, v in enumerate(lst):
+            if v is None:  # 提取失败的文件没有发票号码
+                continue
             idx_map[v].append(i)
 
         dup_idx = {v: idx for v, idx in idx_map.items() if len(idx) > 1}
@@ -210,16 +686,88 @@ class MainInterface(QMainWindow):
                 print('取消')
 
             return False
-        else:
-            return True
+
+        # 以前已经导出过的发票，确认后仍可继续
+        history = self.find_history_duplicates()
+        if history:
+            history_dialog = Dialog("以前报销过的发票", format_history_duplicates(history, self.invoice_file_names()) + '\n\n仍然继续？', self.main_layout)
+            history_dialog.yesButton.setText("继续")
+            history_dialog.cancelButton.setText("取消")
+            if not history_dialog.exec():
+                print('取消')
+                return False
+        return True
+
+    def invoice_file_names(self):
+        """发票号码 -> 导入的文件名"""
+        return {number: name for number, name in zip(self.invoice_num_list, self.import_file_name_list) if number}
+
+    def find_history_duplicates(self):
+        """在历史发票索引中查找本次导入的发票号码，返回 发票号码 -> 历史记录"""
+        if self.invoice_index is None or not self.invoice_num_list:
+            return {}
+        try:
+            return self.invoice_index.lookup(self.invoice_num_list)
+        except Exception as e:
+            print(f'[main_interface] invoice index lookup error: {e}')
+            return {}
+
+    def hash_import_files(self):
+        """提取到发票号码的文件的内容哈希，与导入的文件一一对应"""
+        if self.invoice_index is None:
+            return []
+        file_hashes = []
+        for file_path, info in zip(self.import_file_path_list, self.invoice_info_list):
+            try:
+                file_hashes.append(hash_file(file_path, read_file_buffer(file_path)) if info else None)
+            except OSError as e:
+                print(f'[main_interface] hash file error: {e}')
+                file_hashes.append(None)
+        return file_hashes
+
+    def record_invoice_index(self, src_list, file_hashes, rename_report):
+        """把重命名成功的发票写入历史发票索引"""
+        if self.invoice_index is None or not file_hashes:
+            return
+        try:
+            renamed = rename_report.destinations()
+            entries = []
+            for src, file_hash, info in zip(src_list, file_hashes, self.invoice_info_list):
+                if info and src in renamed:
+                    entries.append(dict(info, file_hash=file_hash, export_path=renamed[src]))
+            count = self.invoice_index.record(entries)
+            print(f'[main_interface] invoice index recorded: {count}')
+        except Exception as e:
+            print(f'[main_interface] invoice index record error: {e}')
+
+    def forget_invoice_index(self, rename_report):
+        """撤销重命名后，改回原名的发票不再算作已报销，从历史发票索引中删除"""
+        if self.invoice_index is None:
+            return
+        try:
+            removed = self.invoice_index.remove_exported(
+                source for source, _, final in rename_report.renamed_files if source != final
+            )
+            print(f'[main_interface] invoice index removed: {len(removed)}')
+        except Exception as e:
+            print(f'[main_interface] invoice index remove error: {e}')
 
     def delete_file_row(self, row):
         """删除指定行的文件"""
+        if self.is_extracting():
+            return
+
         if 0 <= row < len(self.import_file_path_list):
-            # 从文件路径列表中删除
+            # 从文件路径列表中删除，并释放文件内容缓冲
+            FILE_BUFFERS.release(self.import_file_path_list[row])
             del self.import_file_path_list[row]
             del self.import_file_name_list[row]
-            del self.invoice_num_list[row]
+            if self.invoice_num_list:
+                del self.invoice_num_list[row]
+            if self.invoice_info_list:
+                del self.invoice_info_list[row]
+            if self.class_prediction_list:
+                del self.class_prediction_list[row]
             if self.output_file_name_list:
                 del self.output_file_name_list[row]
                 self.main_layout.rename_file_table.setRowCount(0)
@@ -238,3 +786,6 @@ class MainInterface(QMainWindow):
                 # 重新填充表格
                 for i, file_name in enumerate(self.import_file_path_list):
                     self.set_table_row(self.main_layout.import_file_table, i, 'class', file_name.split('/')[-1])
+                # 重建的下拉框恢复自动分类的结果
+                for i, (category, confidence) in enumerate(self.class_prediction_list):
+                    self.show_predicted_class(self.main_layout.import_file_table.cellWidget(i, 0), category, confidence)
@@ -0,0 +1,41 @@
+from PySide6.QtCore import QThread, Signal
+
+from utils.folder_watcher import FolderWatcher
+
+class WatchThread(QThread):
+    """后台监视文件夹，每有一批文件写完发出一次 files_ready 信号"""
+
+    files_ready = Signal(list)  # 写完的文件路径
+    watch_error = Signal(str)
+
+    def __init__(self, folder, parent=None, **options):
+        super().__init__(parent)
+        self.folder = folder
+        self.options = options
+        self.watcher = None
+
+    def run(self):
+        try:
+            with FolderWatcher(self.folder, **self.options) as watcher:
+                self.watcher = watcher
+                print(f'[watch_thread] watching {watcher.folder} ({watcher.mode})')
+                # 每 0.5 秒检查一次是否要求停止
+                while not self.isInterruptionRequested():
+                    ready = watcher.poll(0.5)
+                    if ready:
+                        self.files_ready.emit(ready)
+        except OSError as e:
+            print(f'[watch_thread] watch error: {e}')
+            self.watch_error.emit(str(e))
+        finally:
+            self.watcher = None
+
+    def ignore(self, paths):
+        """本程序写入的文件（如重命名后的文件）不当作新文件"""
+        watcher = self.watcher
+        if watcher is not None:
+            watcher.ignore(paths)
+
+    def stop(self):
+        self.requestInterruption()
+        self.wait()
@@ -20,7 +20,10 @@ class MainLayout(QWidget):
 
     import_file_signal = Signal()
     extract_name_signal = Signal()
+    clear_cache_signal = Signal()
+    watch_folder_signal = Signal()
     rename_signal = Signal(bool)
+    undo_rename_signal = Signal()
 
     def __init__(self):
         super().__init__()
@@ -66,6 +69,16 @@ class MainLayout(QWidget):
         import_file_ctrl_layout.addWidget(extract_name_btn)
         extract_name_btn.clicked.connect(self.emit_extract_name_signal)
 
+        clear_cache_btn = PushButton(text='清除缓存')
+        clear_cache_btn.setFixedSize(100, 30)
+        import_file_ctrl_layout.addWidget(clear_cache_btn)
+        clear_cache_btn.clicked.connect(self.emit_clear_cache_signal)
+
+        self.watch_folder_btn = PushButton(text='监视文件夹')
+        self.watch_folder_btn.setFixedSize(100, 30)
+        import_file_ctrl_layout.addWidget(self.watch_folder_btn)
+        self.watch_folder_btn.clicked.connect(self.emit_watch_folder_signal)
+
         self.import_file_table = PdfPreviewerTableWidget()
         # 禁用 第二列的编辑功能
         self.import_file_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
@@ -90,6 +103,11 @@ class MainLayout(QWidget):
         rename_file_ctrl_layout.addWidget(rename_btn)
         rename_btn.clicked.connect(self.emit_rename_signal)
 
+        undo_rename_btn = PushButton(text='撤销重命名')
+        undo_rename_btn.setFixedSize(100, 30)
+        rename_file_ctrl_layout.addWidget(undo_rename_btn)
+        undo_rename_btn.clicked.connect(self.emit_undo_rename_signal)
+
         rename_rd_btn1 = RadioButton('直接重命名')
         rename_rd_btn2 = RadioButton('另存后重命名')
         # 将单选按钮添加到互斥的按钮组
@@ -122,6 +140,15 @@ class MainLayout(QWidget):
     def emit_extract_name_signal(self):
         self.extract_name_signal.emit()
 
+    def emit_clear_cache_signal(self):
+        self.clear_cache_signal.emit()
+
+    def emit_watch_folder_signal(self):
+        self.watch_folder_signal.emit()
+
     def emit_rename_signal(self):
         is_save_as = (self.button_group.checkedButton().text() == '另存后重命名')
         self.rename_signal.emit(is_save_as)
+
+    def emit_undo_rename_signal(self):
+        self.undo_rename_signal.emit()
@@ -17,6 +17,13 @@ exe = Executable(
     icon='./resource/icon/1.svg' # 自定义
 )
 
+# 命令行模式，不依赖 Qt
+cli_exe = Executable(
+    script="cli.py",
+    base=None,
+    target_name="报销助手-cli-v1.0",
+)
+
 # 4. 打包的参数配置
 options = {
     "build_exe": {
@@ -30,5 +37,5 @@ setup(
     version="1.0", # 自定义
     description="报销助手-重命名", # 自定义
     options=options,
-    executables=[exe]
+    executables=[exe, cli_exe]
 )
@@ -1,266 +1,472 @@
 import os
+import sys
 import json
 
-from typing import List, Dict
+from typing import List, Dict, Set, Tuple, Optional, Any
 
-def _check_for_duplicates(new_name_list: List[str]) -> Dict[str, List[int]]:
-    """检查新文件名列表中的重复项"""
-    name_indices = {}
-    for idx, name in enumerate(new_name_list):
-        if name not in name_indices:
-            name_indices[name] = []
-        name_indices[name].append(idx)
-    
-    # 筛选出有重复的文件名
-    duplicates = {name: indices for name, indices in name_indices.items() if len(indices) > 1}
-    return duplicates
+# 交换、轮换式重命名时使用的临时文件名后缀
+TEMP_SUFFIX = ".tmp_rename"
+
+# 原文件不存在时的原因，有这样的文件时整批都不执行
+MISSING_REASON = "文件不存在"
+
+# Windows 文件名中不允许的字符
+_WINDOWS_INVALID_CHARS = set('<>:"/\\|?*') | {chr(i) for i in range(32)}
+
+# 重命名步骤 (源文件序号, 原路径, 新路径)；序号相同的两步为 “先改为临时名，再改为目标名”
+RenameStep = Tuple[int, str, str]
+
+def _path_key(path: str) -> str:
+    """比较路径用的键，Windows 上不区分大小写"""
+    return os.path.normcase(os.path.abspath(path))
+
+# 文件的键 (文件夹的键, normcase 后的文件名)，文件夹的键每个文件夹只计算一次
+NameKey = Tuple[str, str]
 
-def _resolve_name_conflicts(src_list: List[str], new_name_list: List[str]) -> (List[str], List[Dict]):
+# 重命名成功的文件 (原路径, 临时路径或 None, 最终路径)
+RenamedFile = Tuple[str, Optional[str], str]
+# 重命名失败的文件 (原路径, 原因)
+FailedFile = Tuple[str, str]
+
+class RenameReport:
     """
-    处理不同文件重命名后名称相同的冲突
-    返回处理后的新文件名列表和冲突信息
+    批量重命名的结果
+
+    每个文件只占一个元组，不为每个文件建字典，也不经过 JSON；按原路径查询时才建立索引 (一次 O(n))，
+    需要输出 (命令行报告、日志) 时再用 to_dict / to_json 转换，格式与以前 batch_rename 返回的 JSON 相同。
     """
-    duplicates = _check_for_duplicates(new_name_list)
-    conflict_info = []
-    resolved_names = new_name_list.copy()
-    
-    for name, indices in duplicates.items():
-        # 记录冲突信息
-        conflict_files = [os.path.basename(src_list[i]) for i in indices]
-        conflict_entry = {
-            "conflict_type": "name_collision",
-            "original_files": conflict_files,
-            "original_target": name,
-            "resolved_names": []
+
+    __slots__ = ('total_files', 'renamed_files', 'failed_files', 'conflicts', 'error', 'dry_run', 'journal_error',
+                 '_destinations', '_failures')
+
+    total_files: int
+    renamed_files: List[RenamedFile]
+    failed_files: List[FailedFile]
+    conflicts: List[Dict[str, Any]]
+    error: Optional[str]
+    dry_run: bool
+    journal_error: Optional[str]
+
+    def __init__(self, total_files: int, error: Optional[str] = None, dry_run: bool = False):
+        """
+        :param total_files: 本批的文件数
+        :param error: 整批无法执行的原因，如参数长度不一致
+        :param dry_run: 预览的结果，没有修改任何文件
+        """
+        self.total_files = total_files
+        self.renamed_files = []
+        self.failed_files = []
+        self.conflicts = []
+        self.error = error
+        self.dry_run = dry_run
+        # 重命名日志无法写入时的原因：重命名照常执行，但本批不能撤销，中途退出时也不能恢复
+        self.journal_error = None
+        self._destinations: Optional[Dict[str, str]] = None
+        self._failures: Optional[Dict[str, str]] = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None and not self.failed_files
+
+    def destinations(self) -> Dict[str, str]:
+        """原路径 -> 最终路径，只包含重命名成功的文件"""
+        if self._destinations is None:
+            self._destinations = {source: final for source, _, final in self.renamed_files}
+        return self._destinations
+
+    def destination(self, source: str) -> Optional[str]:
+        """文件的最终路径，重命名失败或不在本批中时返回 None"""
+        return self.destinations().get(source)
+
+    def failure(self, source: str) -> Optional[str]:
+        """文件重命名失败的原因，成功或不在本批中时返回 None"""
+        if self._failures is None:
+            self._failures = dict(self.failed_files)
+        return self._failures.get(source)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "success": self.success,
+            "total_files": self.total_files,
+            "renamed_files": [
+                {"source": source, "temporary_destination": temp, "final_destination": final}
+                for source, temp, final in self.renamed_files
+            ],
+            "failed_files": [{"source": source, "reason": reason} for source, reason in self.failed_files],
+            "conflicts": self.conflicts,
         }
-        
-        # 为重复的文件名添加递增后缀
-        for i, idx in enumerate(indices):
-            if i == 0:
-                # 第一个文件保持原名称
-                conflict_entry["resolved_names"].append(name)
-                continue
-                
-            # 分离文件名和扩展名
-            base, ext = os.path.splitext(name)
-            new_name = f"{base}_{i+1}{ext}"
-            resolved_names[idx] = new_name
-            conflict_entry["resolved_names"].append(new_name)
-        
-        conflict_info.append(conflict_entry)
-        print(f"命名冲突处理: 文件 {', '.join(conflict_files)} 重命名后将相同，已添加后缀处理")
-    
-    return resolved_names, conflict_info
+        if self.error is not None:
+            result["error"] = self.error
+        if self.dry_run:
+            result["dry_run"] = True
+        if self.journal_error is not None:
+            result["journal_error"] = self.journal_error
+        return result
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+def _split_name(name: str) -> Tuple[str, str]:
+    base, ext = os.path.splitext(name)
+    return base, ext
+
+def _invalid_name_reason(name: str) -> Optional[str]:
+    """新文件名不能使用时返回原因（重命名会失败，或者 “/” 会把文件移到其他文件夹）"""
+    if not name.strip() or name in ('.', '..'):
+        return "新文件名为空"
+    if sys.platform == 'win32':
+        if any(char in _WINDOWS_INVALID_CHARS for char in name):
+            return "新文件名包含不允许的字符 <>:\"/\\|?*"
+        if name[-1] in ' .':
+            return "新文件名不能以空格或 . 结尾"
+        if len(name) > 255:
+            return "新文件名过长"
+    else:
+        if '/' in name or '\0' in name:
+            return "新文件名包含不允许的字符 /"
+        if len(os.fsencode(name)) > 255:
+            return "新文件名过长"
+    return None
 
-def _resolve_swap_conflicts(src_list: List[str], new_name_list: List[str]) -> (List[str], List[Dict]):
+def _scan_folder(folder: str) -> Tuple[Set[str], Set[str]]:
     """
-    处理文件交换式冲突 (A→B 且 B→A)
-    返回处理后的新文件名列表和冲突信息
+    用 os.scandir 读取一次文件夹，返回 (全部名称, 文件的名称)，都经过 normcase
+    目录项自带类型，判断是否为文件不需要逐个 stat；文件夹不存在或不可读时返回空集合
     """
-    swap_conflicts = []
-    temp_suffix = ".tmp_rename"
-    processed = set()
-    
-    # 先检查是否存在交换冲突
-    for i in range(len(src_list)):
-        if i in processed:
-            continue
-            
-        src_file = os.path.basename(src_list[i])
-        target_name = new_name_list[i]
-        
-        # 查找是否有文件以当前目标名为源文件，并以当前源文件名为目标
-        for j in range(len(src_list)):
-            if i == j or j in processed:
-                continue
-                
-            other_src = os.path.basename(src_list[j])
-            other_target = new_name_list[j]
-            
-            if other_src == target_name and other_target == src_file:
-                swap_conflicts.append((i, j))
-                processed.add(i)
-                processed.add(j)
-                break
-    
-    # 处理交换冲突
-    conflict_info = []
+    names, files = set(), set()
+    try:
+        with os.scandir(folder or '.') as entries:
+            for entry in entries:
+                name = os.path.normcase(entry.name)
+                names.add(name)
+                try:
+                    if entry.is_file():
+                        files.add(name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return names, files
+
+def _resolve_name_conflicts(src_list: List[str], new_name_list: List[str], folder_keys: List[str],
+                            folder_names: Dict[str, Set[str]]) -> Tuple[List[str], List[Dict]]:
+    """
+    处理目标名称冲突：不同文件重命名后名称相同，或目标名称已被批次外的文件占用（本批会移走的文件不算占用）
+    冲突的文件名依次添加 _2、_3 ... 后缀，跳过已被占用的名称
+
+    :param folder_keys: 每个文件所在文件夹的键
+    :param folder_names: 文件夹的键 -> 其中已有文件名的键 (normcase)，用于判断批次外的文件
+    :return: 处理后的新文件名列表和冲突信息
+    """
+    src_keys = [(folder_key, os.path.normcase(os.path.basename(src))) for folder_key, src in zip(folder_keys, src_list)]
+    moving = {src_key for src_key, name in zip(src_keys, new_name_list) if os.path.normcase(name) != src_key[1]}
+    # 不需要改名的文件留在原处，先占用其名称
+    claimed = set(src_keys) - moving
+
+    def occupied(key: NameKey) -> bool:
+        if key in claimed:
+            return True
+        return key[1] in folder_names[key[0]] and key not in moving
+
     resolved_names = new_name_list.copy()
-    
-    for i, j in swap_conflicts:
-        src_i = src_list[i]
-        src_j = src_list[j]
-        target_i = new_name_list[i]
-        target_j = new_name_list[j]
-        
-        # 创建临时文件名
-        temp_i = f"{target_i}{temp_suffix}"
-        temp_j = f"{target_j}{temp_suffix}"
-        
-        # 更新临时文件名
-        resolved_names[i] = temp_i
-        resolved_names[j] = temp_j
-        
-        # 记录冲突信息
-        conflict_entry = {
-            "conflict_type": "file_swap",
-            "original_files": [os.path.basename(src_i), os.path.basename(src_j)],
-            "original_targets": [target_i, target_j],
-            "temporary_names": [temp_i, temp_j],
-            "final_targets": [target_i, target_j]
-        }
-        conflict_info.append(conflict_entry)
-        print(f"交换冲突处理: 文件 {os.path.basename(src_i)} 与 {os.path.basename(src_j)} 将互换名称，已使用临时文件处理")
-    
-    return resolved_names, conflict_info
+    collisions: Dict[NameKey, Dict] = {}  # 原目标的键 -> 冲突信息
+    next_suffix: Dict[NameKey, int] = {}
+    first_of: Dict[NameKey, int] = {}  # 原目标的键 -> 最先使用该名称的文件
+    for idx, (src, name) in enumerate(zip(src_list, new_name_list)):
+        if src_keys[idx] not in moving:
+            continue
+        folder_key = folder_keys[idx]
+        key = (folder_key, os.path.normcase(name))
+        if occupied(key):
+            base, ext = _split_name(name)
+            suffix = next_suffix.get(key, 2)
+            while occupied((folder_key, os.path.normcase(f"{base}_{suffix}{ext}"))):
+                suffix += 1
+            next_suffix[key] = suffix + 1
+            resolved_names[idx] = f"{base}_{suffix}{ext}"
+
+            conflict = collisions.get(key)
+            if conflict is None:
+                first = first_of.get(key)
+                if first is None:
+                    # 目标名称被批次外的文件占用
+                    conflict = {
+                        "conflict_type": "existing_file",
+                        "original_files": [],
+                        "original_target": name,
+                        "resolved_names": [],
+                    }
+                else:
+                    conflict = {
+                        "conflict_type": "name_collision",
+                        "original_files": [os.path.basename(src_list[first])],
+                        "original_target": name,
+                        "resolved_names": [resolved_names[first]],
+                    }
+                collisions[key] = conflict
+            conflict["original_files"].append(os.path.basename(src))
+            conflict["resolved_names"].append(resolved_names[idx])
+            claimed.add((folder_key, os.path.normcase(resolved_names[idx])))
+        else:
+            first_of[key] = idx
+            claimed.add(key)
+
+    for conflict in collisions.values():
+        if conflict["conflict_type"] == "existing_file":
+            print(f"命名冲突处理: {conflict['original_target']} 已被其他文件占用，已添加后缀处理")
+        else:
+            print(f"命名冲突处理: 文件 {', '.join(conflict['original_files'])} 重命名后将相同，已添加后缀处理")
+    return resolved_names, list(collisions.values())
+
+def plan_renames(src_list: List[str], new_name_list: List[str]) -> Dict:
+    """
+    生成批量重命名的执行步骤，不修改任何文件（预览和正式执行使用同一份计划）
+
+    每个涉及的文件夹只用 os.scandir 读取一次，原文件是否存在、目标是否被占用都查内存中的名称集合，不逐个 stat；
+    原文件不存在、新文件名不能使用、文件夹不可写的文件预先判定为失败，留在原处。
+    每个文件重命名为同一文件夹中的新文件名。目标名称互不相同时，“源 -> 目标” 构成的图中每个文件最多一条出边和一条入边，
+    只可能是链（A→B→C，C 的目标空闲）或环（A→B→C→A）：链从空闲的一端倒序执行，每个环只借用一个临时名称，
+    总步数 = 需要改名的文件数 + 环的个数。建图和排序都用字典索引，耗时与文件数成正比。
+
+    :return: {"steps": [(序号, 原路径, 新路径)] 按执行顺序, "destinations": 每个文件的最终路径,
+              "temporary": 序号 -> 临时路径, "failed": 序号 -> 预计失败的原因, "conflicts": 冲突信息}
+    """
+    # 每个文件夹只计算一次键、读一次目录，后续判断名称是否被占用都查集合
+    folders = [os.path.dirname(src) for src in src_list]
+    key_of_folder: Dict[str, str] = {}
+    folder_names: Dict[str, Set[str]] = {}
+    folder_files: Dict[str, Set[str]] = {}
+    writable: Dict[str, bool] = {}
+    for folder in folders:
+        if folder not in key_of_folder:
+            folder_key = key_of_folder[folder] = _path_key(folder)
+            if folder_key not in folder_names:
+                folder_names[folder_key], folder_files[folder_key] = _scan_folder(folder)
+                writable[folder_key] = os.access(folder or '.', os.W_OK)
+    folder_keys = [key_of_folder[folder] for folder in folders]
 
-def _finalize_swap_files(src_list: List[str], original_new_names: List[str], swap_conflicts: List[Dict]):
-    """完成交换冲突文件的最终重命名"""
-    for conflict in swap_conflicts:
-        if conflict["conflict_type"] != "file_swap":
+    # 预计失败的文件保持原名，其名称仍被占用
+    failed: Dict[int, str] = {}
+    planned_names = new_name_list.copy()
+    for idx, (src, name) in enumerate(zip(src_list, new_name_list)):
+        folder_key = folder_keys[idx]
+        src_name = os.path.basename(src)
+        # 名称集合中没有时再确认一次（如 macOS 上大小写不同的路径）
+        if os.path.normcase(src_name) not in folder_files[folder_key] and not os.path.isfile(src):
+            failed[idx] = MISSING_REASON
+        elif name == src_name:
             continue
-            
-        # 找到对应的源文件索引
-        indices = []
-        for file in conflict["original_files"]:
-            for i, src in enumerate(src_list):
-                if os.path.basename(src) == file:
-                    indices.append(i)
-                    break
-        
-        if len(indices) != 2:
+        else:
+            reason = _invalid_name_reason(name)
+            if reason is None and not writable[folder_key]:
+                reason = "没有文件夹的写入权限"
+            if reason is None:
+                continue
+            failed[idx] = reason
+        planned_names[idx] = src_name
+
+    resolved_names, conflicts = _resolve_name_conflicts(src_list, planned_names, folder_keys, folder_names)
+    destinations = [os.path.join(folder, name) for folder, name in zip(folders, resolved_names)]
+
+    # 需要改名的文件；目标与原路径只有大小写不同时也直接改名
+    moves = [i for i in range(len(src_list)) if destinations[i] != src_list[i]]
+    source_of = {(folder_keys[i], os.path.normcase(os.path.basename(src_list[i]))): i for i in moves}
+    # waiting[j] = i 表示 i 的目标是 j 的原路径，j 移走后 i 才能执行
+    waiting: Dict[int, int] = {}
+    blocked = set()
+    for i in moves:
+        j = source_of.get((folder_keys[i], os.path.normcase(resolved_names[i])))
+        if j is not None and j != i:
+            waiting[j] = i
+            blocked.add(i)
+
+    steps: List[RenameStep] = []
+    temporary: Dict[int, str] = {}
+    done = set()
+
+    def follow(i: int):
+        """i 已执行，依次执行等待它腾出位置的文件"""
+        while i in waiting and waiting[i] not in done:
+            i = waiting[i]
+            steps.append((i, src_list[i], destinations[i]))
+            done.add(i)
+
+    # 链：从目标空闲的文件开始
+    for i in moves:
+        if i not in blocked:
+            steps.append((i, src_list[i], destinations[i]))
+            done.add(i)
+            follow(i)
+
+    # 剩下的都在环上：环上任选一个文件先改为临时名，其余沿环执行，最后把临时名改为目标名
+    for i in moves:
+        if i in done:
             continue
-            
-        i, j = indices
-        src_i = src_list[i]
-        src_j = src_list[j]
-        
-        # 获取临时文件路径
-        folder_i = os.path.dirname(src_i)
-        folder_j = os.path.dirname(src_j)
-        
-        temp_i_path = os.path.join(folder_i, conflict["temporary_names"][0])
-        temp_j_path = os.path.join(folder_j, conflict["temporary_names"][1])
-        
-        # 最终重命名
-        final_i_path = os.path.join(folder_i, conflict["final_targets"][0])
-        final_j_path = os.path.join(folder_j, conflict["final_targets"][1])
-        
-        os.rename(temp_i_path, final_i_path)
-        os.rename(temp_j_path, final_j_path)
-        
-        print(f"完成交换: {temp_i_path} -> {final_i_path}")
-        print(f"完成交换: {temp_j_path} -> {final_j_path}")
-
-def batch_rename(src_list: List[str], new_name_list: List[str]) -> str:
+        names = folder_names[folder_keys[i]]
+        base = resolved_names[i] + TEMP_SUFFIX
+        temp_name, n = base, 1
+        while os.path.normcase(temp_name) in names:
+            n += 1
+            temp_name = f"{base}{n}"
+        names.add(os.path.normcase(temp_name))
+        temporary[i] = os.path.join(folders[i], temp_name)
+
+        steps.append((i, src_list[i], temporary[i]))
+        done.add(i)
+        cycle = [i]
+        j = i
+        while waiting[j] != i:
+            j = waiting[j]
+            steps.append((j, src_list[j], destinations[j]))
+            done.add(j)
+            cycle.append(j)
+        steps.append((i, temporary[i], destinations[i]))
+
+        conflicts.append({
+            "conflict_type": "file_swap" if len(cycle) == 2 else "rename_cycle",
+            "original_files": [os.path.basename(src_list[k]) for k in cycle],
+            "original_targets": [resolved_names[k] for k in cycle],
+            "temporary_names": [temp_name],
+            "final_targets": [resolved_names[k] for k in cycle],
+        })
+        kind = ('交换', '互换') if len(cycle) == 2 else ('轮换', '轮换')
+        print(f"{kind[0]}冲突处理: 文件 {', '.join(os.path.basename(src_list[k]) for k in cycle)} 将{kind[1]}名称，已使用临时文件处理")
+
+    return {"steps": steps, "destinations": destinations, "temporary": temporary, "failed": failed, "conflicts": conflicts}
+
+def execute_plan(plan: Dict, batch=None) -> Dict[int, str]:
+    """
+    按 plan_renames 的步骤执行重命名
+
+    某一步失败时原文件还在原处，等待该位置的后续步骤跳过，避免覆盖。
+
+    :param batch: 重命名日志 (RenameJournal.begin 的返回值)，每一步执行后记录，全部执行后提交；
+                  记录日志时已无法读取的文件 (batch.skipped) 不移动，记为失败
+    :return: 失败的文件序号 -> 原因（包括规划时预计失败的文件）
+    """
+    occupied = set()
+    failed = dict(plan["failed"])
+    if batch is not None:
+        failed.update(batch.skipped)
+    for seq, (idx, src, dst) in enumerate(plan["steps"]):
+        if idx in failed:
+            # 已失败的文件不再移动，可能仍占着这一步的原位置，以此为目标的后续步骤跳过
+            occupied.add(_path_key(src))
+        elif _path_key(dst) in occupied:
+            failed[idx] = f"目标 {os.path.basename(dst)} 仍被未能重命名的文件占用"
+            occupied.add(_path_key(src))
+        else:
+            try:
+                os.rename(src, dst)
+            except Exception as e:
+                failed[idx] = f"重命名失败: {str(e)}"
+                occupied.add(_path_key(src))
+        if batch is not None:
+            if idx in failed:
+                batch.failed(seq, failed[idx])
+            else:
+                batch.done(seq)
+    if batch is not None:
+        batch.commit()
+    return failed
+
+def _plan_result(src_list: List[str], plan: Dict, failed: Dict[int, str], report: RenameReport) -> RenameReport:
+    """按执行结果填写报告"""
+    report.conflicts.extend(plan["conflicts"])
+    temporary = plan["temporary"]
+    destinations = plan["destinations"]
+    renamed_files = report.renamed_files
+    for idx, src in enumerate(src_list):
+        if idx in failed:
+            temp = temporary.get(idx)
+            # 环上的文件可能停留在临时名称
+            reason = failed[idx] + (f"，文件暂存为 {temp}" if temp and os.path.exists(temp) else "")
+            report.failed_files.append((src, reason))
+        else:
+            renamed_files.append((src, temporary.get(idx), destinations[idx]))
+    return report
+
+def _execute_journaled(src_list: List[str], plan: Dict, journal, report: RenameReport, **begin_options) -> RenameReport:
+    """
+    先写入重命名日志再执行计划；日志文件夹无法创建或写入时不写日志照常执行，原因记在 report.journal_error
+
+    :param begin_options: 传给 RenameJournal.begin 的 kind、undo_of
+    """
+    batch = None
+    if journal is not None and plan["steps"]:
+        try:
+            batch = journal.begin(src_list, plan, **begin_options)
+        except OSError as e:
+            report.journal_error = f"写入重命名日志失败: {str(e)}"
+    failed = execute_plan(plan, batch)
+    if batch is not None and batch.error is not None:
+        report.journal_error = batch.error
+    return _plan_result(src_list, plan, failed, report)
+
+def batch_rename(src_list: List[str], new_name_list: List[str], journal=None, dry_run: bool = False) -> RenameReport:
     """
-    批量重命名文件，处理命名冲突和交换场景
+    批量重命名文件，处理命名冲突、与已有文件重名以及交换、轮换（A→B→C→A）的场景
     
     :param src_list: 原文件路径列表
     :param new_name_list: 新文件名列表
-    :return: JSON字符串，包含重命名结果和冲突信息
+    :param journal: 重命名日志 (utils.rename_journal.RenameJournal)，执行前写入全部步骤，
+                    中途退出时下次启动可以恢复原名，完成后可以撤销
+    :param dry_run: 只预览，返回预计的结果（冲突、添加的后缀、失败的文件和最终名称），不修改任何文件
+    :return: 重命名结果和冲突信息
     """
-    result = {
-        "success": True,
-        "total_files": len(src_list),
-        "renamed_files": [],
-        "failed_files": [],
-        "conflicts": []
-    }
-    
     # 基本检查
     if len(src_list) != len(new_name_list):
-        result["success"] = False
-        result["error"] = "源文件列表和新文件名列表长度不一致！"
-        return json.dumps(result, ensure_ascii=False, indent=2)
-    
-    # 检查文件是否存在
-    for src in src_list:
-        if not os.path.isfile(src):
-            result["success"] = False
-            result["failed_files"].append({
-                "source": src,
-                "reason": "文件不存在"
-            })
-    
-    if result["failed_files"]:
-        return json.dumps(result, ensure_ascii=False, indent=2)
-    
-    # 处理命名冲突（不同文件重命名后名称相同）
-    resolved_names, name_conflicts = _resolve_name_conflicts(src_list, new_name_list)
-    result["conflicts"].extend(name_conflicts)
-    
-    # 处理交换冲突（A→B 且 B→A）
-    resolved_names, swap_conflicts = _resolve_swap_conflicts(src_list, resolved_names)
-    result["conflicts"].extend(swap_conflicts)
-    
-    # 执行第一次重命名（处理普通文件和交换冲突的临时文件）
-    for src, new_name in zip(src_list, resolved_names):
-        try:
-            folder = os.path.dirname(src)
-            dst = os.path.join(folder, new_name)
-            os.rename(src, dst)
-            
-            result["renamed_files"].append({
-                "source": src,
-                "temporary_destination": dst if any(
-                    c["conflict_type"] == "file_swap" and os.path.basename(src) in c["original_files"] 
-                    for c in swap_conflicts
-                ) else None,
-                "final_destination": dst if not any(
-                    c["conflict_type"] == "file_swap" and os.path.basename(src) in c["original_files"]
-                    for c in swap_conflicts
-                ) else None
-            })
-        except Exception as e:
-            result["success"] = False
-            result["failed_files"].append({
-                "source": src,
-                "reason": f"重命名失败: {str(e)}"
-            })
-    
-    # 完成交换冲突文件的最终重命名
-    if swap_conflicts:
-        _finalize_swap_files(src_list, new_name_list, swap_conflicts)
-        
-        # 更新结果中的最终目标路径
-        for conflict in swap_conflicts:
-            for i, file in enumerate(conflict["original_files"]):
-                for item in result["renamed_files"]:
-                    if os.path.basename(item["source"]) == file:
-                        item["final_destination"] = os.path.join(
-                            os.path.dirname(item["source"]), 
-                            conflict["final_targets"][i]
-                        )
-                        break
-    
-    return json.dumps(result, ensure_ascii=False, indent=2)
+        return RenameReport(len(src_list), error="源文件列表和新文件名列表长度不一致！", dry_run=dry_run)
+
+    report = RenameReport(len(src_list), dry_run=dry_run)
+    plan = plan_renames(src_list, new_name_list)
+    # 有原文件不存在时整批都不执行（导入的文件已被移走或改名）
+    missing = [src for idx, src in enumerate(src_list) if plan["failed"].get(idx) == MISSING_REASON]
+    if missing:
+        report.failed_files.extend((src, MISSING_REASON) for src in missing)
+        return report
+
+    if dry_run:
+        return _plan_result(src_list, plan, plan["failed"], report)
+    return _execute_journaled(src_list, plan, journal, report)
 
-def format_rename_message(result_json: str) -> str:
+def build_invoice_file_name(category: str, invoice_info: Dict, extension: str = '.pdf') -> str:
     """
-    将批量重命名的JSON结果转换为前端展示的说明文本
+    按 “类别 价税合计 开票月日” 生成发票文件名，如 “餐票 100.00 0907.pdf”
+
+    :param invoice_info: extract_invoice_info 的结果，缺少价税合计或开票日期时抛出 KeyError
+    """
+    return category + ' ' + invoice_info['价税合计']['小写'] + ' ' + invoice_info['开票日期'].replace('-', '')[4:8] + extension
+
+def format_rename_message(report: RenameReport) -> str:
+    """
+    将批量重命名的结果转换为前端展示的说明文本
     
-    :param result_json: 批量重命名函数返回的JSON字符串
+    :param report: batch_rename 的返回值
     :return: 格式化后的说明文本
     """
-    try:
-        result = json.loads(result_json)
-    except json.JSONDecodeError:
-        return "处理结果解析失败，请重试"
-    
     messages = []
-    total = result.get("total_files", 0)
-    success_count = len(result.get("renamed_files", []))
-    failed_count = len(result.get("failed_files", []))
+    total = report.total_files
+    success_count = len(report.renamed_files)
+    failed_count = len(report.failed_files)
     
     # 总体处理情况
-    if result.get("success", False):
+    if report.error is not None:
+        messages.append(f"批量重命名失败：{report.error}")
+    elif report.dry_run:
+        if report.success:
+            messages.append(f"重命名预览：共{total}个文件，预计全部成功。")
+        else:
+            messages.append(f"重命名预览：共{total}个文件，预计成功{success_count}个，失败{failed_count}个。")
+    elif report.success:
         messages.append(f"批量重命名完成！共处理{total}个文件，全部成功。")
     else:
         messages.append(f"批量重命名已完成，但存在问题：共处理{total}个文件，成功{success_count}个，失败{failed_count}个。")
+    if report.journal_error is not None:
+        messages.append(f"注意：{report.journal_error}，本批没有完整记录到重命名日志，可能无法撤销。")
     
     # 冲突处理说明
-    conflicts = result.get("conflicts", [])
+    conflicts = report.conflicts
     if conflicts:
         messages.append("\n【冲突处理详情】")
         for i, conflict in enumerate(conflicts, 1):
@@ -270,31 +476,35 @@ def format_rename_message(result_json: str) -> str:
                 resolved = ", ".join(conflict["resolved_names"])
                 messages.append(f"{i}. 命名冲突：文件 {original_files} 按规则将重命名为相同的 {original_target}，已自动处理为：{resolved}")
             
+            elif conflict["conflict_type"] == "existing_file":
+                original_files = ", ".join(conflict["original_files"])
+                resolved = ", ".join(conflict["resolved_names"])
+                messages.append(f"{i}. 命名冲突：{conflict['original_target']} 已被其他文件占用，文件 {original_files} 已自动处理为：{resolved}")
+
             elif conflict["conflict_type"] == "file_swap":
                 original_files = ", ".join(conflict["original_files"])
                 final_targets = ", ".join(conflict["final_targets"])
                 messages.append(f"{i}. 文件交换：文件 {original_files} 需要互换名称，已通过临时文件安全处理，最终命名为：{final_targets}")
+
+            elif conflict["conflict_type"] == "rename_cycle":
+                original_files = ", ".join(conflict["original_files"])
+                final_targets = ", ".join(conflict["final_targets"])
+                messages.append(f"{i}. 文件轮换：文件 {original_files} 的名称首尾相接，已通过一个临时文件安全处理，最终命名为：{final_targets}")
     
     # 失败文件说明
-    failed_files = result.get("failed_files", [])
-    if failed_files:
+    if report.failed_files:
         messages.append("\n【处理失败文件】")
-        for i, file in enumerate(failed_files, 1):
-            messages.append(f"{i}. {file['source']}：{file['reason']}")
+        for i, (source, reason) in enumerate(report.failed_files, 1):
+            messages.append(f"{i}. {source}：{reason}")
     
     # 成功文件摘要
-    if success_count > 0 and (conflicts or failed_files):  # 只有存在问题时才显示成功摘要
-        messages.append("\n【成功重命名文件】")
+    if success_count > 0 and (conflicts or report.failed_files):  # 只有存在问题时才显示成功摘要
+        messages.append("\n【预计重命名文件】" if report.dry_run else "\n【成功重命名文件】")
         # 只显示前3个成功文件，避免信息过长
-        shown = 0
-        for file in result["renamed_files"]:
-            if shown >= 3:
-                remaining = len(result["renamed_files"]) - 3
-                messages.append(f"还有{remaining}个文件成功重命名...")
-                break
-            dest = file["final_destination"] or file["temporary_destination"]
-            messages.append(f"{os.path.basename(file['source'])} → {os.path.basename(dest)}")
-            shown += 1
+        for source, temp, final in report.renamed_files[:3]:
+            messages.append(f"{os.path.basename(source)} → {os.path.basename(final or temp)}")
+        if success_count > 3:
+            messages.append(f"还有{success_count - 3}个文件成功重命名...")
     
     return "\n".join(messages)
 
@@ -312,4 +522,4 @@ if __name__ == "__main__":
         "new3.pdf"
     ]
 
-    print(batch_rename(src_files, new_names))
+    print(batch_rename(src_files, new_names).to_json())
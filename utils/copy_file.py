@@ -1,10 +1,12 @@
 import shutil
 import os
 
+from utils.file_buffer import read_file_buffer
+
 def copy_file(src_list, dst_folder):
     """
     批量复制文件到目标文件夹
-    若已经存在则覆盖
+    若已经存在则覆盖，已读入内存的文件直接写出，不再重复读取源文件
     :param src_list: 源文件路径列表 (list[str])
     :param dst_folder: 目标文件夹路径 (str)
     """
@@ -16,7 +18,13 @@ def copy_file(src_list, dst_folder):
             try:
                 filename = os.path.basename(src)
                 dst_path = os.path.join(dst_folder, filename)
-                shutil.copy2(src, dst_path)
+                data = read_file_buffer(src)
+                if data is not None:
+                    with open(dst_path, 'wb') as f:
+                        f.write(data)
+                    shutil.copystat(src, dst_path)
+                else:
+                    shutil.copy2(src, dst_path)
                 print(f"已复制: {src} -> {dst_path}")
             except Exception as e:
                 print(f"复制失败: {src} -> {dst_path} {e}")
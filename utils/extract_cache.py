@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+
+from utils.user_data import get_user_data_dir
+
+CACHE_FILE_NAME = 'extract_cache.sqlite3'
+
+def hash_file(file_path: str, data: Optional[bytes] = None) -> str:
+    """计算文件内容的 SHA-256，已读入内存时直接使用 data"""
+    if data is not None:
+        return hashlib.sha256(data).hexdigest()
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+class ExtractCache:
+    """
+    发票提取结果的磁盘缓存 (SQLite)
+
+    以文件内容哈希（附带影响结果的提取参数）+ 提取器版本为键，同一份PDF无论路径如何变化都能命中；
+    提取器版本变化后旧结果在打开时统一清除；总大小超过上限时按最近最少使用淘汰。
+    对象可以被 pickle 传递给进程池，数据库连接在各进程中按需打开。
+    """
+
+    def __init__(self, version: str, db_path: Optional[str] = None, max_bytes: int = 64 * 1024 * 1024):
+        """
+        :param version: 提取器版本（指纹），与缓存中记录不一致的结果视为失效
+        :param db_path: 缓存数据库路径，默认放在用户数据目录
+        :param max_bytes: 缓存结果总大小上限（字节）
+        """
+        self.version = version
+        self.db_path = db_path or os.path.join(get_user_data_dir(), CACHE_FILE_NAME)
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # 连接和锁不能跨进程传递
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            # 多个工作进程可能同时读写，使用 WAL 并等待锁
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS extract_cache ('
+                'cache_key TEXT PRIMARY KEY, '
+                'version TEXT NOT NULL, '
+                'info TEXT NOT NULL, '
+                'size INTEGER NOT NULL, '
+                'last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_extract_cache_access ON extract_cache (last_access)')
+            # 提取器版本变化后旧结果全部失效
+            conn.execute('DELETE FROM extract_cache WHERE version != ?', (self.version,))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """查询缓存，命中时刷新访问时间"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT info FROM extract_cache WHERE cache_key = ? AND version = ?',
+                (cache_key, self.version)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE extract_cache SET last_access = ? WHERE cache_key = ?', (time.time(), cache_key))
+            conn.commit()
+            return json.loads(row[0])
+
+    def put(self, cache_key: str, info: Dict[str, Any]):
+        """写入缓存，超出大小上限时淘汰最久未访问的结果"""
+        data = json.dumps(info, ensure_ascii=False)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO extract_cache (cache_key, version, info, size, last_access) VALUES (?, ?, ?, ?, ?)',
+                (cache_key, self.version, data, len(data.encode('utf-8')), time.time())
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM extract_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for cache_key, size in conn.execute('SELECT cache_key, size FROM extract_cache ORDER BY last_access'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((cache_key,))
+            total -= size
+        conn.executemany('DELETE FROM extract_cache WHERE cache_key = ?', evicted)
+
+    def clear(self) -> int:
+        """清空缓存，返回清除的条目数"""
+        with self._lock:
+            conn = self._connect()
+            count = conn.execute('DELETE FROM extract_cache').rowcount
+            conn.commit()
+            conn.execute('VACUUM')
+            return count
+
+    def stats(self) -> Dict[str, int]:
+        """缓存条目数和总大小"""
+        with self._lock:
+            conn = self._connect()
+            count, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extract_cache').fetchone()
+            return {"count": count, "size": size}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,85 @@
+import os
+import json
+import base64
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+
+from utils.file_buffer import read_file_buffer
+
+def _read_file(pdf_path: str) -> bytes:
+    """读取要上传的文件，超过缓冲池大小限制或缓冲失败时直接读取，读取失败时抛出 OSError"""
+    data = read_file_buffer(pdf_path)
+    if data is None:
+        with open(pdf_path, 'rb') as f:
+            data = f.read()
+    return data
+
+class RemoteExtractor:
+    """
+    提取服务 (cli.py serve) 的客户端，接口与 utils.pdf.iter_extract 相同
+
+    文件按批上传，每批的结果按完成顺序流式返回；服务与客户端能访问同一个文件夹时可以只发送路径。
+    """
+
+    def __init__(self, url: str, token: str = '', timeout: float = 60, batch_size: int = 64, upload: bool = True):
+        """
+        :param url: 服务地址，如 http://127.0.0.1:8765
+        :param token: 服务设置的访问令牌
+        :param timeout: 连接和等待每个结果的超时 (秒)
+        :param batch_size: 每个请求包含的文件数
+        :param upload: 上传文件内容；False 时只发送路径，由服务按路径读取
+        """
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self.batch_size = max(1, batch_size)
+        self.upload = upload
+
+    def _request(self, path: str, body: Optional[bytes] = None):
+        # urllib.request 连同 http.client、ssl 导入约需 30ms，未使用提取服务时不拖慢窗口显示
+        import urllib.request
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        request = urllib.request.Request(self.url + path, data=body, headers=headers, method='POST' if body is not None else 'GET')
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def health(self) -> Dict[str, Any]:
+        """服务状态，服务不可用时抛出 OSError"""
+        with self._request('/health') as response:
+            return json.load(response)
+
+    def iter_extract(self, pdf_paths: List[str], fields=None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        在服务上批量提取，按完成顺序产出结果；服务不可用时抛出 OSError，
+        无法读取的文件不上传，直接产出带 error 的结果
+
+        :param fields: 只提取这些字段，可以是 FIELD_PROFILES 中的名称或字段名元组，None 表示使用服务的配置
+        :return: (输入中的序号, {"file_path", "info", "error"}) 的迭代器
+        """
+        pdf_paths = list(pdf_paths)
+        for start in range(0, len(pdf_paths), self.batch_size):
+            request = {"fields": list(fields) if isinstance(fields, tuple) else fields}
+            # 请求中的序号 -> 输入中的序号，读取失败的文件不发送
+            sent = []
+            if self.upload:
+                request["files"] = []
+                for index in range(start, min(start + self.batch_size, len(pdf_paths))):
+                    try:
+                        data = _read_file(pdf_paths[index])
+                    except OSError as e:
+                        yield index, {"file_path": pdf_paths[index], "info": None, "error": f"处理PDF时发生错误: {e}"}
+                        continue
+                    sent.append(index)
+                    request["files"].append({"name": os.path.basename(pdf_paths[index]), "data": base64.b64encode(data).decode('ascii')})
+                if not sent:
+                    continue
+            else:
+                sent = list(range(start, min(start + self.batch_size, len(pdf_paths))))
+                request["paths"] = [os.path.abspath(pdf_paths[index]) for index in sent]
+            with self._request('/extract', json.dumps(request, ensure_ascii=False).encode('utf-8')) as response:
+                for line in response:
+                    result = json.loads(line)
+                    index = sent[result.pop("index")]
+                    # 结果中的路径换回本机路径
+                    result["file_path"] = pdf_paths[index]
+                    yield index, result
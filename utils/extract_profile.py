@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, Any, Optional, List
+
+from utils.user_data import get_user_data_dir
+
+PROFILE_FILE_NAME = 'extract_profile.json'
+
+class ExtractProfile:
+    """
+    发票提取的性能统计
+
+    - timings: 阶段名 -> [调用次数, 总耗时(秒)]，阶段包括 缓存、文本提取 以及 FIELD_EXTRACTORS 中的各字段
+    - pattern_hits: 字段名 -> 各条匹配规则（按 FIELD_PATTERNS 中的顺序）命中的次数
+    - pattern_misses: 字段名 -> 所有规则都没有匹配的次数
+
+    每次记录只是一次 perf_counter 和几次字典累加，可以在正式使用时一直开启。
+    工作进程中各自记录，结果以 to_dict() 的形式随提取结果返回，在主进程中 merge。
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = {}
+        self.pattern_hits: Dict[str, List[int]] = {}
+        self.pattern_misses: Dict[str, int] = {}
+        self.files = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def add_time(self, stage: str, seconds: float):
+        """记录一个阶段的耗时"""
+        timing = self.timings.get(stage)
+        if timing is None:
+            timing = self.timings[stage] = [0, 0.0]
+        timing[0] += 1
+        timing[1] += seconds
+
+    def add_match(self, field: str, index: Optional[int]):
+        """记录字段命中的规则序号，None 表示所有规则都没有匹配"""
+        if index is None:
+            self.pattern_misses[field] = self.pattern_misses.get(field, 0) + 1
+            return
+        hits = self.pattern_hits.get(field)
+        if hits is None:
+            hits = self.pattern_hits[field] = []
+        if len(hits) <= index:
+            hits.extend([0] * (index + 1 - len(hits)))
+        hits[index] += 1
+
+    def merge(self, other: Dict[str, Any]):
+        """合并另一份统计（to_dict() 的结果），用于汇总工作进程的记录"""
+        with self._lock:
+            self.files += other.get('files', 0)
+            for stage, (count, seconds) in other.get('timings', {}).items():
+                timing = self.timings.setdefault(stage, [0, 0.0])
+                timing[0] += count
+                timing[1] += seconds
+            for field, other_hits in other.get('pattern_hits', {}).items():
+                hits = self.pattern_hits.setdefault(field, [])
+                if len(hits) < len(other_hits):
+                    hits.extend([0] * (len(other_hits) - len(hits)))
+                for index, count in enumerate(other_hits):
+                    hits[index] += count
+            for field, count in other.get('pattern_misses', {}).items():
+                self.pattern_misses[field] = self.pattern_misses.get(field, 0) + count
+
+    def reset(self):
+        with self._lock:
+            self.timings.clear()
+            self.pattern_hits.clear()
+            self.pattern_misses.clear()
+            self.files = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """原始计数，可以 pickle 或 merge"""
+        with self._lock:
+            return {
+                'files': self.files,
+                'timings': {stage: list(timing) for stage, timing in self.timings.items()},
+                'pattern_hits': {field: list(hits) for field, hits in self.pattern_hits.items()},
+                'pattern_misses': dict(self.pattern_misses),
+            }
+
+    def summary(self, patterns: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+        """
+        便于阅读的汇总：各阶段按总耗时从高到低排列，
+        各字段给出每条规则的命中次数和命中率，从未命中的规则可以考虑删除，命中多的规则可以往前排
+
+        :param patterns: 字段名 -> 规则文本列表，提供时补齐从未命中的规则并附上规则文本
+        """
+        data = self.to_dict()
+        timings = {
+            stage: {'count': count, 'total_ms': seconds * 1000, 'avg_ms': seconds * 1000 / count if count else 0.0}
+            for stage, (count, seconds) in sorted(data['timings'].items(), key=lambda item: item[1][1], reverse=True)
+        }
+        fields = {}
+        for field in sorted(set(data['pattern_hits']) | set(data['pattern_misses']) | set(patterns or ())):
+            hits = data['pattern_hits'].get(field, [])
+            if patterns and field in patterns:
+                hits = hits + [0] * (len(patterns[field]) - len(hits))
+            misses = data['pattern_misses'].get(field, 0)
+            total = sum(hits) + misses
+            fields[field] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': [count / total if total else 0.0 for count in hits],
+            }
+            if patterns and field in patterns:
+                fields[field]['patterns'] = patterns[field]
+        return {'files': data['files'], 'timings': timings, 'patterns': fields}
+
+    def dump(self, path: Optional[str] = None, patterns: Optional[Dict[str, List[str]]] = None, **extra) -> str:
+        """
+        把汇总写入 JSON 文件，返回文件路径
+
+        :param path: 默认写入用户数据目录下的 extract_profile.json
+        :param patterns: 见 summary()
+        :param extra: 一并写入的附加信息，例如提取器指纹（规则序号只在同一指纹下有意义）
+        """
+        path = path or os.path.join(get_user_data_dir(), PROFILE_FILE_NAME)
+        report = dict(extra)
+        report['time'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        report.update(self.summary(patterns))
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return path
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import base64
+import binascii
+import threading
+from functools import partial
+from urllib.parse import unquote
+from concurrent.futures.process import BrokenProcessPool
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+
+from utils.pdf import (create_extract_pool, iter_pool_extract, resolve_fields, _extract_invoice_info_worker,
+                       _memory_worker_limit, EXTRACTOR_FINGERPRINT)
+from utils.pdf_backend import preload_backend
+from utils.invoice_xml import STRUCTURED_EXTENSIONS
+
+# 服务接受的文件类型
+SERVICE_EXTENSIONS = ('.pdf',) + STRUCTURED_EXTENSIONS
+
+class ExtractService:
+    """
+    常驻的提取进程池，多个请求共用
+
+    工作进程启动时即导入PDF库，之后一直保留，每个请求不必再启动进程和导入（每批约 1 秒）；
+    提取结果缓存也在各请求、各用户之间共用，同一份发票只解析一次。
+    """
+
+    def __init__(self, workers: int = 0, worker_memory_mb: Optional[int] = None,
+                 max_tasks_per_child: Optional[int] = None, **options):
+        """
+        :param workers: 进程数，0 表示使用全部CPU核心
+        :param worker_memory_mb: 每个工作进程预留的内存，进程数不超过 可用内存 / 该值
+        :param max_tasks_per_child: 每个工作进程处理多少个文件后重启
+        :param options: 传给 extract_invoice_info 的参数 (cache, required_fields, max_pages, backend, fields,
+                        layout, max_text_chars, structured)
+        """
+        workers = workers if workers and workers > 0 else os.cpu_count() or 1
+        memory_limit = _memory_worker_limit(worker_memory_mb)
+        if memory_limit is not None and memory_limit < workers:
+            print(f"可用内存只够启动 {memory_limit} 个工作进程")
+            workers = memory_limit
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.options = options
+        self.backend = options.get('backend', 'pdfplumber')
+        self._executor = None
+        self._lock = threading.Lock()
+        self.start()
+
+    def start(self):
+        """启动进程池并等待全部工作进程导入PDF库"""
+        with self._lock:
+            self._executor = create_extract_pool(self.workers, self.max_tasks_per_child,
+                                                 initializer=preload_backend, initargs=(self.backend,))
+            executor = self._executor
+        # 进程池按需启动进程，提交与进程数相同的任务使其全部启动
+        for future in [executor.submit(preload_backend, self.backend) for _ in range(self.workers)]:
+            future.result()
+
+    def _restart(self, broken):
+        """工作进程异常退出后进程池不能再使用，重新创建（多个请求同时发现时只重建一次）"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            print("提取进程池已损坏，重新启动")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = create_extract_pool(self.workers, self.max_tasks_per_child,
+                                                 initializer=preload_backend, initargs=(self.backend,))
+
+    def iter_extract(self, items: List[Tuple[str, Optional[bytes]]],
+                     fields=None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        提取一批文件，按完成顺序产出结果
+
+        :param items: (文件路径, 文件内容) 列表，文件内容为 None 时工作进程按路径读取；
+                      上传的文件内容不查找同名的 XML/OFD（路径是客户端上的路径）
+        :param fields: 覆盖服务的 fields 参数
+        :return: (输入中的序号, {"file_path", "info", "error"}) 的迭代器
+        """
+        options = dict(self.options)
+        if fields is not None:
+            options['fields'] = fields
+        uploaded = [index for index, (_, data) in enumerate(items) if data is not None]
+        by_path = [index for index, (_, data) in enumerate(items) if data is None]
+        groups = [
+            (uploaded, partial(_extract_invoice_info_worker, **dict(options, structured=False))),
+            (by_path, partial(_extract_invoice_info_worker, **options)),
+        ]
+        for indices, worker in groups:
+            done = set()
+            for _ in range(2):
+                executor = self._executor
+                tasks = ((index, items[index][0], items[index][1]) for index in indices if index not in done)
+                try:
+                    for index, result in iter_pool_extract(executor, tasks, self.workers * 2, worker, raise_broken=True):
+                        done.add(index)
+                        yield index, result
+                    break
+                except BrokenProcessPool:
+                    self._restart(executor)
+            for index in indices:
+                if index not in done:
+                    yield index, {"file_path": items[index][0], "info": None, "error": "处理PDF时发生错误: 提取进程池不可用"}
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+class ExtractRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health   服务状态
+    POST /extract  批量提取，结果按完成顺序以 NDJSON 分块流式返回，每行 {"index", "file_path", "info", "error"}
+        请求体为 JSON: {"paths": [服务端可读取的路径], "files": [{"name", "data": base64}], "fields": 可选}
+        （序号先 paths 后 files），或单个文件的原始内容: Content-Type: application/pdf，文件名放在 X-File-Name（URL 编码）
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'InvoiceExtract/1'
+
+    def log_message(self, format, *args):
+        if self.server.log_requests:
+            print(f"[extract_service] {self.address_string()} {format % args}")
+
+    def send_json(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def authorized(self) -> bool:
+        token = self.server.token
+        if token and self.headers.get('Authorization') != f'Bearer {token}':
+            self.send_json(401, {"error": "未授权"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        if self.path != '/health':
+            self.send_json(404, {"error": f"未知的路径: {self.path}"})
+            return
+        service = self.server.service
+        self.send_json(200, {
+            "status": "ok",
+            "workers": service.workers,
+            "backend": service.backend,
+            "extractor": EXTRACTOR_FINGERPRINT,
+            "allow_paths": self.server.allow_paths,
+        })
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        if self.path != '/extract':
+            self.send_json(404, {"error": f"未知的路径: {self.path}"})
+            return
+        try:
+            items, fields = self.read_request()
+        except ValueError as e:
+            # 请求体可能没有读完，不再复用连接
+            self.close_connection = True
+            self.send_json(400, {"error": str(e)})
+            return
+
+        start = time.perf_counter()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        results = self.server.service.iter_extract(items, fields)
+        try:
+            for index, result in results:
+                line = json.dumps(dict(result, index=index), ensure_ascii=False).encode('utf-8') + b'\n'
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端断开时取消其余任务
+            self.close_connection = True
+        finally:
+            results.close()
+        if self.server.log_requests:
+            print(f"[extract_service] {len(items)} files in {time.perf_counter() - start:.2f}s")
+
+    def read_request(self) -> Tuple[List[Tuple[str, Optional[bytes]]], Optional[Tuple[str, ...]]]:
+        """解析请求体，返回 ([(文件路径, 文件内容)], fields)，请求无效时抛出 ValueError"""
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            raise ValueError("缺少 Content-Length")
+        if length > self.server.max_request_bytes:
+            raise ValueError(f"请求体超过 {self.server.max_request_bytes // (1024 * 1024)}MB")
+        body = self.rfile.read(length)
+
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+        if content_type != 'application/json':
+            name = unquote(self.headers.get('X-File-Name', 'upload.pdf'))
+            return [(self.check_name(name), body)], None
+
+        try:
+            request = json.loads(body)
+            fields = request.get('fields')
+            fields = resolve_fields(tuple(fields) if isinstance(fields, list) else fields)
+            paths = [str(path) for path in request.get('paths', [])]
+            files = [(str(item['name']), base64.b64decode(item['data'], validate=True)) for item in request.get('files', [])]
+        except (json.JSONDecodeError, AttributeError, KeyError, TypeError, binascii.Error) as e:
+            raise ValueError(f"请求格式错误: {e}")
+        if paths and not self.server.allow_paths:
+            raise ValueError("服务未开启按路径读取文件，请上传文件内容")
+        return [(self.check_name(path), None) for path in paths] + [(self.check_name(name), data) for name, data in files], fields
+
+    @staticmethod
+    def check_name(name: str) -> str:
+        if os.path.splitext(name)[1].lower() not in SERVICE_EXTENSIONS:
+            raise ValueError(f"不支持的文件类型: {name}")
+        return name
+
+class ExtractServer(ThreadingHTTPServer):
+    """提取服务的 HTTP 服务器，每个连接一个线程，所有请求共用同一个 ExtractService"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: ExtractService, token: str = '',
+                 max_request_bytes: int = 256 * 1024 * 1024, allow_paths: bool = True, log_requests: bool = True):
+        """
+        :param token: 非空时请求需要带上 Authorization: Bearer <token>
+        :param max_request_bytes: 请求体大小上限
+        :param allow_paths: 是否允许按服务端路径读取文件，不允许时只能上传文件内容
+        :param log_requests: 打印每个请求
+        """
+        super().__init__(address, ExtractRequestHandler)
+        self.service = service
+        self.token = token
+        self.max_request_bytes = max_request_bytes
+        self.allow_paths = allow_paths
+        self.log_requests = log_requests
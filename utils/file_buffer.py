@@ -0,0 +1,96 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+class FileBufferPool:
+    """
+    文件内容缓冲池
+
+    每个文件在一次会话中只从磁盘（或网络共享）读取一次，读入的 bytes 由哈希、提取、预览和导出共用。
+    文件大小、修改时间变化后重新读取；超过单文件上限的文件不缓冲，调用方直接使用文件路径；
+    总大小超过上限时按最近最少使用释放。
+    """
+
+    def __init__(self, max_file_bytes: int = 32 * 1024 * 1024, max_total_bytes: int = 256 * 1024 * 1024):
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self._buffers = OrderedDict()  # 路径 -> ((大小, 修改时间), bytes)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def set_limits(self, max_file_bytes: int, max_total_bytes: int):
+        """调整上限，超出新上限的缓冲立即释放"""
+        with self._lock:
+            self.max_file_bytes = max_file_bytes
+            self.max_total_bytes = max_total_bytes
+            for file_path in [p for p, (_, data) in self._buffers.items() if len(data) > max_file_bytes]:
+                self._remove(file_path)
+            self._evict()
+
+    def get(self, file_path: str) -> Optional[bytes]:
+        """
+        获取文件内容，文件超过单文件上限时返回 None
+        文件不存在或无法读取时抛出 OSError
+        """
+        stat = os.stat(file_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        key = os.path.abspath(file_path)
+
+        with self._lock:
+            entry = self._buffers.get(key)
+            if entry is not None and entry[0] == signature:
+                self._buffers.move_to_end(key)
+                return entry[1]
+
+        if stat.st_size > self.max_file_bytes:
+            return None
+
+        with open(file_path, 'rb') as f:
+            data = f.read()
+
+        with self._lock:
+            if key in self._buffers:
+                self._remove(key)
+            self._buffers[key] = (signature, data)
+            self._total_bytes += len(data)
+            self._evict()
+        return data
+
+    def release(self, file_path: str):
+        """释放指定文件的缓冲"""
+        with self._lock:
+            key = os.path.abspath(file_path)
+            if key in self._buffers:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._buffers.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Tuple[int, int]:
+        """缓冲的文件数和总字节数"""
+        with self._lock:
+            return len(self._buffers), self._total_bytes
+
+    def _remove(self, key: str):
+        _, data = self._buffers.pop(key)
+        self._total_bytes -= len(data)
+
+    def _evict(self):
+        # 至少保留最近使用的一个文件
+        while self._total_bytes > self.max_total_bytes and len(self._buffers) > 1:
+            _, (_, data) = self._buffers.popitem(last=False)
+            self._total_bytes -= len(data)
+
+# 进程内共享的缓冲池
+FILE_BUFFERS = FileBufferPool()
+
+def read_file_buffer(file_path: str) -> Optional[bytes]:
+    """从共享缓冲池获取文件内容，无法缓冲时返回 None，由调用方回退到按路径读取"""
+    try:
+        return FILE_BUFFERS.get(file_path)
+    except OSError as e:
+        print(f"读取文件失败: {file_path} {e}")
+        return None
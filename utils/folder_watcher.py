@@ -0,0 +1,234 @@
+import os
+import sys
+import time
+import struct
+import select
+import threading
+from typing import Dict, List, Optional, Tuple, Iterator, Sequence
+
+# inotify 事件，见 <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+# 文件签名 (大小, 修改时间 ns)，签名不变的文件不会再次产出
+Signature = Tuple[int, int]
+
+class _Inotify:
+    """Linux inotify 的最小封装（ctypes 调用 libc），只监视一个文件夹，不含子文件夹"""
+
+    def __init__(self, folder: str):
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f'inotify_init1 失败: {os.strerror(errno)}')
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), _WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch 失败: {os.strerror(errno)}')
+
+    def read(self, timeout: float) -> Tuple[List[str], bool]:
+        """
+        等待最多 timeout 秒，返回 (发生变化的文件名, 是否丢失了事件)
+        内核事件队列溢出时丢失事件，调用方需要重新扫描整个文件夹
+        """
+        readable, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not readable:
+            return [], False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+        names, overflow = [], False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            if mask & _IN_Q_OVERFLOW:
+                overflow = True
+            if length:
+                names.append(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+            offset += length
+        return names, overflow
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class FolderWatcher:
+    """
+    监视文件夹中新增或修改的文件
+
+    Linux 上使用 inotify，其他平台或 inotify 不可用时定时扫描文件夹。
+    同步盘等程序会分多次写入文件，文件的大小和修改时间在 debounce_seconds 内不再变化才视为写完；
+    每个文件以 (大小, 修改时间) 为签名，只有签名变化的文件才会再次产出，未改动的文件不会重复解析。
+    """
+
+    def __init__(self, folder: str, extensions: Sequence[str] = ('.pdf',),
+                 debounce_seconds: float = 2.0, poll_interval: float = 1.0,
+                 include_existing: bool = True, force_polling: bool = False):
+        """
+        :param folder: 监视的文件夹，不含子文件夹
+        :param extensions: 只关注这些扩展名（小写）的文件
+        :param debounce_seconds: 文件在这么长时间内没有变化才视为写完
+        :param poll_interval: 轮询模式下扫描文件夹的间隔
+        :param include_existing: 开始监视时文件夹中已有的文件也会产出
+        :param force_polling: 不使用 inotify
+        """
+        self.folder = os.path.abspath(folder)
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self._pending: Dict[str, Tuple[Signature, float]] = {}  # 路径 -> (最近的签名, 最近变化的时间)
+        self._processed: Dict[str, Signature] = {}  # 路径 -> 产出时的签名
+        self._lock = threading.Lock()
+        self._inotify = None
+        if not force_polling and sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify(self.folder)
+            except (OSError, AttributeError) as e:
+                print(f"inotify 不可用，改为轮询: {e}")
+        self.mode = 'inotify' if self._inotify is not None else 'polling'
+        if include_existing:
+            self._scan()
+        else:
+            self._processed.update(self._snapshot())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _matches(self, name: str) -> bool:
+        return not name.startswith(('.', '~$')) and os.path.splitext(name)[1].lower() in self.extensions
+
+    def _snapshot(self) -> Dict[str, Signature]:
+        """文件夹中所有关注的文件及其签名"""
+        files = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if self._matches(entry.name):
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        pass
+        return files
+
+    def _touch(self, path: str, signature: Optional[Signature], now: float):
+        """记录文件的变化，签名与上次产出时相同的文件不再关注"""
+        with self._lock:
+            if signature is None:
+                # 文件已删除或移走，再次出现时视为新文件
+                self._pending.pop(path, None)
+                self._processed.pop(path, None)
+            elif self._processed.get(path) == signature:
+                self._pending.pop(path, None)
+            else:
+                pending = self._pending.get(path)
+                if pending is None or pending[0] != signature:
+                    self._pending[path] = (signature, now)
+
+    def _scan(self):
+        now = time.monotonic()
+        snapshot = self._snapshot()
+        for path in set(self._pending) | set(self._processed):
+            if path not in snapshot:
+                self._touch(path, None, now)
+        for path, signature in snapshot.items():
+            self._touch(path, signature, now)
+
+    def ignore(self, paths: Sequence[str]):
+        """把这些文件的当前状态记为已处理，例如本程序重命名产生的文件；可以在其他线程中调用"""
+        with self._lock:
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                path = os.path.abspath(path)
+                self._processed[path] = (stat.st_size, stat.st_mtime_ns)
+                self._pending.pop(path, None)
+
+    def poll(self, timeout: float = 1.0) -> List[str]:
+        """
+        等待最多 timeout 秒，返回已经写完且签名发生变化的文件路径（按路径排序）
+        """
+        now = time.monotonic()
+        with self._lock:
+            # 有待定的文件时只等到最早的一个满足防抖时间
+            waits = [changed_at + self.debounce_seconds - now for _, changed_at in self._pending.values()]
+        if waits:
+            timeout = min(timeout, max(0.05, min(waits)))
+
+        if self._inotify is not None:
+            names, overflow = self._inotify.read(timeout)
+            if overflow:
+                self._scan()
+            now = time.monotonic()
+            for name in set(names):
+                if not self._matches(name):
+                    continue
+                path = os.path.join(self.folder, name)
+                try:
+                    stat = os.stat(path)
+                    self._touch(path, (stat.st_size, stat.st_mtime_ns), now)
+                except OSError:
+                    self._touch(path, None, now)
+        else:
+            time.sleep(min(timeout, self.poll_interval))
+            self._scan()
+
+        return self._collect_ready(time.monotonic())
+
+    def _collect_ready(self, now: float) -> List[str]:
+        """待定时间超过防抖时间的文件再确认一次签名，没有变化即为写完"""
+        ready = []
+        with self._lock:
+            due = [(path, signature) for path, (signature, changed_at) in self._pending.items()
+                   if now - changed_at >= self.debounce_seconds]
+        for path, signature in due:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._touch(path, None, now)
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            with self._lock:
+                if current != signature:
+                    self._pending[path] = (current, now)
+                elif current[0] == 0:
+                    # 刚创建还没有写入内容：重新计时，再等一个防抖时间，
+                    # 否则一直为空的文件（如同步软件留下的占位文件）会让 poll 不停地轮询
+                    self._pending[path] = (current, now)
+                else:
+                    self._pending.pop(path, None)
+                    self._processed[path] = current
+                    ready.append(path)
+        return sorted(ready)
+
+    def watch(self, stop_event: Optional[threading.Event] = None, timeout: float = 1.0) -> Iterator[List[str]]:
+        """持续监视，每有一批文件写完就产出一次，stop_event 被设置后结束"""
+        while stop_event is None or not stop_event.is_set():
+            ready = self.poll(timeout)
+            if ready:
+                yield ready
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,105 @@
+import re
+from bisect import bisect_right
+from typing import Dict, Any, Optional, List, Tuple, Sequence
+
+# 分类用到的发票字段 -> 权重：项目名称最能说明买的是什么，销售方名称和服务类型作为补充；
+# 铁路电子客票没有项目明细和销售方，靠发票类型识别
+CLASSIFY_FIELDS: Dict[str, int] = {
+    "项目明细": 3,
+    "发票类型": 3,
+    "服务类型": 2,
+    "销售方信息": 1,
+}
+
+# 拼接各段文本的分隔符，关键字中不会出现
+_SEPARATOR = "\n"
+
+class KeywordClassifier:
+    """
+    按关键字把发票归入报销类别
+
+    所有类别的关键字编译成一个正则多选分支，长关键字排在前面优先匹配（如 “铁路旅客运输” 先于 “运输”），
+    每张发票的项目名称、服务类型、销售方名称只扫描一遍。各类别按命中关键字的字段权重累加得分，
+    得分最高的类别即预测结果，置信度为其得分占全部得分的比例。
+    """
+
+    def __init__(self, keywords: Dict[str, Sequence[str]]):
+        """
+        :param keywords: 类别 -> 关键字列表，同一关键字不能属于多个类别
+        """
+        self.categories = list(keywords)
+        self._category_of: Dict[str, str] = {}
+        for category, words in keywords.items():
+            for word in words:
+                if not word:
+                    continue
+                if self._category_of.get(word, category) != category:
+                    raise ValueError(f"关键字 “{word}” 同时属于 {self._category_of[word]} 和 {category}")
+                self._category_of[word] = category
+        words = sorted(self._category_of, key=len, reverse=True)
+        self._pattern = re.compile('|'.join(map(re.escape, words))) if words else None
+
+    def classify(self, invoice_info: Dict[str, Any]) -> Tuple[Optional[str], float]:
+        """
+        预测单张发票的类别
+
+        :param invoice_info: extract_invoice_info 的结果，至少包含 CLASSIFY_FIELDS 中的部分字段
+        :return: (类别, 置信度 0~1)，没有命中任何关键字时为 (None, 0.0)
+        """
+        return self.classify_batch([invoice_info])[0]
+
+    def classify_batch(self, invoice_infos: Sequence[Optional[Dict[str, Any]]]) -> List[Tuple[Optional[str], float]]:
+        """
+        批量预测类别：所有发票的文本拼接后只调用一次 finditer，按匹配位置找回所属的发票和字段
+
+        :param invoice_infos: extract_invoice_info 的结果列表，提取失败的项为 None
+        :return: 与输入一一对应的 (类别, 置信度)
+        """
+        results: List[Tuple[Optional[str], float]] = [(None, 0.0)] * len(invoice_infos)
+        if self._pattern is None:
+            return results
+
+        # 每段文本的起始位置 -> (发票序号, 权重)
+        parts, starts, owners = [], [], []
+        offset = 0
+        for index, info in enumerate(invoice_infos):
+            for field, weight in CLASSIFY_FIELDS.items():
+                text = _field_text(info, field) if info else ''
+                if not text:
+                    continue
+                parts.append(text)
+                starts.append(offset)
+                owners.append((index, weight))
+                offset += len(text) + len(_SEPARATOR)
+        if not parts:
+            return results
+
+        scores: List[Dict[str, int]] = [{} for _ in invoice_infos]
+        seen = set()
+        for match in self._pattern.finditer(_SEPARATOR.join(parts)):
+            part = bisect_right(starts, match.start()) - 1
+            # 同一段文本中重复出现的关键字只计一次
+            if (part, match.group()) in seen:
+                continue
+            seen.add((part, match.group()))
+            index, weight = owners[part]
+            category = self._category_of[match.group()]
+            scores[index][category] = scores[index].get(category, 0) + weight
+
+        for index, score in enumerate(scores):
+            if score:
+                # 得分相同时取类别表中靠前的类别
+                category = max(score, key=lambda name: (score[name], -self.categories.index(name)))
+                results[index] = (category, score[category] / sum(score.values()))
+        return results
+
+def _field_text(info: Dict[str, Any], field: str) -> str:
+    """取出参与分类的字段文本，多个项目名称以分隔符连接"""
+    value = info.get(field)
+    if not value or value == '#':
+        return ''
+    if field == "项目明细":
+        return _SEPARATOR.join(item.get("项目名称", '') for item in value)
+    if field == "销售方信息":
+        return value.get("名称", '')
+    return value
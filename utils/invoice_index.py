@@ -0,0 +1,170 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, Iterable, List
+
+from utils.user_data import get_user_data_dir
+
+INDEX_FILE_NAME = 'invoice_index.sqlite3'
+
+# 一条 IN 查询中的参数个数上限，SQLite 默认最多 999 个参数
+_LOOKUP_CHUNK = 500
+
+# 提取不到字段时的占位值（与 utils.pdf 的 '#' 一致），不能作为发票号码记录或查询
+_MISSING_NUMBERS = ('', '#')
+
+def _valid_number(number) -> bool:
+    return isinstance(number, str) and number.strip() not in _MISSING_NUMBERS
+
+class InvoiceIndex:
+    """
+    历史发票索引 (SQLite)
+
+    记录所有重命名或导出过的发票，以发票号码为主键（B 树索引，查询为 O(log n)），
+    用于在导入时发现几个月前已经报销过的发票。每条记录保存文件内容哈希、金额、开票日期和导出路径。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        :param db_path: 索引数据库路径，默认放在用户数据目录
+        """
+        self.db_path = db_path or os.path.join(get_user_data_dir(), INDEX_FILE_NAME)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS invoices ('
+                'invoice_number TEXT PRIMARY KEY, '
+                'file_hash TEXT, '
+                'amount TEXT, '
+                'invoice_date TEXT, '
+                'export_path TEXT, '
+                'recorded_at REAL NOT NULL)'
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, invoice_numbers: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量查询发票号码，空号码和未提取到的占位值 '#' 忽略
+
+        :return: 已记录的发票号码 -> 记录 {"invoice_number", "file_hash", "amount", "invoice_date", "export_path", "recorded_at"}
+        """
+        numbers = list({number for number in invoice_numbers if _valid_number(number)})
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(numbers), _LOOKUP_CHUNK):
+                chunk = numbers[start:start + _LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f'SELECT * FROM invoices WHERE invoice_number IN ({",".join("?" * len(chunk))})',
+                    chunk
+                )
+                for row in rows:
+                    found[row['invoice_number']] = dict(row)
+        return found
+
+    def record(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """
+        记录重命名或导出的发票，同一发票号码再次记录时更新为最新的文件和路径
+
+        :param entries: [{"invoice_number", "file_hash", "amount", "invoice_date", "export_path"}]，没有发票号码（含占位值 '#'）的条目忽略，
+                        导出路径保存为绝对路径（与重命名日志一致，撤销时按路径找回记录）
+        :return: 写入的条目数
+        """
+        now = time.time()
+        rows = [
+            (entry['invoice_number'], entry.get('file_hash'), entry.get('amount'),
+             entry.get('invoice_date'), os.path.abspath(entry['export_path']) if entry.get('export_path') else None, now)
+            for entry in entries if _valid_number(entry.get('invoice_number'))
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            # 一个事务写入整批
+            with conn:
+                conn.executemany(
+                    'INSERT INTO invoices (invoice_number, file_hash, amount, invoice_date, export_path, recorded_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(invoice_number) DO UPDATE SET '
+                    'file_hash = excluded.file_hash, amount = excluded.amount, invoice_date = excluded.invoice_date, '
+                    'export_path = excluded.export_path, recorded_at = excluded.recorded_at',
+                    rows
+                )
+        return len(rows)
+
+    def lookup_exported(self, export_paths: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        按导出路径查询，撤销重命名后用来找到这些文件的记录
+
+        :return: 发票号码 -> 记录，格式同 lookup
+        """
+        paths = list({os.path.abspath(path) for path in export_paths if path})
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(paths), _LOOKUP_CHUNK):
+                chunk = paths[start:start + _LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f'SELECT * FROM invoices WHERE export_path IN ({",".join("?" * len(chunk))})',
+                    chunk
+                )
+                for row in rows:
+                    found[row['invoice_number']] = dict(row)
+        return found
+
+    def remove_exported(self, export_paths: Iterable[str]) -> List[str]:
+        """
+        删除导出到这些路径的发票记录（撤销重命名后文件已改回原名，这些发票没有报销），返回删除的发票号码
+        """
+        numbers = list(self.lookup_exported(export_paths))
+        if numbers:
+            self.remove(numbers)
+        return numbers
+
+    def remove(self, invoice_numbers: Iterable[str]) -> int:
+        """删除记录，返回删除的条目数"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                count = conn.executemany(
+                    'DELETE FROM invoices WHERE invoice_number = ?',
+                    [(number,) for number in invoice_numbers]
+                ).rowcount
+        return count
+
+    def count(self) -> int:
+        """已记录的发票数"""
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM invoices').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def format_history_duplicates(duplicates: Dict[str, Dict[str, Any]], file_names: Dict[str, str]) -> str:
+    """
+    把历史重复的发票整理成提示文本
+
+    :param duplicates: lookup 的结果
+    :param file_names: 发票号码 -> 本次导入的文件名
+    """
+    lines = []
+    for number, record in duplicates.items():
+        recorded_at = time.strftime('%Y-%m-%d', time.localtime(record['recorded_at']))
+        lines.append(f"{file_names.get(number, '')}")
+        lines.append(f"  {number}，{record.get('amount') or '?'} 元，开票日期 {record.get('invoice_date') or '?'}")
+        lines.append(f"  {recorded_at} 已导出为 {record.get('export_path') or '?'}")
+    return '\n'.join(lines)
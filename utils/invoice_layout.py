@@ -0,0 +1,64 @@
+from typing import Dict, Any, Optional, Tuple
+
+# 版面模板：固定版式的发票中各字段所在的区域
+# - page_size: 第一页的尺寸 (宽, 高)，单位 pt，尺寸不符时不使用该模板
+# - regions: 区域名 -> (x0, y0, x1, y1)，以页面宽高的比例表示，原点在左上角；区域适当留有余量
+# - fields: 字段名 (FIELD_EXTRACTORS 中的键) -> 所在区域名
+# 区域内的文本仍交给 utils/pdf.py 中的提取函数，规则都要求带上 “发票号码”、“（小写）” 等标签，
+# 裁剪到错误的位置只会提取不到，不会得到错误的值
+LAYOUT_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    # 全电发票，210mm x 140mm
+    "全电发票": {
+        "page_size": (595.0, 397.0),
+        "regions": {
+            "标题": (0.25, 0.0, 0.75, 0.16),
+            "票头": (0.60, 0.0, 1.0, 0.22),
+            "价税合计": (0.0, 0.65, 1.0, 0.75),
+            "开票人": (0.0, 0.86, 0.6, 1.0),
+        },
+        "fields": {
+            "发票类型": "标题",
+            "发票号码": "票头",
+            "开票日期": "票头",
+            "价税合计": "价税合计",
+            "开票人": "开票人",
+        },
+    },
+}
+
+def find_template(fields: Tuple[str, ...]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    查找能覆盖全部字段的版面模板
+
+    :return: (模板名, 模板)，没有合适的模板时返回 None
+    """
+    for name, template in LAYOUT_TEMPLATES.items():
+        if all(field in template["fields"] for field in fields):
+            return name, template
+    return None
+
+# 发票版式 -> 识别关键字，按优先级排列，文本开头出现多个版式的关键字时取排在前面的版式
+# 网约车等客运服务开在普通发票上，靠项目名称中的 “运输服务”、“客运” 识别
+INVOICE_LAYOUTS: Dict[str, Tuple[str, ...]] = {
+    "铁路电子客票": ("铁路电子客票", "电子客票号"),
+    "机动车销售统一发票": ("机动车销售统一发票",),
+    "旅客运输": ("旅客运输", "运输服务", "客运", "出行人", "行程单", "didi"),
+    "增值税专用发票": ("专用发票",),
+    "增值税普通发票": (),
+}
+
+# 没有任何关键字时的版式
+DEFAULT_LAYOUT = "增值税普通发票"
+
+# 只在文本开头这么多字符内查找关键字：标题、票头和第一行项目都在第一页的开头
+CLASSIFY_HEAD_CHARS = 1000
+
+def classify_layout(text: str) -> str:
+    """根据文本开头的关键字识别发票版式，返回 INVOICE_LAYOUTS 中的版式名"""
+    # 关键字很少，按优先级逐个 in 查找比合并成一个正则的多选分支更快，找到即返回
+    head = text[:CLASSIFY_HEAD_CHARS]
+    for layout, keywords in INVOICE_LAYOUTS.items():
+        for keyword in keywords:
+            if keyword in head:
+                return layout
+    return DEFAULT_LAYOUT
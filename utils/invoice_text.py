@@ -0,0 +1,71 @@
+from typing import Dict, List, Tuple
+
+# 表头名称 -> 表头行需要同时包含的关键字
+HEADER_KEYWORDS = {
+    "项目明细": ("项目名称", "单价", "数量"),
+    "出行信息": ("出行人", "有效身份证件号"),
+    "备注": ("备注",),
+}
+
+
+def _contains_all(line: str, keywords: Tuple[str, ...]) -> bool:
+    for keyword in keywords:
+        if keyword not in line:
+            return False
+    return True
+
+class ParsedInvoiceText:
+    """
+    预处理后的发票文本，每张发票构建一次，供所有 extract_* 函数共用
+
+    - lines: 按行切分后的文本，只切分一次
+    - header_lines: 表头名称 -> 包含该表头的行号列表（按出现顺序）
+    - anchors: 锚点 -> 在全文中第一次出现的位置，未出现为 -1；首次查询时定位并记录，
+      中文关键字在长文本中查找不到时需要扫描全文，因此不预先定位用不到的锚点
+    - profile: 可选的性能统计 (utils.extract_profile.ExtractProfile)，设置后记录各字段命中的规则序号
+    - layout: 识别出的发票版式 (utils.invoice_layout.INVOICE_LAYOUTS)，未识别时为 None
+    - patterns: 该版式使用的字段匹配规则，None 表示使用通用规则 FIELD_PATTERNS
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lines = text.split('\n')
+        self.anchors: Dict[str, int] = {}
+        self.header_lines: Dict[str, List[int]] = {}
+        self.profile = None
+        self.layout = None
+        self.patterns = None
+
+        # 定位所有表头：用首个关键字在全文中查找候选位置，换算成行号后再检查其余关键字
+        for name, keywords in HEADER_KEYWORDS.items():
+            first, rest = keywords[0], keywords[1:]
+            indexes = []
+            pos = text.find(first)
+            if pos >= 0:
+                self.anchors[first] = pos
+            # 行号从上一个候选位置累加，每段文本只数一次换行
+            index, counted = 0, 0
+            while pos >= 0:
+                index += text.count('\n', counted, pos)
+                counted = pos
+                line = self.lines[index]
+                if _contains_all(line, rest):
+                    indexes.append(index)
+                # 跳到下一行继续查找
+                line_end = text.find('\n', pos)
+                if line_end < 0:
+                    break
+                pos = text.find(first, line_end + 1)
+            self.header_lines[name] = indexes
+
+    def find(self, anchor: str) -> int:
+        """锚点第一次出现的位置，未出现返回 -1，结果会被记录下来"""
+        pos = self.anchors.get(anchor)
+        if pos is None:
+            pos = self.anchors[anchor] = self.text.find(anchor)
+        return pos
+
+    def first_header_line(self, name: str) -> int:
+        """表头第一次出现的行号，未出现返回 -1"""
+        indexes = self.header_lines[name]
+        return indexes[0] if indexes else -1
@@ -0,0 +1,201 @@
+import io
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Any, Optional, Iterator, Tuple, IO
+
+# 全电发票除 PDF 外同时开具的结构化文件，字段直接按标签读取，不需要解析版面和匹配文本
+STRUCTURED_EXTENSIONS = ('.xml', '.ofd')
+
+# 全电发票 XML 的标签 -> (字段名, 子字段名)，子字段为 None 时字段值就是标签文本
+# 字段名与 utils.pdf.FIELD_EXTRACTORS 一致，结果的形状与 extract_invoice_info 相同
+EINVOICE_TAGS: Dict[str, Tuple[str, Optional[str]]] = {
+    "InvoiceNumber": ("发票号码", None),
+    "IssueTime": ("开票日期", None),
+    "BuyerName": ("购买方信息", "名称"),
+    "BuyerIdNum": ("购买方信息", "纳税人识别号"),
+    "SellerName": ("销售方信息", "名称"),
+    "SellerIdNum": ("销售方信息", "纳税人识别号"),
+    "TotalAmWithoutTax": ("金额信息", "合计金额"),
+    "TotalTaxAm": ("税率和税额", "合计税额"),
+    "TotalTax-includedAmount": ("价税合计", "小写"),
+    "TotalTax-includedAmountInChinese": ("价税合计", "大写"),
+    "Drawer": ("开票人", None),
+    "Remark": ("备注", None),
+}
+
+# 项目明细 (IssuItemInformation) 中的标签 -> 明细字段名
+EINVOICE_ITEM_TAGS: Dict[str, str] = {
+    "ItemName": "项目名称",
+    "UnPrice": "单价",
+    "Quantity": "数量",
+    "Amount": "金额",
+    "TaxRate": "税率",
+    "ComTaxAm": "税额",
+}
+
+# OFD 文件 OFD.xml 中 CustomData 的 Name -> (字段名, 子字段名)
+OFD_CUSTOM_DATA: Dict[str, Tuple[str, Optional[str]]] = {
+    "发票号码": ("发票号码", None),
+    "开票日期": ("开票日期", None),
+    "合计金额": ("金额信息", "合计金额"),
+    "合计税额": ("税率和税额", "合计税额"),
+    "购买方名称": ("购买方信息", "名称"),
+    "购买方纳税人识别号": ("购买方信息", "纳税人识别号"),
+    "销售方名称": ("销售方信息", "名称"),
+    "销售方纳税人识别号": ("销售方信息", "纳税人识别号"),
+}
+
+def is_structured_file(file_path: str) -> bool:
+    """是否为 XML/OFD 发票文件"""
+    return os.path.splitext(file_path)[1].lower() in STRUCTURED_EXTENSIONS
+
+def find_structured_sibling(pdf_path: str) -> Optional[str]:
+    """查找与 PDF 同名的 XML/OFD 文件，没有时返回 None"""
+    stem = os.path.splitext(pdf_path)[0]
+    for extension in STRUCTURED_EXTENSIONS:
+        for candidate in (stem + extension, stem + extension.upper()):
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+def has_pdf_sibling(file_path: str) -> bool:
+    """XML/OFD 文件旁边是否有同名的 PDF，有时两者是同一张发票，提取 PDF 时会读取该文件"""
+    stem = os.path.splitext(file_path)[0]
+    return is_structured_file(file_path) and (os.path.isfile(stem + '.pdf') or os.path.isfile(stem + '.PDF'))
+
+def parse_structured_invoice(file_path: str, data: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    """
+    读取 XML/OFD 发票文件，失败时抛出异常
+
+    :param data: 已读入内存的文件内容，None 时按路径读取
+    :return: 与 extract_invoice_info 形状相同的发票信息，文件中没有发票号码时返回 None
+    """
+    source = io.BytesIO(data) if data is not None else file_path
+    if os.path.splitext(file_path)[1].lower() == '.ofd':
+        return parse_invoice_ofd(source)
+    return parse_invoice_xml(source)
+
+def _iter_elements(source) -> Iterator[Tuple[str, ET.Element]]:
+    """流式解析 XML，按结束顺序产出 (去掉命名空间的标签名, 元素)"""
+    for _, element in ET.iterparse(source, events=('end',)):
+        yield element.tag.rsplit('}', 1)[-1], element
+
+def _set_value(info: Dict[str, Any], target: Tuple[str, Optional[str]], text: Optional[str]):
+    text = (text or '').strip()
+    if not text:
+        return
+    field, key = target
+    if key is None:
+        info.setdefault(field, text)
+    else:
+        info.setdefault(field, {}).setdefault(key, text)
+
+def parse_invoice_xml(source) -> Optional[Dict[str, Any]]:
+    """
+    读取全电发票 XML
+
+    边解析边取值，处理过的元素随即清空，文件再大也只保留当前元素
+    :param source: 文件路径或文件对象
+    :return: 发票信息，没有发票号码时返回 None
+    """
+    info: Dict[str, Any] = {}
+    items = []
+    item: Dict[str, str] = {}
+    invoice_type = None
+    for tag, element in _iter_elements(source):
+        if tag in EINVOICE_TAGS:
+            _set_value(info, EINVOICE_TAGS[tag], element.text)
+        elif tag in EINVOICE_ITEM_TAGS:
+            item[EINVOICE_ITEM_TAGS[tag]] = (element.text or '').strip()
+        elif tag == "IssuItemInformation":
+            items.append(item)
+            item = {}
+        elif tag == "LabelName":
+            # 票种标签 <EInvoiceType><LabelName>，其余标签下的 LabelName 不需要，留到父元素结束时判断
+            continue
+        elif tag == "EInvoiceType":
+            for child in element:
+                if child.tag.rsplit('}', 1)[-1] == "LabelName" and child.text:
+                    invoice_type = child.text.strip()
+        elif tag == "RequestTime":
+            # 部分版本没有 IssueTime，以开票请求时间代替
+            _set_value(info, ("请求时间", None), element.text)
+        element.clear()
+
+    if "发票号码" not in info:
+        return None
+    request_time = info.pop("请求时间", None)
+    if "开票日期" not in info and request_time:
+        info["开票日期"] = request_time
+    if "开票日期" in info:
+        info["开票日期"] = _normalize_date(info["开票日期"])
+    if invoice_type:
+        info["发票类型"] = "增值税专用发票" if "专用" in invoice_type else f"电子发票（{invoice_type}）"
+    if items:
+        for entry in items:
+            if "税率" in entry:
+                entry["税率"] = _normalize_tax_rate(entry["税率"])
+        info["项目明细"] = items
+    return info
+
+def parse_invoice_ofd(source) -> Optional[Dict[str, Any]]:
+    """
+    读取 OFD 发票
+
+    全电发票的 OFD 在附件中带有 XML，优先读取；否则读取 OFD.xml 中 CustomData 记录的票面信息
+    :param source: 文件路径或文件对象
+    :return: 发票信息，没有发票号码时返回 None
+    """
+    with zipfile.ZipFile(source) as archive:
+        names = archive.namelist()
+        for name in names:
+            if '/attachs/' in name.lower() and name.lower().endswith('.xml'):
+                with archive.open(name) as f:
+                    info = parse_invoice_xml(f)
+                if info is not None:
+                    return info
+        ofd_name = next((name for name in names if name.lower() == 'ofd.xml'), None)
+        if ofd_name is None:
+            return None
+        with archive.open(ofd_name) as f:
+            return _parse_ofd_custom_data(f)
+
+def _parse_ofd_custom_data(f: IO[bytes]) -> Optional[Dict[str, Any]]:
+    """读取 OFD.xml 中的 <ofd:CustomData Name="发票号码">...</ofd:CustomData>"""
+    info: Dict[str, Any] = {}
+    for tag, element in _iter_elements(f):
+        if tag == "CustomData":
+            target = OFD_CUSTOM_DATA.get(element.get("Name", "").strip())
+            if target is not None:
+                _set_value(info, target, element.text)
+        element.clear()
+
+    if "发票号码" not in info:
+        return None
+    if "开票日期" in info:
+        info["开票日期"] = _normalize_date(info["开票日期"])
+    # 只记录了不含税金额和税额，相加得到价税合计
+    try:
+        amount = Decimal(info["金额信息"]["合计金额"])
+        tax = Decimal(info["税率和税额"]["合计税额"])
+        info["价税合计"] = {"小写": str((amount + tax).quantize(Decimal("0.01")))}
+    except (KeyError, InvalidOperation):
+        pass
+    return info
+
+def _normalize_date(date_str: str) -> str:
+    """“2024年09月07日”、“2024-09-07 10:00:00” 等统一为 “2024-09-07”，与PDF的提取结果一致"""
+    date_str = date_str.strip().split()[0]
+    return date_str.replace('年', '-').replace('月', '-').replace('日', '')
+
+def _normalize_tax_rate(rate: str) -> str:
+    """XML 中的税率为小数 “0.06”，统一为票面上的 “6%”"""
+    try:
+        value = Decimal(rate)
+    except InvalidOperation:
+        return rate
+    if value <= 1:
+        value *= 100
+    return f"{value.normalize():f}%"
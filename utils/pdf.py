@@ -1,288 +1,782 @@
 
 import os
+import sys
 import json
-import pdfplumber
+import hashlib
 import re
-from typing import Dict, Any, Optional, List
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Dict, Any, Optional, List, Iterator, Tuple, Union, Pattern, Match
 
-def extract_invoice_info(pdf_path: str) -> Optional[Dict[str, Any]]:
+from utils.extract_cache import ExtractCache, hash_file
+from utils.pdf_backend import get_backend
+from utils.file_buffer import read_file_buffer
+from utils.invoice_text import ParsedInvoiceText
+from utils.extract_profile import ExtractProfile
+from utils.invoice_layout import find_template, classify_layout, INVOICE_LAYOUTS, CLASSIFY_HEAD_CHARS
+from utils.mem_usage import reset_peak_rss, peak_rss_mb, available_memory_mb
+from utils.invoice_xml import is_structured_file, find_structured_sibling, parse_structured_invoice
+
+def extract_invoice_info(pdf_path: str, cache: Optional[ExtractCache] = None,
+                         required_fields: Optional[Tuple[str, ...]] = None,
+                         max_pages: Optional[int] = None,
+                         backend: str = 'pdfplumber',
+                         profile: Optional[ExtractProfile] = None,
+                         fields: Union[str, Tuple[str, ...], None] = None,
+                         layout: bool = False,
+                         max_text_chars: Optional[int] = None,
+                         structured: bool = False) -> Optional[Dict[str, Any]]:
     """
     从中国PDF发票文件中提取关键信息
+
+    :param pdf_path: PDF文件路径，也可以是全电发票的 XML/OFD 文件
+    :param cache: 提取结果缓存，命中时直接返回缓存的结果
+    :param required_fields: 增量模式，必需字段全部找到后不再读取后续页面，None 表示读取全部页面
+    :param max_pages: 最多读取的页数，None 表示不限制
+    :param backend: PDF文本提取后端，见 utils.pdf_backend.BACKENDS
+    :param profile: 性能统计，记录各阶段耗时和各字段命中的规则序号
+    :param fields: 只提取这些字段，可以是 FIELD_PROFILES 中的名称（如 'rename'）或字段名元组，None 表示全部字段
+    :param layout: 版面模板模式，指定了 fields 且字段都在版面模板中时只读取第一页的对应区域，
+                   任一字段在区域中提取不到时回退到读取全文
+    :param max_text_chars: 读取的文本总长度上限，超出后不再读取后续页面，None 表示不限制
+    :param structured: PDF 旁边有同名的 XML/OFD 文件时直接读取其中的字段，不再解析PDF
     """
     try:
-        # 提取PDF文本内容
-        text_content = extract_text_from_pdf(pdf_path)
-        if not text_content:
-            return None
-        
-        # 提取各项信息
-        invoice_info = {
-            "发票类型": extract_invoice_type(text_content),
-            "发票号码": extract_invoice_number(text_content),
-            "开票日期": extract_invoice_date(text_content),
-            "购买方信息": extract_buyer_info(text_content),
-            "销售方信息": extract_seller_info(text_content),
-            "服务类型": extract_service_type(text_content),
-            "项目明细": extract_item_details(text_content),
-            "金额信息": extract_amount_info(text_content),
-            "税率和税额": extract_tax_info(text_content),
-            "价税合计": extract_total_amount(text_content),
-            "出行信息": extract_travel_info(text_content),
-            "开票人": extract_drawer(text_content),
-            "备注": extract_remarks(text_content)
-        }
-        
-        # 清理空值
-        invoice_info = {k: v for k, v in invoice_info.items() if v is not None and v != {} and v != []}
-        
-        return invoice_info
-        
+        return _extract_invoice_info(pdf_path, cache, required_fields, max_pages, backend,
+                                     data=read_file_buffer(pdf_path), profile=profile, fields=fields, layout=layout,
+                                     max_text_chars=max_text_chars, structured=structured)
     except Exception as e:
         print(f"处理PDF时发生错误: {e}")
         return None
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+def extract_invoice_info_batch(pdf_paths: List[str], workers: Optional[int] = None, **options) -> List[Dict[str, Any]]:
+    """
+    使用进程池批量提取发票信息
+
+    :param pdf_paths: PDF文件路径列表
+    :param workers: 进程数，None 或 0 表示使用全部CPU核心，1 表示在当前进程中逐个处理
+    :param options: 传给 iter_extract 的参数，见 iter_extract
+    :return: 与输入顺序一致的结果列表，每项为 {"file_path", "info", "error"}
+    """
+    pdf_paths = list(pdf_paths)
+    results = [None] * len(pdf_paths)
+    for index, result in iter_extract(pdf_paths, workers, **options):
+        results[index] = result
+    return results
+
+def iter_extract(pdf_paths: List[str], workers: Optional[int] = None,
+                 worker_memory_mb: Optional[int] = None,
+                 max_tasks_per_child: Optional[int] = None,
+                 **options) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    批量提取发票信息，按完成顺序逐个产出结果
+
+    同时在途的任务数有上限，文件边读取边提交，第一批结果不必等全部文件读完即可返回
+
+    :param pdf_paths: PDF文件路径列表
+    :param workers: 进程数，None 或 0 表示使用全部CPU核心，1 表示在当前进程中逐个处理
+    :param worker_memory_mb: 每个工作进程预留的内存 (MB)，进程数不超过 可用内存 / 该值，None 表示不按内存限制
+    :param max_tasks_per_child: 每个工作进程处理多少个文件后退出并重新启动，把解析大文件时占用的内存还给系统，
+                                None 表示不重启 (需要 Python 3.11+)
+    :param options: 传给 extract_invoice_info 的参数
+                    (cache, required_fields, max_pages, backend, profile, fields, layout, max_text_chars, structured)，
+                    以及 track_memory: 为 True 时在结果中附带该文件处理期间的峰值内存 "peak_rss_mb"；
+                    profile 不传给工作进程，各进程的统计随结果返回后在这里合并
+    :return: (输入中的序号, {"file_path", "info", "error"}) 的迭代器
+    """
+    pdf_paths = list(pdf_paths)
+    profile = options.pop('profile', None)
+    if profile is not None:
+        options['profile'] = True
+    if not workers or workers < 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(pdf_paths))
+    memory_limit = _memory_worker_limit(worker_memory_mb)
+    if memory_limit is not None and memory_limit < workers:
+        print(f"可用内存只够启动 {memory_limit} 个工作进程")
+        workers = memory_limit
+
+    # 文件内容在主进程中读入共享缓冲池后传给工作进程，之后的预览和导出不再重复读取
+    worker = partial(_extract_invoice_info_worker, **options)
+    if workers <= 1:
+        for index, pdf_path in enumerate(pdf_paths):
+            yield index, _merge_profile(worker(pdf_path, read_file_buffer(pdf_path)), profile)
+        return
+
+    executor = create_extract_pool(workers, max_tasks_per_child)
+    try:
+        tasks = ((index, pdf_path, read_file_buffer(pdf_path)) for index, pdf_path in enumerate(pdf_paths))
+        for index, result in iter_pool_extract(executor, tasks, workers * 2, worker):
+            yield index, _merge_profile(result, profile)
+    finally:
+        # 调用方提前停止迭代时取消尚未开始的任务
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def create_extract_pool(workers: int, max_tasks_per_child: Optional[int] = None,
+                        initializer=None, initargs: tuple = ()) -> ProcessPoolExecutor:
+    """
+    创建提取用的进程池
+
+    :param max_tasks_per_child: 每个工作进程处理多少个文件后重启，None 表示不重启 (需要 Python 3.11+)
+    :param initializer: 工作进程启动时调用，例如提前导入PDF库
+    """
+    if max_tasks_per_child and sys.version_info >= (3, 11):
+        return ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=max_tasks_per_child,
+                                   initializer=initializer, initargs=initargs)
+    return ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+
+def iter_pool_extract(executor: ProcessPoolExecutor, tasks: Iterator[Tuple[int, str, Optional[bytes]]],
+                      max_pending: int, worker=None, raise_broken: bool = False) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    在进程池中提取，按完成顺序产出结果；tasks 按需读取，已提交未完成的任务不超过 max_pending 个
+
+    :param tasks: (序号, 文件路径, 文件内容或 None) 的迭代器
+    :param worker: 工作进程中执行的函数，默认为不带额外参数的 _extract_invoice_info_worker
+    :param raise_broken: 进程池损坏时抛出 BrokenProcessPool，由调用方重建进程池后重试未完成的任务；
+                         False 时未完成的任务作为失败的结果产出
+    :return: (序号, {"file_path", "info", "error"}) 的迭代器
+    """
+    worker = worker or _extract_invoice_info_worker
+    pending = {}
+    try:
+        while True:
+            # 保持每个进程有任务可做，同时限制已读入但未处理的文件数
+            while len(pending) < max_pending:
+                index, pdf_path, data = next(tasks, (None, None, None))
+                if pdf_path is None:
+                    break
+                pending[executor.submit(worker, pdf_path, data)] = (index, pdf_path)
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, pdf_path = pending.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    if raise_broken:
+                        raise
+                    result = {"file_path": pdf_path, "info": None, "error": "处理PDF时发生错误: 工作进程异常退出"}
+                except Exception as e:
+                    # 工作进程异常退出等情况
+                    result = {"file_path": pdf_path, "info": None, "error": f"处理PDF时发生错误: {e}"}
+                yield index, result
+    finally:
+        # 提前停止迭代时取消尚未开始的任务，进程池由调用方关闭
+        for future in pending:
+            future.cancel()
+
+def _memory_worker_limit(worker_memory_mb: Optional[int]) -> Optional[int]:
+    """按可用内存计算最多能启动的工作进程数，不限制或无法获取可用内存时返回 None"""
+    if not worker_memory_mb:
+        return None
+    available = available_memory_mb()
+    if available is None:
+        return None
+    return max(1, int(available // worker_memory_mb))
+
+def _extract_invoice_info_worker(pdf_path: str, data: Optional[bytes] = None, profile: bool = False,
+                                 track_memory: bool = False, **options) -> Dict[str, Any]:
+    """
+    进程池中执行的单文件提取，异常随结果返回而不是打印
+
+    :param profile: 为 True 时记录本文件的性能统计，以 result["profile"] 返回
+    :param track_memory: 为 True 时以 result["peak_rss_mb"] 返回处理该文件期间进程的峰值内存 (MB)，
+                         只有 Linux 能在每个文件开始前重置峰值，其他平台为进程启动以来的峰值
+    """
+    result = {"file_path": pdf_path, "info": None, "error": None}
+    file_profile = ExtractProfile() if profile else None
+    if track_memory:
+        reset_peak_rss()
+    try:
+        result["info"] = _extract_invoice_info(pdf_path, data=data, profile=file_profile, **options)
+    except Exception as e:
+        result["error"] = f"处理PDF时发生错误: {e}"
+    if track_memory:
+        result["peak_rss_mb"] = peak_rss_mb()
+    if file_profile is not None:
+        result["profile"] = file_profile.to_dict()
+    return result
+
+def _merge_profile(result: Dict[str, Any], profile: Optional[ExtractProfile]) -> Dict[str, Any]:
+    """把工作进程返回的统计合并到调用方的 profile，并从结果中移除"""
+    file_profile = result.pop("profile", None)
+    if profile is not None and file_profile:
+        profile.merge(file_profile)
+    return result
+
+def _extract_invoice_info(pdf_path: str, cache: Optional[ExtractCache] = None,
+                          required_fields: Optional[Tuple[str, ...]] = None,
+                          max_pages: Optional[int] = None,
+                          backend: str = 'pdfplumber',
+                          data: Optional[bytes] = None,
+                          profile: Optional[ExtractProfile] = None,
+                          fields: Union[str, Tuple[str, ...], None] = None,
+                          layout: bool = False,
+                          max_text_chars: Optional[int] = None,
+                          structured: bool = False) -> Dict[str, Any]:
+    """
+    提取单个文件的发票信息，失败时抛出异常
+
+    :param data: 已读入内存的文件内容，None 时按路径读取
+    :param profile: 性能统计，None 时不记录
+    :param fields: 只提取这些字段，未指定 required_fields 时同时作为提前停止读取的条件
+    :param layout: 先尝试按版面模板裁剪区域提取
+    :param max_text_chars: 读取的文本总长度上限，None 表示不限制
+    :param structured: 优先读取与PDF同名的 XML/OFD 文件
+    """
+    fields = resolve_fields(fields)
+    if required_fields is None:
+        required_fields = fields
+    if profile is not None:
+        profile.files += 1
+
+    # XML/OFD 按标签读取，比计算文件哈希查缓存还快，不经过缓存
+    if structured or is_structured_file(pdf_path):
+        start = time.perf_counter()
+        invoice_info = _extract_structured(pdf_path, data, fields)
+        if profile is not None:
+            profile.add_time("结构化文件", time.perf_counter() - start)
+        if invoice_info is not None:
+            return invoice_info
+
+    cache_key = None
+    if cache is not None:
+        start = time.perf_counter()
+        cache_key = _cache_key(hash_file(pdf_path, data), required_fields, max_pages, backend, fields,
+                               layout and fields is not None, max_text_chars)
+        invoice_info = _cache_get(cache, cache_key)
+        if profile is not None:
+            profile.add_time("缓存", time.perf_counter() - start)
+        if invoice_info is not None:
+            return invoice_info
+
+    if layout and fields is not None:
+        start = time.perf_counter()
+        invoice_info = _extract_by_layout(pdf_path, fields, backend, data)
+        if profile is not None:
+            profile.add_time("版面区域", time.perf_counter() - start)
+        if invoice_info is not None:
+            if cache is not None:
+                _cache_put(cache, cache_key, invoice_info)
+            return invoice_info
+
+    # 提取PDF文本内容
+    start = time.perf_counter()
+    text_content = _read_pdf_text(pdf_path, max_pages, required_fields, backend, data, max_text_chars)
+    if profile is not None:
+        profile.add_time("文本提取", time.perf_counter() - start)
+    if not text_content:
+        raise ValueError("未能从PDF中提取到文本")
+
+    invoice_info = extract_invoice_fields(text_content, profile, fields)
+    if cache is not None:
+        _cache_put(cache, cache_key, invoice_info)
+    return invoice_info
+
+def _extract_structured(file_path: str, data: Optional[bytes] = None,
+                        fields: Optional[Tuple[str, ...]] = None) -> Optional[Dict[str, Any]]:
+    """
+    从 XML/OFD 文件读取发票信息
+
+    file_path 本身是 XML/OFD 时读取失败抛出异常；是PDF时查找同名的 XML/OFD，
+    没有或读取失败时返回 None，由调用方解析PDF
+    """
+    if is_structured_file(file_path):
+        invoice_info = parse_structured_invoice(file_path, data)
+        if invoice_info is None:
+            raise ValueError("未能从XML/OFD文件中读取到发票号码")
+    else:
+        sibling_path = find_structured_sibling(file_path)
+        if sibling_path is None:
+            return None
+        try:
+            invoice_info = parse_structured_invoice(sibling_path)
+        except Exception as e:
+            print(f"读取 {sibling_path} 失败，改为解析PDF: {e}")
+            return None
+        if invoice_info is None:
+            return None
+
+    # 按请求的字段输出，文件中没有的字段取提取函数“未找到”时的值，与解析PDF的结果一致
+    invoice_info = {field: invoice_info.get(field, FIELD_DEFAULTS[field]) for field in fields or FIELD_EXTRACTORS}
+    return {k: v for k, v in invoice_info.items() if v is not None and v != {} and v != []}
+
+def _extract_by_layout(pdf_path: str, fields: Tuple[str, ...], backend: str,
+                       data: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    """
+    按版面模板只读取第一页中各字段所在的区域
+
+    没有覆盖全部字段的模板、页面尺寸不符或任一字段在区域中提取不到时返回 None，由调用方回退到读取全文
+    """
+    found = find_template(fields)
+    if found is None:
+        return None
+    _, template = found
+    region_names = {template["fields"][field] for field in fields}
+    regions = {name: template["regions"][name] for name in region_names}
+    texts = get_backend(backend).read_regions(pdf_path, regions, data, template["page_size"])
+    if texts is None:
+        return None
+
+    docs = {name: ParsedInvoiceText(text) for name, text in texts.items()}
+    invoice_info = {}
+    for field in fields:
+        value = FIELD_EXTRACTORS[field](docs[template["fields"][field]])
+        if value in _MISSING_VALUES:
+            return None
+        invoice_info[field] = value
+    return invoice_info
+
+def _cache_key(content_hash: str, required_fields: Optional[Tuple[str, ...]], max_pages: Optional[int], backend: str,
+               fields: Optional[Tuple[str, ...]] = None, layout: bool = False,
+               max_text_chars: Optional[int] = None) -> str:
+    """提前停止读取或只提取部分字段时结果可能不完整、不同后端的文本也可能不同，缓存键需要区分读取方式"""
+    key = f"{content_hash}:{backend}:{','.join(sorted(required_fields or ()))}:{max_pages or 0}"
+    if fields is not None:
+        key += f":{','.join(fields)}"
+    if layout:
+        key += ":layout"
+    if max_text_chars:
+        key += f":max{max_text_chars}"
+    return key
+
+def _cache_get(cache: ExtractCache, cache_key: str) -> Optional[Dict[str, Any]]:
+    """读取缓存，缓存不可用时不影响提取"""
+    try:
+        return cache.get(cache_key)
+    except Exception as e:
+        print(f"读取提取缓存失败: {e}")
+        return None
+
+def _cache_put(cache: ExtractCache, cache_key: str, invoice_info: Dict[str, Any]):
+    """写入缓存，缓存不可用时不影响提取"""
+    try:
+        cache.put(cache_key, invoice_info)
+    except Exception as e:
+        print(f"写入提取缓存失败: {e}")
+
+def extract_invoice_fields(text_content: Union[str, ParsedInvoiceText],
+                           profile: Optional[ExtractProfile] = None,
+                           fields: Union[str, Tuple[str, ...], None] = None) -> Dict[str, Any]:
+    """
+    从发票文本中提取各项信息
+
+    :param profile: 性能统计，记录各提取函数的耗时和命中的规则序号
+    :param fields: 只运行这些字段的提取函数，见 resolve_fields，None 表示全部字段
+    """
+    # 文本只切分、扫描一次，各提取函数共用
+    doc = text_content if isinstance(text_content, ParsedInvoiceText) else ParsedInvoiceText(text_content)
+
+    fields = resolve_fields(fields)
+    if fields is None:
+        fields = tuple(FIELD_EXTRACTORS)
+    
+    # 提取各项信息：先识别版式，只运行该版式相关的提取函数和匹配规则
+    if profile is None:
+        if doc.layout is None:
+            classify_invoice(doc)
+        invoice_info = {field: _run_extractor(field, doc) for field in fields}
+    else:
+        doc.profile = profile
+        if doc.layout is None:
+            start = time.perf_counter()
+            classify_invoice(doc)
+            profile.add_time("版式识别", time.perf_counter() - start)
+        invoice_info = {}
+        for field in fields:
+            if field not in LAYOUT_FIELDS[doc.layout]:
+                invoice_info[field] = FIELD_DEFAULTS[field]
+                continue
+            start = time.perf_counter()
+            invoice_info[field] = FIELD_EXTRACTORS[field](doc)
+            profile.add_time(field, time.perf_counter() - start)
+    
+    # 清理空值
+    invoice_info = {k: v for k, v in invoice_info.items() if v is not None and v != {} and v != []}
+    
+    return invoice_info
+
+def extract_text_from_pdf(pdf_path: str, max_pages: Optional[int] = None,
+                          required_fields: Optional[Tuple[str, ...]] = None,
+                          backend: str = 'pdfplumber') -> str:
     """从PDF文件中提取文本内容"""
-    text_content = ""
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    text_content += text + "\n"
-        return text_content
+        return _read_pdf_text(pdf_path, max_pages, required_fields, backend, read_file_buffer(pdf_path))
     except Exception as e:
         print(f"读取PDF文件失败: {e}")
         return ""
 
-def extract_invoice_type(text: str) -> Optional[str]:
-    """提取发票类型"""
-    patterns = [
+def _read_pdf_text(pdf_path: str, max_pages: Optional[int] = None,
+                   required_fields: Optional[Tuple[str, ...]] = None,
+                   backend: str = 'pdfplumber',
+                   data: Optional[bytes] = None,
+                   max_text_chars: Optional[int] = None) -> str:
+    """
+    逐页读取PDF文本，失败时抛出异常
+
+    :param max_pages: 最多读取的页数，None 表示不限制
+    :param required_fields: 每读完一页就对已读文本提取这些字段，全部找到后不再读取后续页面
+    :param backend: PDF文本提取后端名称
+    :param data: 已读入内存的文件内容，None 时按路径读取
+    :param max_text_chars: 文本总长度上限，超出部分截断并不再读取后续页面，None 表示不限制
+    """
+    text_parts = []
+    text_length = 0
+    page_texts = get_backend(backend).iter_page_texts(pdf_path, max_pages, data)
+    try:
+        for text in page_texts:
+            if not text:
+                continue
+            if max_text_chars and text_length + len(text) + 1 > max_text_chars:
+                # 附带大量扫描页或异常文本的文件，只保留上限以内的部分
+                text_parts.append(text[:max(0, max_text_chars - text_length)])
+                print(f"PDF文本超过 {max_text_chars} 字符，已截断: {pdf_path}")
+                break
+            text_parts.append(text + "\n")
+            text_length += len(text) + 1
+            if required_fields and has_required_fields("".join(text_parts), required_fields):
+                break
+    finally:
+        # 提前结束时关闭生成器，释放打开的文件
+        page_texts.close()
+    return "".join(text_parts)
+
+def _compile_patterns(patterns: List[Any]) -> List[Tuple[Optional[str], Pattern]]:
+    """
+    编译字段匹配规则
+
+    规则可以是正则字符串，也可以是 (锚点, 正则字符串)：
+    带锚点的规则只从锚点第一次出现之后开始搜索，代替 (?<=锚点).*? 这类会回溯全文的写法
+    """
+    compiled = []
+    for pattern in patterns:
+        anchor, pattern = pattern if isinstance(pattern, tuple) else (None, pattern)
+        compiled.append((anchor, re.compile(pattern)))
+    return compiled
+
+# 各字段的匹配规则，导入时统一编译，按顺序尝试，先匹配到的优先
+FIELD_PATTERNS = {
+    "发票类型": _compile_patterns([
         r"电子发票（普通发票）",
         r"增值税专用发票",
         r"增值税（专用发票）",
         r"增值税普通发票",
         r"机动车销售统一发票"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            return match.group(0)
-    return "电子发票（普通发票）"
-
-def extract_invoice_number(text: str) -> Optional[str]:
-    """提取发票号码"""
-    patterns = [
+    ]),
+    "发票号码": _compile_patterns([
         r"发票号码[:：]\s*(\d{20})",
         r"发票号码\s*(\d{20})",
         r"号码[:：]\s*(\d{20})"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            return match.group(1)
-    return '#'
-
-def extract_invoice_date(text: str) -> Optional[str]:
-    """提取开票日期"""
-    patterns = [
+    ]),
+    "开票日期": _compile_patterns([
         r"开票日期[:：]\s*(\d{4}年\d{1,2}月\d{1,2}日)",
         r"开票日期[:：]\s*(\d{4}-\d{1,2}-\d{1,2})",
         r"国家税务总局 \s*(\d{4}年\d{1,2}月\d{1,2}日)",
         r"日期[:：]\s*(\d{4}年\d{1,2}月\d{1,2}日)"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text)
+    ]),
+    "购买方名称": _compile_patterns([
+        r"(?m)购\s*名称：\s*([^\n销]+?)(?=\s*(?:统一社会信用代码|纳税人识别号|销|$))",
+        r"(?m)购买方[:：]\s*名称[:：]?\s*([^\n]+?)(?=\s*(?:统一社会信用代码|纳税人识别号|销|$))",
+        # 竖排的“购买方信息”“销售方信息”单独成行，名称行为“买 名称：... 售 名称：...”
+        r"(?m)买\s*名称[:：]\s*([^\n]+?)(?=\s+售\s*名称|\s*(?:统一社会信用代码|纳税人识别号|$))"
+    ]),
+    "购买方纳税人识别号": _compile_patterns([
+        r"统一社会信用代码/纳税人识别号[:：]\s*([A-Z0-9]{18,20})(?=\s*[^\n]*销)",
+        r"统一社会信用代码/纳税人识别号[:：]\s*([A-Z0-9]{18,20})(?=\s*[^\n]*售)",
+        r"纳税人识别号[:：]\s*([A-Z0-9]{18,20})(?=\s*销售方)"
+    ]),
+    "销售方名称": _compile_patterns([
+        r"(?m)销\s*名称：\s*([^\n]+?)(?=\s*(?:统一社会信用代码|纳税人识别号|$))",
+        r"(?m)销售方[:：]\s*名称[:：]?\s*([^\n]+?)(?=\s*(?:统一社会信用代码|纳税人识别号|$))",
+        r"(?m)售\s*名称[:：]\s*([^\n]+?)(?=\s*(?:统一社会信用代码|纳税人识别号|$))"
+    ]),
+    "销售方纳税人识别号": _compile_patterns([
+        ("售方信息", r"统一社会信用代码/纳税人识别号[:：]\s*([A-Z0-9]{18,20})"),
+        r"统一社会信用代码/纳税人识别号[:：]\s*([A-Z0-9]{18,20})(?=\s*[^\n]*项目名称)",
+        ("售", r"统一社会信用代码/纳税人识别号[:：]\s*([A-Z0-9]{18,20})")
+    ]),
+    "服务类型": _compile_patterns([
+        r"旅客运输服务",
+        r"运输服务",
+        r"客运服务"
+    ]),
+    "合计金额": _compile_patterns([
+        r"合 计\s+[￥¥]?\s*(\d+\.\d{2})",
+        r"合计金额\s+[￥¥]?\s*(\d+\.\d{2})"
+    ]),
+    "合计税额": _compile_patterns([
+        r"合 计\s+[￥¥]?\s*\d+\.\d{2}\s+[￥¥]?\s*(\d+\.\d{2})",
+        r"合计税额\s+[￥¥]?\s*(\d+\.\d{2})"
+    ]),
+    "价税合计小写": _compile_patterns([
+        r"价税合计[（(]小写[)）][\s￥¥]*([\d,]+\.\d{2})",
+        r"小写[)）]?[\s￥¥]*([\d,]+\.\d{2})",
+        r"¥\s*(\d+\.\d{2})(?=\s*备)"
+    ]),
+    "价税合计大写": _compile_patterns([
+        r"价税合计（大写）\s*([零壹贰叁肆伍陆柒捌玖拾佰仟万亿圆角分整]+)(?=\s*[（(]小写[)）])",
+        r"（大写）\s*([零壹贰叁肆伍陆柒捌玖拾佰仟万亿圆角分整]+)"
+    ]),
+    "开票人": _compile_patterns([
+        r"开票人[:：]\s*([^\n]+?)(?=\s*(?:didi|$))",
+        r"开票人\s*([^\n]+?)(?=\s*(?:didi|$))"
+    ]),
+}
+
+# 各版式专用的匹配规则，覆盖 FIELD_PATTERNS 中的同名字段，只保留该版式可能出现的写法；
+# 新增版式时只需在这里和 LAYOUT_FIELDS 中登记，不会给其他版式增加匹配开销
+LAYOUT_PATTERN_OVERRIDES = {
+    "增值税专用发票": {
+        "发票类型": _compile_patterns([
+            r"增值税专用发票",
+            r"增值税（专用发票）"
+        ]),
+    },
+    "铁路电子客票": {
+        "发票类型": _compile_patterns([
+            r"电子发票（铁路电子客票）"
+        ]),
+        "购买方名称": _compile_patterns([
+            r"购买方名称[:：]\s*([^\n]+?)(?=\s*(?:统一社会信用代码|$))"
+        ]),
+        "购买方纳税人识别号": _compile_patterns([
+            r"统一社会信用代码[:：]\s*([A-Z0-9]{18,20})"
+        ]),
+        # 铁路电子客票没有价税合计栏，以票价作为小写金额
+        "价税合计小写": _compile_patterns([
+            r"票价[:：]\s*[￥¥]?\s*(\d+\.\d{2})",
+            r"[￥¥]\s*(\d+\.\d{2})"
+        ]),
+    },
+    "机动车销售统一发票": {
+        "发票类型": _compile_patterns([
+            r"机动车销售统一发票"
+        ]),
+    },
+}
+
+# 版式 -> 合并后的匹配规则表
+LAYOUT_PATTERNS = {
+    layout: {**FIELD_PATTERNS, **LAYOUT_PATTERN_OVERRIDES.get(layout, {})}
+    for layout in INVOICE_LAYOUTS
+}
+
+# 项目明细表格行：项目名称（*税收分类*名称） [规格型号] [单位] [数量 单价] 金额 税率/征收率 税额
+_ITEM_LINE_PATTERN = re.compile(
+    r'(\*[^*\n]+\*\S*|[^\s*]\S*)(?:\s+\S+)*?'
+    r'(?:\s+(-?\d+(?:\.\d+)?)\s+(-?\d+(?:\.\d+)?))?'
+    r'\s+(-?\d+\.\d{2})\s+(\d{1,2}(?:\.\d+)?%|免税|不征税|\*+)\s+(-?\d+\.\d{2}|\*+)$'
+)
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# 提取逻辑版本号，修改正则以外的提取逻辑时手动递增，使旧的缓存结果失效
+EXTRACTOR_VERSION = 3
+
+def _compute_extractor_fingerprint() -> str:
+    """提取器指纹：版本号 + 全部匹配规则，任何正则的改动都会得到不同的指纹"""
+    sha1 = hashlib.sha1(str(EXTRACTOR_VERSION).encode('utf-8'))
+    for field, patterns in FIELD_PATTERNS.items():
+        for anchor, pattern in patterns:
+            sha1.update(f"{field}|{anchor}|{pattern.pattern}|{pattern.flags}\n".encode('utf-8'))
+    for layout, overrides in LAYOUT_PATTERN_OVERRIDES.items():
+        for field, patterns in overrides.items():
+            for anchor, pattern in patterns:
+                sha1.update(f"{layout}|{field}|{anchor}|{pattern.pattern}|{pattern.flags}\n".encode('utf-8'))
+    for pattern in (_ITEM_LINE_PATTERN, _WHITESPACE_PATTERN):
+        sha1.update(f"{pattern.pattern}|{pattern.flags}\n".encode('utf-8'))
+    # 版式识别和各版式运行的字段在 LAYOUT_FIELDS 定义之前无法计入，改动时需递增 EXTRACTOR_VERSION
+    sha1.update(f"{list(INVOICE_LAYOUTS.items())}|{CLASSIFY_HEAD_CHARS}\n".encode('utf-8'))
+    return f"{EXTRACTOR_VERSION}-{sha1.hexdigest()[:16]}"
+
+EXTRACTOR_FINGERPRINT = _compute_extractor_fingerprint()
+
+def describe_patterns() -> Dict[str, List[str]]:
+    """
+    字段名 -> 各条匹配规则的文本（带锚点的规则写成 锚点|正则），与性能统计中的规则序号一一对应
+    版式专用的规则以 字段名@版式 为键
+    """
+    tables = [(None, FIELD_PATTERNS)] + list(LAYOUT_PATTERN_OVERRIDES.items())
+    return {
+        field if layout is None else f"{field}@{layout}":
+            [pattern.pattern if anchor is None else f"{anchor}|{pattern.pattern}" for anchor, pattern in patterns]
+        for layout, table in tables
+        for field, patterns in table.items()
+    }
+
+def _search_field(field: str, doc: ParsedInvoiceText) -> Optional[Match]:
+    """
+    按顺序尝试字段的匹配规则，返回第一个匹配结果，doc 带有 profile 时记录命中的规则序号
+    doc 已识别版式时使用该版式的规则
+    """
+    patterns = FIELD_PATTERNS[field] if doc.patterns is None else doc.patterns[field]
+    if doc.profile is not None and patterns is not FIELD_PATTERNS[field]:
+        profile_key = f"{field}@{doc.layout}"
+    else:
+        profile_key = field
+    for index, (anchor, pattern) in enumerate(patterns):
+        if anchor is None:
+            match = pattern.search(doc.text)
+        else:
+            pos = doc.find(anchor)
+            if pos < 0:
+                continue
+            match = pattern.search(doc.text, pos + len(anchor))
         if match:
-            date_str = match.group(1)
-            date_str = date_str.replace('年', '-').replace('月', '-').replace('日', '')
-            return date_str
+            if doc.profile is not None:
+                doc.profile.add_match(profile_key, index)
+            return match
+    if doc.profile is not None:
+        doc.profile.add_match(profile_key, None)
+    return None
+
+def extract_invoice_type(doc: ParsedInvoiceText) -> Optional[str]:
+    """提取发票类型"""
+    match = _search_field("发票类型", doc)
+    if match:
+        return match.group(0)
+    return "电子发票（普通发票）"
+
+def extract_invoice_number(doc: ParsedInvoiceText) -> Optional[str]:
+    """提取发票号码"""
+    match = _search_field("发票号码", doc)
+    if match:
+        return match.group(1)
+    return '#'
+
+def extract_invoice_date(doc: ParsedInvoiceText) -> Optional[str]:
+    """提取开票日期"""
+    match = _search_field("开票日期", doc)
+    if match:
+        date_str = match.group(1)
+        date_str = date_str.replace('年', '-').replace('月', '-').replace('日', '')
+        return date_str
     return None
 
-def extract_buyer_info(text: str) -> Dict[str, str]:
+def extract_buyer_info(doc: ParsedInvoiceText) -> Dict[str, str]:
     """提取购买方信息"""
     buyer_info = {}
     
     # 更精确的购买方名称匹配
-    name_patterns = [
-        r"购\s*名称：\s*([^\n销]+?)(?=\s*(?:统一社会信用代码|纳税人识别号|销|$))",
-        r"购买方[:：]\s*名称[:：]?\s*([^\n]+?)(?=\s*(?:统一社会信用代码|纳税人识别号|销|$))"
-    ]
-    for pattern in name_patterns:
-        match = re.search(pattern, text)
-        if match:
-            buyer_info["名称"] = match.group(1).strip()
-            break
+    match = _search_field("购买方名称", doc)
+    if match:
+        buyer_info["名称"] = match.group(1).strip()
     
     # 更精确的纳税人识别号匹配
-    tax_id_patterns = [
-        r"统一社会信用代码/纳税人识别号[:：]\s*([A-Z0-9]{18,20})(?=\s*[^\n]*销)",
-        r"统一社会信用代码/纳税人识别号[:：]\s*([A-Z0-9]{18,20})(?=\s*[^\n]*售)",
-        r"纳税人识别号[:：]\s*([A-Z0-9]{18,20})(?=\s*销售方)"
-    ]
-    for pattern in tax_id_patterns:
-        match = re.search(pattern, text)
-        if match:
-            buyer_info["纳税人识别号"] = match.group(1).strip()
-            break
+    match = _search_field("购买方纳税人识别号", doc)
+    if match:
+        buyer_info["纳税人识别号"] = match.group(1).strip()
     
     return buyer_info if buyer_info else {}
 
-def extract_seller_info(text: str) -> Dict[str, str]:
+def extract_seller_info(doc: ParsedInvoiceText) -> Dict[str, str]:
     """提取销售方信息"""
     seller_info = {}
     
     # 更精确的销售方名称匹配
-    name_patterns = [
-        r"销\s*名称：\s*([^\n]+?)(?=\s*(?:统一社会信用代码|纳税人识别号|$))",
-        r"销售方[:：]\s*名称[:：]?\s*([^\n]+?)(?=\s*(?:统一社会信用代码|纳税人识别号|$))"
-    ]
-    for pattern in name_patterns:
-        match = re.search(pattern, text)
-        if match:
-            seller_info["名称"] = match.group(1).strip()
-            break
+    match = _search_field("销售方名称", doc)
+    if match:
+        seller_info["名称"] = match.group(1).strip()
     
     # 更精确的销售方纳税人识别号匹配
-    tax_id_patterns = [
-        r"(?<=售方信息).*?统一社会信用代码/纳税人识别号[:：]\s*([A-Z0-9]{18,20})",
-        r"统一社会信用代码/纳税人识别号[:：]\s*([A-Z0-9]{18,20})(?=\s*[^\n]*项目名称)",
-        r"(?<=售).*?统一社会信用代码/纳税人识别号[:：]\s*([A-Z0-9]{18,20})"
-    ]
-    for pattern in tax_id_patterns:
-        match = re.search(pattern, text, re.DOTALL)
-        if match:
-            seller_info["纳税人识别号"] = match.group(1).strip()
-            break
+    match = _search_field("销售方纳税人识别号", doc)
+    if match:
+        seller_info["纳税人识别号"] = match.group(1).strip()
     
     return seller_info if seller_info else {}
 
-def extract_service_type(text: str) -> Optional[str]:
+def extract_service_type(doc: ParsedInvoiceText) -> Optional[str]:
     """提取服务类型"""
-    patterns = [
-        r"旅客运输服务",
-        r"运输服务",
-        r"客运服务"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            return match.group(0)
+    match = _search_field("服务类型", doc)
+    if match:
+        return match.group(0)
     return '#'
 
-def extract_item_details(text: str) -> List[Dict[str, str]]:
+def extract_item_details(doc: ParsedInvoiceText) -> List[Dict[str, str]]:
     """提取项目明细"""
     items = []
     
-    # 使用更精确的表格解析
-    lines = text.split('\n')
-    table_start = False
+    # 使用更精确的表格解析，从表头的下一行开始
+    header_indexes = doc.header_lines["项目明细"]
+    if not header_indexes:
+        return items
     
-    for i, line in enumerate(lines):
-        if "项目名称" in line and "单价" in line and "数量" in line:
-            table_start = True
+    for i in range(header_indexes[0] + 1, len(doc.lines)):
+        line = doc.lines[i]
+        # 跨页重复的表头
+        if i in header_indexes:
             continue
         
-        if table_start:
-            if "合 计" in line or "价税合计" in line or not line.strip():
-                break
-            
-            # 更精确的项目行匹配
-            item_match = re.match(r'([^*\n]+)\s+(-?\d+\.\d{2})\s+(-?\d+\.\d{2})\s+(-?\d+\.\d{2})\s+([\d%\.]+)\s+(-?\d+\.\d{2})', line.strip())
-            if item_match:
-                item = {
-                    "项目名称": item_match.group(1).strip(),
-                    "单价": item_match.group(2),
-                    "数量": item_match.group(3),
-                    "金额": item_match.group(4),
-                    "税率": item_match.group(5),
-                    "税额": item_match.group(6)
-                }
-                items.append(item)
+        if "合 计" in line or "价税合计" in line or not line.strip():
+            break
+        
+        # 更精确的项目行匹配
+        item_match = _ITEM_LINE_PATTERN.match(line.strip())
+        if item_match:
+            item = {
+                "项目名称": item_match.group(1),
+                "数量": item_match.group(2) or '',
+                "单价": item_match.group(3) or '',
+                "金额": item_match.group(4),
+                "税率": item_match.group(5),
+                "税额": item_match.group(6)
+            }
+            items.append(item)
     
     return items
 
-def extract_amount_info(text: str) -> Dict[str, str]:
+def extract_amount_info(doc: ParsedInvoiceText) -> Dict[str, str]:
     """提取金额信息"""
     amount_info = {}
     
     # 更精确的合计金额匹配
-    patterns = [
-        r"合 计\s+[￥¥]?\s*(\d+\.\d{2})",
-        r"合计金额\s+[￥¥]?\s*(\d+\.\d{2})"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            amount_info["合计金额"] = match.group(1)
-            break
+    match = _search_field("合计金额", doc)
+    if match:
+        amount_info["合计金额"] = match.group(1)
     
     return amount_info if amount_info else {}
 
-def extract_tax_info(text: str) -> Dict[str, str]:
+def extract_tax_info(doc: ParsedInvoiceText) -> Dict[str, str]:
     """提取税率和税额信息"""
     tax_info = {}
     
     # 更精确的合计税额匹配
-    tax_patterns = [
-        r"合 计\s+[￥¥]?\s*\d+\.\d{2}\s+[￥¥]?\s*(\d+\.\d{2})",
-        r"合计税额\s+[￥¥]?\s*(\d+\.\d{2})"
-    ]
-    
-    for pattern in tax_patterns:
-        match = re.search(pattern, text)
-        if match:
-            tax_info["合计税额"] = match.group(1)
-            break
+    match = _search_field("合计税额", doc)
+    if match:
+        tax_info["合计税额"] = match.group(1)
     
     return tax_info if tax_info else {}
 
-def extract_total_amount(text: str) -> Dict[str, str]:
+def extract_total_amount(doc: ParsedInvoiceText) -> Dict[str, str]:
     """提取价税合计"""
     total_info = {}
     
     # 小写金额 - 更精确匹配
-    patterns = [
-        r"价税合计[（(]小写[)）][\s￥¥]*([\d,]+\.\d{2})",
-        r"小写[)）]?[\s￥¥]*([\d,]+\.\d{2})",
-        r"¥\s*(\d+\.\d{2})(?=\s*备)"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            total_info["小写"] = match.group(1)
-            break
+    match = _search_field("价税合计小写", doc)
+    if match:
+        total_info["小写"] = match.group(1)
     
     # 大写金额 - 更精确匹配
-    chinese_patterns = [
-        r"价税合计（大写）\s*([零壹贰叁肆伍陆柒捌玖拾佰仟万亿圆角分整]+)(?=\s*[（(]小写[)）])",
-        r"（大写）\s*([零壹贰叁肆伍陆柒捌玖拾佰仟万亿圆角分整]+)"
-    ]
-    
-    for pattern in chinese_patterns:
-        chinese_match = re.search(pattern, text)
-        if chinese_match:
-            total_info["大写"] = chinese_match.group(1)
-            break
+    chinese_match = _search_field("价税合计大写", doc)
+    if chinese_match:
+        total_info["大写"] = chinese_match.group(1)
     
     return total_info if total_info else {}
 
-def extract_travel_info(text: str) -> Dict[str, str]:
+def extract_travel_info(doc: ParsedInvoiceText) -> Dict[str, str]:
     """提取出行信息"""
     travel_info = {}
     
-    lines = text.split('\n')
-    header_found = False
+    header_index = doc.first_header_line("出行信息")
+    if header_index < 0:
+        return travel_info
     
-    for i, line in enumerate(lines):
-        if "出行人" in line and "有效身份证件号" in line:
-            header_found = True
-            continue
-        
-        if header_found and line.strip() and not any(x in line for x in ["出行人", "有效身份证件号", "价税合计"]):
-            travel_data = re.split(r'\s+', line.strip())
+    for line in doc.lines[header_index + 1:]:
+        if line.strip() and not any(x in line for x in ["出行人", "有效身份证件号", "价税合计"]):
+            travel_data = _WHITESPACE_PATTERN.split(line.strip())
             if len(travel_data) >= 6:
                 travel_info = {
                     "出行人": travel_data[0],
@@ -296,29 +790,101 @@ def extract_travel_info(text: str) -> Dict[str, str]:
     
     return travel_info if travel_info else {}
 
-def extract_drawer(text: str) -> Optional[str]:
+def extract_drawer(doc: ParsedInvoiceText) -> Optional[str]:
     """提取开票人"""
-    patterns = [
-        r"开票人[:：]\s*([^\n]+?)(?=\s*(?:didi|$))",
-        r"开票人\s*([^\n]+?)(?=\s*(?:didi|$))"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            return match.group(1).strip()
+    match = _search_field("开票人", doc)
+    if match:
+        return match.group(1).strip()
     return '#'
 
-def extract_remarks(text: str) -> Optional[str]:
+def extract_remarks(doc: ParsedInvoiceText) -> Optional[str]:
     """提取备注信息"""
-    lines = text.split('\n')
-    for i, line in enumerate(lines):
-        if "备注" in line and i + 1 < len(lines):
+    lines = doc.lines
+    for i in doc.header_lines["备注"]:
+        if i + 1 < len(lines):
             remark_line = lines[i + 1].strip()
             if remark_line and remark_line != "didi":
                 return remark_line
     return '#'
 
+# 字段名与提取函数的对应关系，顺序即输出顺序
+FIELD_EXTRACTORS = {
+    "发票类型": extract_invoice_type,
+    "发票号码": extract_invoice_number,
+    "开票日期": extract_invoice_date,
+    "购买方信息": extract_buyer_info,
+    "销售方信息": extract_seller_info,
+    "服务类型": extract_service_type,
+    "项目明细": extract_item_details,
+    "金额信息": extract_amount_info,
+    "税率和税额": extract_tax_info,
+    "价税合计": extract_total_amount,
+    "出行信息": extract_travel_info,
+    "开票人": extract_drawer,
+    "备注": extract_remarks
+}
+
+# 各版式需要运行的提取函数，未列出的字段不运行，直接取 FIELD_DEFAULTS 中的“未找到”值
+_VAT_FIELDS = tuple(field for field in FIELD_EXTRACTORS if field not in ("服务类型", "出行信息"))
+LAYOUT_FIELDS = {
+    "铁路电子客票": ("发票类型", "发票号码", "开票日期", "购买方信息", "价税合计"),
+    "机动车销售统一发票": ("发票类型", "发票号码", "开票日期", "购买方信息", "销售方信息", "价税合计", "开票人", "备注"),
+    "旅客运输": tuple(FIELD_EXTRACTORS),
+    "增值税专用发票": _VAT_FIELDS,
+    "增值税普通发票": _VAT_FIELDS,
+}
+
+# 各字段在空文本上的提取结果，即不运行提取函数时的取值
+FIELD_DEFAULTS = {field: extractor(ParsedInvoiceText("")) for field, extractor in FIELD_EXTRACTORS.items()}
+
+def classify_invoice(doc: ParsedInvoiceText) -> str:
+    """识别版式并让 doc 使用该版式的匹配规则，返回版式名"""
+    doc.layout = classify_layout(doc.text)
+    doc.patterns = LAYOUT_PATTERNS[doc.layout]
+    return doc.layout
+
+def _run_extractor(field: str, doc: ParsedInvoiceText) -> Any:
+    """按 doc 的版式运行字段的提取函数，与该版式无关的字段直接返回默认值"""
+    if doc.layout is not None and field not in LAYOUT_FIELDS[doc.layout]:
+        return FIELD_DEFAULTS[field]
+    return FIELD_EXTRACTORS[field](doc)
+
+# 预定义的字段组合，传给 fields 参数；None 表示全部字段
+FIELD_PROFILES = {
+    # 生成文件名只用到发票号码（查重）、价税合计和开票日期
+    "rename": ("发票号码", "开票日期", "价税合计"),
+    "full": None,
+}
+
+def resolve_fields(fields: Union[str, Tuple[str, ...], None]) -> Optional[Tuple[str, ...]]:
+    """
+    把 fields 参数转换为按 FIELD_EXTRACTORS 顺序排列的字段名元组，None 表示全部字段
+
+    :param fields: FIELD_PROFILES 中的名称、字段名序列或 None
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        if fields not in FIELD_PROFILES:
+            raise ValueError(f"未知的字段组合: {fields}")
+        return FIELD_PROFILES[fields]
+    unknown = [field for field in fields if field not in FIELD_EXTRACTORS]
+    if unknown:
+        raise ValueError(f"未知的字段: {', '.join(unknown)}")
+    return tuple(field for field in FIELD_EXTRACTORS if field in fields)
+
+# 提取函数表示“未找到”的返回值
+_MISSING_VALUES = (None, '#', {}, [])
+
+def has_required_fields(text: str, required_fields: Tuple[str, ...]) -> bool:
+    """判断文本中是否已经能提取到全部必需字段"""
+    doc = ParsedInvoiceText(text)
+    classify_invoice(doc)
+    for field in required_fields:
+        if _run_extractor(field, doc) in _MISSING_VALUES:
+            return False
+    return True
+
 # 使用示例
 if __name__ == "__main__":
     # 示例用法
@@ -0,0 +1,248 @@
+import io
+import importlib.util
+from typing import Iterator, Optional, Dict, List, Tuple
+
+# pdfplumber 和 PyMuPDF 导入较慢（各需 0.1~0.2 秒），第一次提取或预览时才导入，不拖慢窗口显示
+# PyMuPDF 为可选依赖，未安装时只能使用 pdfplumber 后端；这里只检查是否安装，不导入
+PYMUPDF_AVAILABLE = importlib.util.find_spec('pymupdf') is not None or importlib.util.find_spec('fitz') is not None
+
+def import_pdfplumber():
+    """导入 pdfplumber，已导入时直接返回"""
+    import pdfplumber
+    return pdfplumber
+
+def import_fitz():
+    """导入 PyMuPDF，已导入时直接返回"""
+    try:
+        import pymupdf as fitz  # PyMuPDF 1.24.3 起的模块名，通过 fitz 导入会在标准输出打印弃用警告
+    except ImportError:
+        import fitz  # 旧版本 PyMuPDF
+    return fitz
+
+# 与 pdfplumber extract_text 默认参数一致：字符间距超过 x 容差时插入空格，纵向容差内的字符视为同一行
+X_TOLERANCE = 3
+Y_TOLERANCE = 3
+
+# PyMuPDF 后端每处理多少个文件清空一次 MuPDF 的资源缓存
+MUPDF_STORE_RELEASE_EVERY = 50
+
+# 页面尺寸与版面模板相差在该比例以内时视为同一版面
+PAGE_SIZE_TOLERANCE = 0.03
+
+# 需要统一成普通空格的字符
+_SPACE_TRANSLATION = str.maketrans({'　': ' ', '\xa0': ' ', '\t': ' '})
+
+def normalize_text(text: str) -> str:
+    """
+    统一各后端输出的文本格式，使 utils/pdf.py 中的正则可以通用
+    全角空格、不间断空格统一为普通空格，去掉行尾空白
+    """
+    text = text.translate(_SPACE_TRANSLATION)
+    return "\n".join(line.rstrip() for line in text.split("\n"))
+
+class PdfTextBackend:
+    """PDF文本提取后端，逐页产出已规范化的文本"""
+
+    name = ''
+
+    def iter_page_texts(self, pdf_path: str, max_pages: Optional[int] = None, data: Optional[bytes] = None) -> Iterator[str]:
+        """
+        逐页产出文本，调用方提前结束迭代时应调用生成器的 close() 以释放文件
+
+        :param pdf_path: PDF文件路径
+        :param max_pages: 最多读取的页数，None 表示不限制
+        :param data: 已读入内存的文件内容，提供时不再读取文件
+        """
+        raise NotImplementedError
+
+    def read_regions(self, pdf_path: str, regions: Dict[str, Tuple[float, float, float, float]],
+                     data: Optional[bytes] = None,
+                     page_size: Optional[Tuple[float, float]] = None) -> Optional[Dict[str, str]]:
+        """
+        只读取第一页中指定区域内的文本
+
+        :param regions: 区域名 -> (x0, y0, x1, y1)，以页面宽高的比例表示，原点在左上角
+        :param data: 已读入内存的文件内容，提供时不再读取文件
+        :param page_size: 期望的页面尺寸 (宽, 高)，第一页尺寸不符时返回 None
+        :return: 区域名 -> 规范化后的文本
+        """
+        raise NotImplementedError
+
+def _page_size_matches(width: float, height: float, page_size: Optional[Tuple[float, float]]) -> bool:
+    if page_size is None:
+        return True
+    expected_width, expected_height = page_size
+    return (abs(width - expected_width) <= expected_width * PAGE_SIZE_TOLERANCE
+            and abs(height - expected_height) <= expected_height * PAGE_SIZE_TOLERANCE)
+
+class PdfplumberBackend(PdfTextBackend):
+    """pdfplumber 后端，版面分析较慢但结果稳定，是正则规则的基准"""
+
+    name = 'pdfplumber'
+
+    def iter_page_texts(self, pdf_path: str, max_pages: Optional[int] = None, data: Optional[bytes] = None) -> Iterator[str]:
+        # 只为需要读取的页面创建 Page 对象
+        pages = list(range(1, max_pages + 1)) if max_pages else None
+        pdfplumber = import_pdfplumber()
+        with pdfplumber.open(io.BytesIO(data) if data is not None else pdf_path, pages=pages) as pdf:
+            for page in pdf.pages:
+                try:
+                    text = page.extract_text() or ""
+                finally:
+                    # 释放该页解析出的字符、图形等对象，否则整个文件的页面对象会一直保留到关闭文件
+                    page.close()
+                yield normalize_text(text)
+
+    def read_regions(self, pdf_path: str, regions: Dict[str, Tuple[float, float, float, float]],
+                     data: Optional[bytes] = None,
+                     page_size: Optional[Tuple[float, float]] = None) -> Optional[Dict[str, str]]:
+        pdfplumber = import_pdfplumber()
+        with pdfplumber.open(io.BytesIO(data) if data is not None else pdf_path, pages=[1]) as pdf:
+            if not pdf.pages:
+                return None
+            page = pdf.pages[0]
+            width, height = float(page.width), float(page.height)
+            if not _page_size_matches(width, height, page_size):
+                return None
+            # 页面的字符只解析一次，各区域在其上裁剪
+            x0, top = float(page.bbox[0]), float(page.bbox[1])
+            texts = {}
+            for name, (rx0, ry0, rx1, ry1) in regions.items():
+                bbox = (x0 + rx0 * width, top + ry0 * height, x0 + rx1 * width, top + ry1 * height)
+                texts[name] = normalize_text(page.crop(bbox).extract_text() or "")
+            page.close()
+            return texts
+
+class PymupdfBackend(PdfTextBackend):
+    """
+    PyMuPDF 后端，速度快
+
+    page.get_text() 的分行和空格与 pdfplumber 不同（例如 “合 计” 中间的间距不会输出空格），
+    因此按字符坐标重新组行：纵向位置相近的字符归为一行，字符间距超过容差时插入空格，与 pdfplumber 的规则保持一致
+    """
+
+    name = 'pymupdf'
+    _documents_since_release = 0  # 本进程中自上次清空资源缓存以来处理的文件数
+
+    def iter_page_texts(self, pdf_path: str, max_pages: Optional[int] = None, data: Optional[bytes] = None) -> Iterator[str]:
+        fitz = import_fitz()
+        try:
+            with (fitz.open(stream=data, filetype='pdf') if data is not None else fitz.open(pdf_path)) as doc:
+                page_count = min(len(doc), max_pages) if max_pages else len(doc)
+                for index in range(page_count):
+                    yield normalize_text(self._page_text(doc[index]))
+        finally:
+            self._release_store()
+
+    def read_regions(self, pdf_path: str, regions: Dict[str, Tuple[float, float, float, float]],
+                     data: Optional[bytes] = None,
+                     page_size: Optional[Tuple[float, float]] = None) -> Optional[Dict[str, str]]:
+        fitz = import_fitz()
+        try:
+            with (fitz.open(stream=data, filetype='pdf') if data is not None else fitz.open(pdf_path)) as doc:
+                if len(doc) == 0:
+                    return None
+                page = doc[0]
+                rect = page.rect
+                if not _page_size_matches(rect.width, rect.height, page_size):
+                    return None
+                # 只解析裁剪矩形内的字符
+                texts = {}
+                for name, (rx0, ry0, rx1, ry1) in regions.items():
+                    clip = fitz.Rect(rect.x0 + rx0 * rect.width, rect.y0 + ry0 * rect.height,
+                                     rect.x0 + rx1 * rect.width, rect.y0 + ry1 * rect.height)
+                    texts[name] = normalize_text(self._chars_to_text(self._page_chars(page, clip)))
+                return texts
+        finally:
+            self._release_store()
+
+    @classmethod
+    def _release_store(cls):
+        """
+        MuPDF 的全局资源缓存（字体、图片等）默认上限 256MB，在进程池中会长期占用每个工作进程的内存，
+        每处理 MUPDF_STORE_RELEASE_EVERY 个文件清空一次；不每次清空，常用字体可以在文件之间复用
+        """
+        cls._documents_since_release += 1
+        if cls._documents_since_release >= MUPDF_STORE_RELEASE_EVERY:
+            cls._documents_since_release = 0
+            import_fitz().TOOLS.store_shrink(100)
+
+    @classmethod
+    def _page_text(cls, page) -> str:
+        return cls._chars_to_text(cls._page_chars(page))
+
+    @staticmethod
+    def _page_chars(page, clip=None) -> List[Tuple[float, float, float, str]]:
+        """
+        页面中的字符 (y0, x0, x1, 字符)
+
+        :param clip: 只读取该矩形 (fitz.Rect) 内的字符，None 表示整页
+        """
+        chars = []
+        # 不保留图片块，扫描件中的大图不会被解码
+        fitz = import_fitz()
+        flags = fitz.TEXTFLAGS_RAWDICT & ~fitz.TEXT_PRESERVE_IMAGES
+        for block in page.get_text("rawdict", clip=clip, flags=flags)["blocks"]:
+            for line in block.get("lines", []):
+                for span in line["spans"]:
+                    for char in span["chars"]:
+                        x0, y0, x1, y1 = char["bbox"]
+                        chars.append((y0, x0, x1, char["c"]))
+        return chars
+
+    @staticmethod
+    def _chars_to_text(chars: List[Tuple[float, float, float, str]]) -> str:
+        if not chars:
+            return ""
+
+        # 按纵向位置聚类成行
+        chars.sort()
+        lines = []
+        current = [chars[0]]
+        for char in chars[1:]:
+            if char[0] - current[-1][0] > Y_TOLERANCE:
+                lines.append(current)
+                current = []
+            current.append(char)
+        lines.append(current)
+
+        # 行内按横向位置排序，间距过大时补空格；连续的空白字符合并为一个空格，与 pdfplumber 一致
+        text_lines = []
+        for line in lines:
+            line.sort(key=lambda c: c[1])
+            parts = []
+            prev_x1 = None
+            pending_space = False
+            for y0, x0, x1, c in line:
+                if c.isspace():
+                    pending_space = True
+                    continue
+                if parts and (pending_space or x0 > prev_x1 + X_TOLERANCE):
+                    parts.append(' ')
+                parts.append(c)
+                prev_x1 = x1
+                pending_space = False
+            if parts:
+                text_lines.append("".join(parts))
+        return "\n".join(text_lines)
+
+BACKENDS = {
+    PdfplumberBackend.name: PdfplumberBackend,
+    PymupdfBackend.name: PymupdfBackend,
+}
+
+def preload_backend(name: str = 'pdfplumber'):
+    """提前导入后端使用的PDF库，可在窗口显示后放到后台线程中调用，第一次提取时不必再等待导入"""
+    if name == PymupdfBackend.name and PYMUPDF_AVAILABLE:
+        import_fitz()
+    else:
+        import_pdfplumber()
+
+def get_backend(name: str = 'pdfplumber') -> PdfTextBackend:
+    """按名称获取文本提取后端，PyMuPDF 不可用时回退到 pdfplumber"""
+    if name not in BACKENDS:
+        raise ValueError(f"未知的PDF文本后端: {name}，可选: {', '.join(BACKENDS)}")
+    if name == PymupdfBackend.name and not PYMUPDF_AVAILABLE:
+        print("警告: PyMuPDF未安装，PDF文本提取回退到 pdfplumber。请运行 'pip install PyMuPDF' 来启用此后端。")
+        name = PdfplumberBackend.name
+    return BACKENDS[name]()
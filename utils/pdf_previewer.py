@@ -5,13 +5,11 @@ from PySide6.QtCore import Qt, QPoint, QEvent
 from qfluentwidgets import TableWidget, PushButton
 
 from utils.custom_style import PREVIEW_BUTTON_STYLE, DELETE_BUTTON_STYLE
+from utils.file_buffer import read_file_buffer
+from utils.pdf_backend import import_fitz, PYMUPDF_AVAILABLE
 
-# 尝试导入PyMuPDF，如果失败则禁用预览功能
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
+# PyMuPDF 在第一次预览时才导入，未安装时禁用预览功能
+if not PYMUPDF_AVAILABLE:
     print("警告: PyMuPDF未安装，PDF预览功能将被禁用。请运行 'pip install PyMuPDF' 来启用此功能。")
 
 class PdfPreviewWindow(QWidget):
@@ -59,8 +57,10 @@ class PdfPreviewWindow(QWidget):
             return
             
         try:
-            # 打开PDF文档
-            doc = fitz.open(pdf_path)
+            # 打开PDF文档，优先使用已读入内存的文件内容
+            fitz = import_fitz()
+            data = read_file_buffer(pdf_path)
+            doc = fitz.open(stream=data, filetype='pdf') if data is not None else fitz.open(pdf_path)
             if len(doc) == 0:
                 self.image_label.setText("PDF文件为空")
                 self.resize(200, 100)
@@ -193,6 +193,13 @@ class PdfPreviewerTableWidget(TableWidget):
         try:
             if row < len(self.file_path_list):
                 pdf_path = self.file_path_list[row]
+
+                # XML/OFD 发票预览同名的PDF
+                if os.path.splitext(pdf_path)[1].lower() != '.pdf':
+                    pdf_path = os.path.splitext(pdf_path)[0] + '.pdf'
+                    if not os.path.exists(pdf_path):
+                        QToolTip.showText(button.mapToGlobal(QPoint(0, 0)), "只能预览PDF文件", self)
+                        return
                 
                 # 检查文件是否存在
                 if not os.path.exists(pdf_path):
@@ -0,0 +1,410 @@
+import os
+import sys
+import json
+import time
+import itertools
+from typing import Dict, Any, Optional, List, Tuple
+
+from utils.user_data import get_user_data_dir
+from utils.batch_rename import plan_renames, _execute_journaled, RenameReport
+
+JOURNAL_DIR_NAME = 'rename_journal'
+
+# 批次的结束状态，没有结束状态的批次在下次启动时恢复
+COMMITTED = 'committed'
+TERMINAL_STATUSES = (COMMITTED, 'undone', 'rolled_back', 'abandoned')
+
+_batch_counter = itertools.count(1)
+
+# Windows 的锁是强制锁，锁定远在文件末尾之后的一个字节，不妨碍读写日志内容
+_LOCK_OFFSET = 1 << 40
+
+def file_identity(path: str) -> Tuple[int, int, int]:
+    """
+    文件的身份 (inode, 大小, 修改时间)，重命名时不变，用来找到日志记录的文件现在位于哪个名称
+    （文件系统不提供 inode 时为 0，只按大小和修改时间比较）；文件不存在时抛出 OSError
+    """
+    st = os.stat(path)
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+def _lock_file(path: str):
+    """
+    以不等待的方式独占锁定文件，返回持有锁的文件对象，已被其他进程（或本进程的其他批次）锁定时返回 None
+    进程退出时锁自动释放，因此能锁定的未完成批次一定已经中断
+    """
+    f = open(path, 'a+b')
+    try:
+        if sys.platform == 'win32':
+            import msvcrt
+            f.seek(_LOCK_OFFSET)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+def _fsync_dir(folder: str):
+    """新建的日志文件在目录项写入磁盘后才能在断电后找到（Windows 不需要也不支持）"""
+    if sys.platform == 'win32':
+        return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class RenameBatch:
+    """
+    一次批量重命名的日志，由 RenameJournal.begin 创建，传给 execute_plan
+
+    每一步执行后追加一条记录并写入操作系统（程序崩溃时不会丢失），每 fsync_every 条才 fsync 一次，
+    1000 个文件只需几次 fsync；断电丢失的最后几条记录不影响恢复，恢复时按文件身份查找文件的实际位置。
+    """
+
+    def __init__(self, path: str, batch_id: str, kind: str, fsync_every: int, lock):
+        self.path = path
+        self.batch_id = batch_id
+        self.kind = kind
+        self.fsync_every = max(1, fsync_every)
+        self._lock = lock
+        self._file = open(path, 'a', encoding='utf-8')
+        self._unsynced = 0
+        # 记录日志时已无法读取（被删除、移走或没有权限）的文件序号 -> 原因，execute_plan 不再移动这些文件
+        self.skipped: Dict[int, str] = {}
+        # 执行中写入日志失败的原因，此后不再记录，日志文件已删除
+        self.error: Optional[str] = None
+
+    def _write(self, record: Dict[str, Any], sync: bool = False):
+        if self._file is None:
+            return
+        try:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+            self._unsynced += 1
+            if sync or self._unsynced >= self.fsync_every:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+        except OSError as e:
+            # 磁盘已满等情况下不中断重命名，放弃这一批日志：
+            # 留下未结束的日志会让下次启动把已经完成的重命名改回原名
+            self.error = f"写入重命名日志失败: {e}"
+            self.discard()
+
+    def done(self, seq: int):
+        self._write({"type": "done", "seq": seq})
+
+    def failed(self, seq: int, reason: str):
+        self._write({"type": "failed", "seq": seq, "reason": reason})
+
+    def commit(self):
+        """全部步骤已执行（失败的步骤文件留在原处），之后可以撤销"""
+        self._write({"type": "status", "status": COMMITTED, "kind": self.kind, "time": time.time()}, sync=True)
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def discard(self):
+        """关闭并删除这一批日志，本批不能恢复和撤销"""
+        for f in (self._file, self._lock):
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+        self._file = self._lock = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+class RenameJournal:
+    """
+    批量重命名的预写日志，每批一个 JSON Lines 文件，保存在用户数据目录的 rename_journal 文件夹
+
+    - begin: 执行前写入每个文件的原路径、目标路径、身份和全部步骤（每个操作一条记录），fsync 后才开始重命名
+    - recover: 程序在重命名中途退出时，下次启动把该批的文件改回原名；恢复本身也记录为一批，再次中断时可以重来
+    - undo_last: 撤销最近一次完成的重命名，所有文件一次规划、按依赖顺序改回原名
+    恢复和撤销都按文件身份 (inode, 大小, 修改时间) 在目标、临时和原名称中查找文件，找不到时再扫描文件夹，
+    之后用 plan_renames 规划回原名的步骤，交换、轮换同样只借用一个临时名称；已被修改或删除的文件不会移动。
+    """
+
+    def __init__(self, folder: Optional[str] = None, fsync_every: int = 256, keep: int = 20):
+        """
+        :param folder: 日志文件夹，默认放在用户数据目录
+        :param fsync_every: 每执行多少步 fsync 一次日志
+        :param keep: 保留最近多少批已结束的日志（可撤销的范围）
+        """
+        self.folder = folder or os.path.join(get_user_data_dir(), JOURNAL_DIR_NAME)
+        self.fsync_every = fsync_every
+        self.keep = keep
+
+    def begin(self, src_list: List[str], plan: Dict, kind: str = 'rename',
+              undo_of: Optional[str] = None) -> RenameBatch:
+        """
+        记录一批重命名的计划，返回的 RenameBatch 传给 execute_plan；
+        此时已无法读取的文件不写入日志，记在 RenameBatch.skipped 中，由 execute_plan 记为失败。
+        日志文件夹无法创建或写入时抛出 OSError，不留下写了一半的日志
+
+        :param kind: rename 重命名，undo 撤销 undo_of 批次，rollback 恢复中断的 undo_of 批次
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        self.prune()
+        batch_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_batch_counter)}"
+        path = os.path.join(self.folder, batch_id + '.jsonl')
+
+        files = []
+        skipped = {}
+        for idx in sorted({idx for idx, _, _ in plan["steps"]}):
+            try:
+                identity = file_identity(src_list[idx])
+            except OSError as e:
+                # 规划之后文件消失或无法读取：只记为失败，其余文件照常记录和重命名
+                skipped[idx] = f"重命名失败: {str(e)}"
+                continue
+            files.append({
+                "index": idx,
+                "source": os.path.abspath(src_list[idx]),
+                "destination": os.path.abspath(plan["destinations"][idx]),
+                "temporary": os.path.abspath(plan["temporary"][idx]) if idx in plan["temporary"] else None,
+                "identity": identity,
+            })
+        lock = _lock_file(path)
+        try:
+            batch = RenameBatch(path, batch_id, kind, self.fsync_every, lock)
+        except OSError:
+            if lock is not None:
+                lock.close()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            raise
+        batch.skipped = skipped
+        try:
+            batch._file.write(json.dumps({
+                "type": "begin", "batch": batch_id, "kind": kind, "undo_of": undo_of,
+                "time": time.time(), "steps": len(plan["steps"]), "files": files,
+            }, ensure_ascii=False) + '\n')
+            for seq, (idx, src, dst) in enumerate(plan["steps"]):
+                batch._file.write(json.dumps({"type": "op", "seq": seq, "index": idx, "src": src, "dst": dst},
+                                             ensure_ascii=False) + '\n')
+            batch._file.flush()
+            os.fsync(batch._file.fileno())
+            _fsync_dir(self.folder)
+        except OSError:
+            # 写了一半的日志会在下次启动时被当作中断的批次恢复
+            batch.discard()
+            raise
+        return batch
+
+    def _batch_paths(self) -> List[str]:
+        """按时间先后排列的日志文件"""
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return []
+        return [os.path.join(self.folder, name) for name in sorted(names) if name.endswith('.jsonl')]
+
+    @staticmethod
+    def _load(path: str) -> Optional[Dict[str, Any]]:
+        """
+        读取一批日志，返回 {"path", "batch", "kind", "undo_of", "time", "steps", "files", "done", "failed", "status"}
+        最后一行可能只写了一半，跳过无法解析的行；没有 begin 记录时返回 None
+        """
+        batch = None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if not isinstance(record, dict):
+                        continue
+                    record_type = record.get("type")
+                    if record_type == "begin":
+                        batch = dict(record, path=path, done=0, failed=0, status=None)
+                    elif batch is None:
+                        continue
+                    elif record_type == "done":
+                        batch["done"] += 1
+                    elif record_type == "failed":
+                        batch["failed"] += 1
+                    elif record_type == "status":
+                        batch["status"] = record["status"]
+        except OSError as e:
+            print(f"读取重命名日志失败: {path}: {e}")
+            return None
+        return batch
+
+    @staticmethod
+    def _read_status(path: str) -> Optional[Dict[str, Any]]:
+        """
+        只读取日志末尾的状态记录，不解析整个文件；批次未结束时返回 None
+        （启动时检查、清理日志和查找可撤销的批次都只需要状态，1000 个文件的日志约 300KB）
+        """
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))
+                tail = f.read()
+        except OSError:
+            return None
+        for line in reversed(tail.splitlines()):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            # 最后一条完整的记录不是状态记录时批次未结束
+            return record if isinstance(record, dict) and record.get("type") == "status" else None
+        return None
+
+    def _set_status(self, batch: Dict[str, Any], status: str) -> Optional[str]:
+        """
+        标记批次的状态，写入失败时返回原因（文件已经改回原名，没有标记的批次再次恢复或撤销时不会移动文件）
+        """
+        try:
+            with open(batch["path"], 'a', encoding='utf-8') as f:
+                # 中断时最后一行可能只写了一半，状态记录另起一行
+                f.write('\n' + json.dumps({"type": "status", "status": status, "time": time.time()}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"写入重命名日志失败: {batch['path']}: {e}")
+            return f"写入重命名日志失败: {str(e)}"
+        batch["status"] = status
+        return None
+
+    def recover(self) -> List[RenameReport]:
+        """
+        把中断的批次中的文件改回原名，程序启动时调用
+
+        中断的恢复批次不单独处理：它要恢复的批次仍未结束，重新恢复时按身份查找，文件停在哪个名称都能找回；
+        恢复完成但还没标记时再次恢复，文件都已是原名，不会再移动。
+        :return: 每个恢复的批次的结果
+        """
+        results = []
+        # 后开始的批次先恢复：撤销中断时，先恢复撤销，再恢复更早的批次
+        for path in reversed(self._batch_paths()):
+            if self._read_status(path) is not None:
+                continue
+            lock = _lock_file(path)
+            if lock is None:
+                # 其他进程正在执行该批次
+                continue
+            try:
+                batch = self._load(path)
+                if batch is None or batch["status"] in TERMINAL_STATUSES:
+                    continue
+                if batch["kind"] == 'rollback':
+                    self._set_status(batch, 'abandoned')
+                    continue
+                print(f"重命名批次 {batch['batch']} 未完成（{batch['done'] + batch['failed']}/{batch['steps']} 步），恢复原文件名")
+                results.append(self._restore(batch, 'rollback'))
+                self._set_status(batch, 'rolled_back')
+            finally:
+                lock.close()
+        return results
+
+    def last_batch(self) -> Optional[Dict[str, Any]]:
+        """
+        最近一次完成且未撤销的重命名批次，没有时返回 None
+
+        :return: {"batch", "time", "files": [{"source", "destination", ...}], ...}
+        """
+        for path in reversed(self._batch_paths()):
+            status = self._read_status(path)
+            if status is not None and status["status"] == COMMITTED and status.get("kind") == 'rename':
+                return self._load(path)
+        return None
+
+    def undo_last(self) -> Optional[RenameReport]:
+        """
+        把最近一次完成的重命名批次中的文件改回原名，没有可撤销的批次时返回 None
+
+        :return: 改回原名的结果
+        """
+        batch = self.last_batch()
+        if batch is None:
+            return None
+        report = self._restore(batch, 'undo')
+        error = self._set_status(batch, 'undone')
+        if error is not None:
+            report.journal_error = error
+        return report
+
+    def _locate(self, files: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """按身份查找每个文件现在的路径，依次检查目标、临时和原名称，都不是时扫描所在的文件夹"""
+        located: List[Optional[str]] = []
+        missing = []
+        for i, item in enumerate(files):
+            identity = tuple(item["identity"])
+            found = None
+            for candidate in (item["destination"], item["temporary"], item["source"]):
+                if not candidate:
+                    continue
+                try:
+                    if file_identity(candidate) == identity:
+                        found = candidate
+                        break
+                except OSError:
+                    continue
+            located.append(found)
+            if found is None:
+                missing.append(i)
+
+        if missing:
+            by_identity: Dict[Tuple[int, int, int], str] = {}
+            for folder in {os.path.dirname(files[i]["source"]) for i in missing}:
+                try:
+                    entries = list(os.scandir(folder))
+                except OSError:
+                    continue
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            by_identity.setdefault(file_identity(entry.path), entry.path)
+                    except OSError:
+                        continue
+            for i in missing:
+                located[i] = by_identity.get(tuple(files[i]["identity"]))
+        return located
+
+    def _restore(self, batch: Dict[str, Any], kind: str) -> RenameReport:
+        """把一批日志中的文件改回原名，本身也作为 kind 批次写入日志"""
+        files = batch["files"]
+        located = self._locate(files)
+        report = RenameReport(len(files))
+        src_list, new_name_list = [], []
+        for item, current in zip(files, located):
+            if current is None:
+                report.failed_files.append((item["destination"], "文件已被移动、修改或删除，无法改回原名"))
+            elif current != item["source"]:
+                src_list.append(current)
+                new_name_list.append(os.path.basename(item["source"]))
+            else:
+                # 已经是原名（重命名前中断或已恢复）
+                report.renamed_files.append((current, None, current))
+        if not src_list:
+            return report
+
+        plan = plan_renames(src_list, new_name_list)
+        return _execute_journaled(src_list, plan, self, report, kind=kind, undo_of=batch["batch"])
+
+    def prune(self):
+        """只保留最近 keep 批已结束的日志，未结束的批次留待恢复"""
+        finished = [path for path in self._batch_paths() if self._read_status(path) is not None]
+        for path in finished[:max(0, len(finished) - self.keep)]:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
@@ -0,0 +1,22 @@
+import os
+import sys
+
+APP_NAME = '报销助手'
+
+def get_user_data_dir() -> str:
+    """
+    获取用户数据目录，不存在时自动创建
+    Windows: %LOCALAPPDATA%/报销助手
+    macOS: ~/Library/Application Support/报销助手
+    Linux: $XDG_DATA_HOME/报销助手 或 ~/.local/share/报销助手
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~/AppData/Local')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+
+    data_dir = os.path.join(base, APP_NAME)
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir